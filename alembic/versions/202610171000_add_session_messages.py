@@ -0,0 +1,88 @@
+"""add_session_messages.
+
+Revision ID: 202610171000
+Revises: 202601201940
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171000"
+down_revision: str | Sequence[str] | None = "202601201940"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # sessions.messages に格納済みのメッセージ数（追記パスの整合性チェック用）
+    # ⚠️ 注意: session_messages に追記された分も含めた合計数を保持する
+    op.add_column(
+        "sessions",
+        sa.Column(
+            "message_count",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+    op.execute("""
+        UPDATE sessions
+        SET message_count = jsonb_array_length(messages)
+    """)
+
+    # session_messages テーブル（追記専用のメッセージログ）
+    # 1ターンごとに sessions.messages 全体を書き換えず、新しいメッセージだけを INSERT する
+    # sessions.messages への畳み込みはアーカイブ時・全体保存時に行う
+    op.create_table(
+        "session_messages",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("session_key", sa.Text(), nullable=False),
+        sa.Column(
+            "message",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(
+            ["session_key"],
+            ["sessions.session_key"],
+            ondelete="CASCADE",
+        ),
+    )
+    op.create_index(
+        "idx_session_messages_session_key",
+        "session_messages",
+        ["session_key", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # 追記済みのメッセージを sessions.messages に畳み込んでから削除する
+    op.execute("""
+        UPDATE sessions s
+        SET messages = s.messages || d.pending_messages
+        FROM (
+            SELECT session_key, jsonb_agg(message ORDER BY id) AS pending_messages
+            FROM session_messages
+            GROUP BY session_key
+        ) d
+        WHERE s.session_key = d.session_key
+    """)
+
+    op.drop_index("idx_session_messages_session_key", table_name="session_messages")
+    op.drop_table("session_messages")
+    op.drop_column("sessions", "message_count")
@@ -0,0 +1,40 @@
+"""add_session_summary.
+
+Revision ID: 202610171100
+Revises: 202610171000
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171100"
+down_revision: str | Sequence[str] | None = "202610171000"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 会話の要約（古いターンを判定用モデルで要約したもの）
+    op.add_column("sessions", sa.Column("summary", sa.Text(), nullable=True))
+    # 要約に含まれているメッセージ数（messages の先頭からのインデックス）
+    op.add_column(
+        "sessions",
+        sa.Column(
+            "summary_message_index",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("sessions", "summary_message_index")
+    op.drop_column("sessions", "summary")
@@ -0,0 +1,53 @@
+"""add_eavesdrop_judgement_cache.
+
+Revision ID: 202610171200
+Revises: 202610171100
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171200"
+down_revision: str | Sequence[str] | None = "202610171100"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 聞き耳型の判定結果キャッシュ（JudgementCache の write-through 先）
+    # キーは判定の種類・モデル・正規化したプロンプトのハッシュ
+    op.create_table(
+        "eavesdrop_judgement_cache",
+        sa.Column("cache_key", sa.Text(), nullable=False),
+        sa.Column("kind", sa.Text(), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+    # 期限切れの削除用
+    op.create_index(
+        "idx_eavesdrop_judgement_cache_expires_at",
+        "eavesdrop_judgement_cache",
+        ["expires_at"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "idx_eavesdrop_judgement_cache_expires_at",
+        table_name="eavesdrop_judgement_cache",
+    )
+    op.drop_table("eavesdrop_judgement_cache")
@@ -0,0 +1,46 @@
+"""add_knowledge_chunks_notify.
+
+Revision ID: 202610171300
+Revises: 202610171200
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171300"
+down_revision: str | Sequence[str] | None = "202610171200"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # チャンク登録時に EmbeddingProcessor を起動する通知
+    # ステートメント単位のトリガーにし、まとめて登録しても通知は1回にする
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_knowledge_chunks_pending()
+        RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('knowledge_chunks_pending', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_knowledge_chunks_notify_pending
+        AFTER INSERT ON knowledge_chunks
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION notify_knowledge_chunks_pending();
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "DROP TRIGGER IF EXISTS trg_knowledge_chunks_notify_pending ON knowledge_chunks"
+    )
+    op.execute("DROP FUNCTION IF EXISTS notify_knowledge_chunks_pending()")
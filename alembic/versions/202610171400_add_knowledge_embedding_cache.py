@@ -0,0 +1,38 @@
+"""add_knowledge_embedding_cache.
+
+Revision ID: 202610171400
+Revises: 202610171300
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171400"
+down_revision: str | Sequence[str] | None = "202610171300"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Embedding のキャッシュ（EmbeddingCache の永続化先）
+    # キーは正規化したテキスト・モデル・次元数のハッシュ
+    # 内容が同じならベクトルも同じため、有効期限は設けない
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS knowledge_embedding_cache (
+            cache_key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            dimension INT NOT NULL,
+            embedding halfvec(1536) NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("knowledge_embedding_cache")
@@ -0,0 +1,59 @@
+"""add_knowledge_sources_filter_columns.
+
+Revision ID: 202610171500
+Revises: 202610171400
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171500"
+down_revision: str | Sequence[str] | None = "202610171400"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+FILTER_COLUMNS = ("channel_id", "guild_id", "author_id")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 検索のフィルタ用カラム
+    # metadata->>'channel_id' のキャスト比較はインデックスを使えないため、型付きカラムに持つ
+    for column in FILTER_COLUMNS:
+        op.add_column(
+            "knowledge_sources", sa.Column(column, sa.BigInteger(), nullable=True)
+        )
+
+    # 既存のソースを metadata から埋める（数値でない値は NULL のまま）
+    # セッションのアーカイブは投稿者を user_id として記録しているため、author_id の代わりに使う
+    op.execute(r"""
+        UPDATE knowledge_sources
+        SET channel_id = CASE
+                WHEN metadata->>'channel_id' ~ '^-?\d+$'
+                THEN (metadata->>'channel_id')::bigint
+            END,
+            guild_id = CASE
+                WHEN metadata->>'guild_id' ~ '^-?\d+$'
+                THEN (metadata->>'guild_id')::bigint
+            END,
+            author_id = CASE
+                WHEN COALESCE(metadata->>'author_id', metadata->>'user_id') ~ '^-?\d+$'
+                THEN COALESCE(metadata->>'author_id', metadata->>'user_id')::bigint
+            END
+        WHERE metadata ?| array['channel_id', 'guild_id', 'author_id', 'user_id']
+    """)
+
+    for column in FILTER_COLUMNS:
+        op.create_index(f"idx_sources_{column}", "knowledge_sources", [column])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in FILTER_COLUMNS:
+        op.drop_index(f"idx_sources_{column}", table_name="knowledge_sources")
+        op.drop_column("knowledge_sources", column)
@@ -55,6 +55,8 @@ class ChatCommands(commands.Cog):
             session.messages.clear()
             session.last_active_at = datetime.now()  # 最終アクセス時刻を更新
             session.last_archived_message_index = 0  # アーカイブインデックスもリセット
+            session.summary = None  # 会話要約もリセット
+            session.summary_message_index = 0
             await self.handler.session_manager.save_session(session_key)
 
             await interaction.followup.send(
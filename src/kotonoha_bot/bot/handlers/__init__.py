@@ -13,7 +13,11 @@ from kotonoha_bot.config import Config
 from kotonoha_bot.rate_limit.request_queue import RequestQueue
 from kotonoha_bot.services.ai import AnthropicProvider
 from kotonoha_bot.services.eavesdrop import ConversationBuffer, LLMJudge
+from kotonoha_bot.services.judge_cache import JudgementCache
+from kotonoha_bot.services.query_embedding_cache import CachedEmbeddingProvider
+from kotonoha_bot.services.retrieval import KnowledgeRetriever
 from kotonoha_bot.services.session import SessionManager
+from kotonoha_bot.services.summary import ConversationSummarizer
 
 from .eavesdrop import EavesdropHandler
 from .mention import MentionHandler
@@ -21,6 +25,7 @@ from .thread import ThreadHandler
 
 if TYPE_CHECKING:
     from kotonoha_bot.db.postgres import PostgreSQLDatabase
+    from kotonoha_bot.external.embedding import EmbeddingProvider
     from kotonoha_bot.features.knowledge_base.embedding_processor import (
         EmbeddingProcessor,
     )
@@ -39,6 +44,7 @@ class MessageHandler:
         session_archiver: SessionArchiver | None = None,
         db: PostgreSQLDatabase | None = None,
         config: Config | None = None,
+        embedding_provider: EmbeddingProvider | None = None,
     ):
         """MessageHandler を初期化.
 
@@ -48,6 +54,8 @@ class MessageHandler:
             session_archiver: SessionArchiverインスタンス（依存性注入）
             db: PostgreSQLDatabaseインスタンス（依存性注入、Alembic重複防止）
             config: 設定インスタンス（依存性注入、必須）
+            embedding_provider: EmbeddingProviderインスタンス
+                （依存性注入、省略時は知識ベース検索を行わない）
 
         Raises:
             ValueError: config が None の場合
@@ -68,11 +76,23 @@ class MessageHandler:
         self.conversation_buffer = ConversationBuffer(
             max_size=self.config.EAVESDROP_BUFFER_SIZE
         )
+        # 判定結果のキャッシュ（設定により PostgreSQL にも書き込む）
+        self.judgement_cache = JudgementCache(
+            max_entries=self.config.EAVESDROP_JUDGE_CACHE_SIZE,
+            ttl_seconds=self.config.EAVESDROP_JUDGE_CACHE_TTL_SECONDS,
+            store=db if self.config.EAVESDROP_JUDGE_CACHE_PERSISTENT else None,
+        )
         self.llm_judge = LLMJudge(
-            self.session_manager, self.ai_provider, config=self.config
+            self.session_manager,
+            self.ai_provider,
+            config=self.config,
+            judgement_cache=self.judgement_cache,
+        )
+        # リクエストキュー（セッション・チャンネル単位で順序を保ちつつ並行処理する）
+        self.request_queue = RequestQueue(
+            max_size=100,
+            max_concurrency=self.config.REQUEST_QUEUE_MAX_CONCURRENCY,
         )
-        # リクエストキュー
-        self.request_queue = RequestQueue(max_size=100)
         # タスクは on_ready イベントで開始する（イベントループが必要なため）
         # 聞き耳型の有効化（環境変数から読み込み）
         self._load_eavesdrop_channels()
@@ -81,6 +101,32 @@ class MessageHandler:
         self.embedding_processor = embedding_processor
         self.session_archiver = session_archiver
 
+        # 知識ベース検索（Embedding プロバイダーが渡された場合のみ有効）
+        self.retriever: KnowledgeRetriever | None = None
+        if embedding_provider is not None and self.config.RAG_ENABLED:
+            # 繰り返される質問はクエリのベクトルを再利用する（API 呼び出しを省く）
+            if self.config.RAG_QUERY_CACHE_SIZE > 0:
+                embedding_provider = CachedEmbeddingProvider(
+                    embedding_provider,
+                    max_entries=self.config.RAG_QUERY_CACHE_SIZE,
+                    ttl_seconds=self.config.RAG_QUERY_CACHE_TTL_SECONDS,
+                )
+            self.retriever = KnowledgeRetriever(
+                db, embedding_provider, config=self.config
+            )
+
+        # 会話要約（古いターンをバックグラウンドで要約する）
+        self.summarizer: ConversationSummarizer | None = None
+        if self.config.SUMMARY_ENABLED:
+            self.summarizer = ConversationSummarizer(
+                self.session_manager, self.ai_provider, config=self.config
+            )
+
+        # ストリーミング応答（無効時は応答の完成後にまとめて送信する）
+        stream_edit_interval: float | None = None
+        if self.config.LLM_STREAMING_ENABLED:
+            stream_edit_interval = self.config.LLM_STREAM_EDIT_INTERVAL_SECONDS
+
         # 各ハンドラーのインスタンス化（依存を渡す）
         self.mention = MentionHandler(
             self.bot,
@@ -88,6 +134,9 @@ class MessageHandler:
             self.ai_provider,
             self.request_queue,
             self.config,
+            retriever=self.retriever,
+            summarizer=self.summarizer,
+            stream_edit_interval=stream_edit_interval,
         )
         self.thread = ThreadHandler(
             self.bot,
@@ -97,6 +146,9 @@ class MessageHandler:
             self.request_queue,
             self.mention,
             self.config,
+            retriever=self.retriever,
+            summarizer=self.summarizer,
+            stream_edit_interval=stream_edit_interval,
         )
         self.eavesdrop = EavesdropHandler(
             self.bot,
@@ -125,6 +177,10 @@ class MessageHandler:
             logger.info("Running scheduled session cleanup...")
             await self.session_manager.cleanup_old_sessions()
             logger.info("Session cleanup completed")
+            # 永続化した判定結果キャッシュの期限切れを削除
+            if self.judgement_cache.store is not None:
+                deleted = await self.judgement_cache.store.delete_expired_judgements()
+                logger.debug(f"Deleted {deleted} expired judgement cache entries")
         except Exception as e:
             logger.error(f"Error during session cleanup: {e}")
 
@@ -145,7 +201,7 @@ class MessageHandler:
             idle_threshold = timedelta(minutes=5)
 
             saved_count = 0
-            for session_key, session in self.session_manager.sessions.items():
+            for session_key, session in list(self.session_manager.sessions.items()):
                 last_active = session.last_active_at
                 if last_active.tzinfo is None:
                     last_active = last_active.replace(tzinfo=UTC)
@@ -202,6 +258,7 @@ def setup_handlers(
     session_archiver: SessionArchiver | None = None,
     db: PostgreSQLDatabase | None = None,
     config: Config | None = None,
+    embedding_provider: EmbeddingProvider | None = None,
 ) -> MessageHandler:
     """イベントハンドラーをセットアップ.
 
@@ -211,6 +268,7 @@ def setup_handlers(
         session_archiver: SessionArchiverインスタンス（依存性注入）
         db: PostgreSQLDatabaseインスタンス（依存性注入、Alembic重複防止）
         config: 設定インスタンス（依存性注入、必須）
+        embedding_provider: EmbeddingProviderインスタンス（依存性注入、知識ベース検索用）
 
     Returns:
         MessageHandler インスタンス（Facade）
@@ -224,6 +282,7 @@ def setup_handlers(
         session_archiver=session_archiver,
         db=db,
         config=config,
+        embedding_provider=embedding_provider,
     )
 
     @bot.event
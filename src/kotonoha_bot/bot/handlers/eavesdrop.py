@@ -2,6 +2,8 @@
 
 import asyncio
 import logging
+import time
+from collections.abc import Awaitable, Callable
 
 import discord
 
@@ -12,6 +14,7 @@ from kotonoha_bot.db.models import MessageRole
 from kotonoha_bot.rate_limit.request_queue import RequestPriority, RequestQueue
 from kotonoha_bot.services.ai import AIProvider
 from kotonoha_bot.services.eavesdrop import ConversationBuffer, LLMJudge
+from kotonoha_bot.services.metrics import eavesdrop_evaluations_counter
 from kotonoha_bot.services.session import SessionManager
 from kotonoha_bot.utils.message import (
     create_response_embed,
@@ -23,7 +26,11 @@ logger = logging.getLogger(__name__)
 
 
 class EavesdropHandler:
-    """聞き耳型応答ハンドラー."""
+    """聞き耳型応答ハンドラー.
+
+    連続して投稿されたメッセージはチャンネルごとにまとめ、メッセージが途切れた時点
+    （または最大待機時間の経過時）の最新の会話ログで1回だけ判定する。
+    """
 
     def __init__(
         self,
@@ -56,6 +63,23 @@ class EavesdropHandler:
         self.router = router
         self.request_queue = request_queue
         self.config = config
+        # チャンネルごとの待機中の判定タスクと、待機を開始した時刻
+        self._debounce_tasks: dict[int, asyncio.Task] = {}
+        self._debounce_started_at: dict[int, float] = {}
+        # 実行中の判定タスク（完了まで参照を保持する）
+        self._tasks: set[asyncio.Task] = set()
+        # チャンネルごとの最後に判定した会話ログの末尾のメッセージ
+        self._last_evaluated: dict[int, discord.Message] = {}
+
+    async def close(self) -> None:
+        """待機中・実行中の判定タスクを取り消し、終了するまで待つ."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._debounce_tasks.clear()
+        self._debounce_started_at.clear()
 
     async def handle(self, message: discord.Message) -> None:
         """聞き耳型の処理（リクエストキューに追加）.
@@ -73,12 +97,85 @@ class EavesdropHandler:
 
         logger.debug(f"Eavesdrop message from {message.author} in {message.channel}")
 
+        debounce_seconds = self.config.EAVESDROP_DEBOUNCE_SECONDS if self.config else 0
+        if debounce_seconds <= 0:
+            # メッセージごとに判定する
+            await self._enqueue(message, self._process)
+            return
+
+        # 会話ログには即座に追加し、判定はメッセージが途切れるまで待つ
+        self.conversation_buffer.add_message(message.channel.id, message)
+        self._schedule_evaluation(message, debounce_seconds)
+
+    def _schedule_evaluation(
+        self, message: discord.Message, debounce_seconds: float
+    ) -> None:
+        """チャンネルの判定を予約（待機中の判定は取り消して予約し直す）.
+
+        Args:
+            message: Discord メッセージ（チャンネルの最新のメッセージ）
+            debounce_seconds: メッセージが途切れてから判定するまでの待機時間（秒）
+        """
+        channel_id = message.channel.id
+        max_delay = (
+            self.config.EAVESDROP_DEBOUNCE_MAX_DELAY_SECONDS
+            if self.config
+            else debounce_seconds
+        )
+
+        # 最初のメッセージから最大待機時間を超えて判定を遅らせない
+        now = time.monotonic()
+        started_at = self._debounce_started_at.setdefault(channel_id, now)
+        delay = max(0.0, min(debounce_seconds, started_at + max_delay - now))
+
+        pending = self._debounce_tasks.get(channel_id)
+        if pending is not None and not pending.done():
+            # 古いスナップショットでの判定は不要なので取り消す
+            pending.cancel()
+            eavesdrop_evaluations_counter.labels(outcome="superseded").inc()
+
+        task = asyncio.create_task(self._evaluate_after(message, delay))
+        self._debounce_tasks[channel_id] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _evaluate_after(self, message: discord.Message, delay: float) -> None:
+        """待機後にチャンネルの判定をリクエストキューに追加.
+
+        Args:
+            message: Discord メッセージ（チャンネルの最新のメッセージ）
+            delay: 待機時間（秒）
+        """
+        channel_id = message.channel.id
+        await asyncio.sleep(delay)
+
+        # 待機が終わったら、以降のメッセージは新しい待機として扱う
+        # （判定の実行中に取り消されないよう、先に登録を解除する）
+        if self._debounce_tasks.get(channel_id) is asyncio.current_task():
+            del self._debounce_tasks[channel_id]
+        self._debounce_started_at.pop(channel_id, None)
+
+        await self._enqueue(message, self._evaluate)
+
+    async def _enqueue(
+        self,
+        message: discord.Message,
+        func: Callable[[discord.Message], Awaitable[None]],
+    ) -> None:
+        """聞き耳型の処理をリクエストキューに追加し、完了を待機.
+
+        Args:
+            message: Discord メッセージ
+            func: 実行する処理（_process または _evaluate）
+        """
         # リクエストキューに追加（優先度: EAVESDROP - 最高優先度）
         try:
+            # 同じチャンネルの会話ログは到着順に処理する（チャンネル単位）
             future = await self.request_queue.enqueue(
                 RequestPriority.EAVESDROP,
-                self._process,
+                func,
                 message,
+                order_key=f"eavesdrop:{message.channel.id}",
             )
             # 結果を待機（エラーハンドリングは内部で行う）
             await future
@@ -86,20 +183,27 @@ class EavesdropHandler:
             logger.exception(f"Error enqueuing eavesdrop request: {e}")
             # キューが満杯などの場合のフォールバック
             try:
-                await self._process(message)
+                await func(message)
             except Exception as inner_e:
                 logger.exception(f"Error in fallback eavesdrop processing: {inner_e}")
 
     async def _process(self, message: discord.Message) -> None:
-        """聞き耳型処理の実装.
+        """聞き耳型処理の実装（会話ログに追加して判定）.
 
         Args:
             message: Discord メッセージ
         """
-        try:
-            # 会話ログに追加
-            self.conversation_buffer.add_message(message.channel.id, message)
+        # 会話ログに追加
+        self.conversation_buffer.add_message(message.channel.id, message)
+        await self._evaluate(message)
+
+    async def _evaluate(self, message: discord.Message) -> None:
+        """会話ログの最新のスナップショットで判定し、必要なら応答.
 
+        Args:
+            message: Discord メッセージ（判定するチャンネルのメッセージ）
+        """
+        try:
             # 直近のメッセージを取得
             recent_messages = self.conversation_buffer.get_recent_messages(
                 message.channel.id,
@@ -115,6 +219,18 @@ class EavesdropHandler:
                 )
                 return
 
+            # 同じスナップショットを判定済みの場合は判定しない
+            # （キューで待機中に後続の判定が同じ会話ログを判定した場合など）
+            if self._last_evaluated.get(message.channel.id) is recent_messages[-1]:
+                logger.debug(
+                    f"Skipping eavesdrop evaluation for already evaluated "
+                    f"messages in channel: {message.channel.id}"
+                )
+                eavesdrop_evaluations_counter.labels(outcome="duplicate").inc()
+                return
+            self._last_evaluated[message.channel.id] = recent_messages[-1]
+            eavesdrop_evaluations_counter.labels(outcome="evaluated").inc()
+
             # LLM 判断機能を呼び出し
             response_text = await self.llm_judge.generate_response(
                 message.channel.id, recent_messages
@@ -125,28 +241,30 @@ class EavesdropHandler:
                 # セッションキーを生成
                 session_key = f"eavesdrop:{message.channel.id}"
 
-                # セッションを取得または作成
-                session = await self.session_manager.get_session(session_key)
-                if not session:
-                    # ⚠️ 重要: guild_id は Discord URL生成に必要
-                    guild_id = message.guild.id if message.guild else None
-                    session = await self.session_manager.create_session(
+                # 処理中はセッションがキャッシュから解放されないようにする
+                async with self.session_manager.pinned(session_key):
+                    # セッションを取得または作成
+                    session = await self.session_manager.get_session(session_key)
+                    if not session:
+                        # ⚠️ 重要: guild_id は Discord URL生成に必要
+                        guild_id = message.guild.id if message.guild else None
+                        session = await self.session_manager.create_session(
+                            session_key=session_key,
+                            session_type="eavesdrop",
+                            guild_id=guild_id,
+                            channel_id=message.channel.id,
+                        )
+                        logger.info(f"Created new eavesdrop session: {session_key}")
+
+                    # アシスタントメッセージを追加
+                    await self.session_manager.add_message(
                         session_key=session_key,
-                        session_type="eavesdrop",
-                        guild_id=guild_id,
-                        channel_id=message.channel.id,
+                        role=MessageRole.ASSISTANT,
+                        content=response_text,
                     )
-                    logger.info(f"Created new eavesdrop session: {session_key}")
-
-                # アシスタントメッセージを追加
-                await self.session_manager.add_message(
-                    session_key=session_key,
-                    role=MessageRole.ASSISTANT,
-                    content=response_text,
-                )
 
-                # セッションを保存
-                await self.session_manager.save_session(session_key)
+                    # セッションを保存
+                    await self.session_manager.save_session(session_key)
 
                 # メインチャンネルに直接投稿（メッセージ分割対応）
                 response_chunks = split_message(response_text)
@@ -19,7 +19,9 @@ from kotonoha_bot.errors.discord import (
 from kotonoha_bot.errors.messages import ErrorMessages
 from kotonoha_bot.rate_limit.request_queue import RequestPriority, RequestQueue
 from kotonoha_bot.services.ai import AIProvider
+from kotonoha_bot.services.retrieval import KnowledgeRetriever
 from kotonoha_bot.services.session import SessionManager
+from kotonoha_bot.services.summary import ConversationSummarizer
 from kotonoha_bot.utils.datetime import format_datetime_for_prompt
 from kotonoha_bot.utils.message import (
     create_response_embed,
@@ -28,9 +30,27 @@ from kotonoha_bot.utils.message import (
 )
 from kotonoha_bot.utils.prompts import DEFAULT_SYSTEM_PROMPT
 
+from .streaming import stream_reply
+
 logger = logging.getLogger(__name__)
 
 
+def get_context_channel_id(channel: discord.abc.Messageable) -> int | None:
+    """知識ベース検索の対象とするチャンネルIDを取得.
+
+    スレッドの場合は親チャンネルのIDを返す（アーカイブ時の channel_id と揃える）。
+
+    Args:
+        channel: Discord チャンネル
+
+    Returns:
+        チャンネルID（取得できない場合は None）
+    """
+    if isinstance(channel, discord.Thread):
+        return channel.parent_id
+    return getattr(channel, "id", None)
+
+
 class MentionHandler:
     """メンション応答ハンドラー."""
 
@@ -41,6 +61,9 @@ class MentionHandler:
         ai_provider: AIProvider,
         request_queue: RequestQueue,
         config: Config | None = None,
+        retriever: KnowledgeRetriever | None = None,
+        summarizer: ConversationSummarizer | None = None,
+        stream_edit_interval: float | None = None,
     ):
         """MentionHandler を初期化.
 
@@ -50,12 +73,19 @@ class MentionHandler:
             ai_provider: AIプロバイダー
             request_queue: リクエストキュー
             config: 設定インスタンス（省略可）
+            retriever: 知識ベース検索（省略時は検索しない）
+            summarizer: 会話要約（省略時は要約しない）
+            stream_edit_interval: ストリーミング応答の編集間隔（秒）
+                （省略時はストリーミングせず、応答の完成後にまとめて送信する）
         """
         self.bot = bot
         self.session_manager = session_manager
         self.ai_provider = ai_provider
         self.request_queue = request_queue
         self.config = config
+        self.retriever = retriever
+        self.summarizer = summarizer
+        self.stream_edit_interval = stream_edit_interval
 
     async def handle(self, message: discord.Message) -> None:
         """メンション時の処理（リクエストキューに追加）.
@@ -75,10 +105,12 @@ class MentionHandler:
 
         # リクエストキューに追加（優先度: MENTION）
         try:
+            # 同じユーザーのメンションは到着順に処理する（セッション単位）
             future = await self.request_queue.enqueue(
                 RequestPriority.MENTION,
                 self._process,
                 message,
+                order_key=f"mention:{message.author.id}",
             )
             # 結果を待機（エラーハンドリングは内部で行う）
             await future
@@ -96,12 +128,16 @@ class MentionHandler:
         Args:
             message: Discord メッセージ
         """
+        # セッションキーを生成（ユーザーIDベース）
+        session_key = f"mention:{message.author.id}"
+
         try:
             # タイピングインジケーターを表示
-            async with message.channel.typing():
-                # セッションキーを生成（ユーザーIDベース）
-                session_key = f"mention:{message.author.id}"
-
+            # 処理中はセッションがキャッシュから解放されないようにする
+            async with (
+                message.channel.typing(),
+                self.session_manager.pinned(session_key),
+            ):
                 # セッションを取得または作成
                 session = await self.session_manager.get_session(session_key)
                 if not session:
@@ -132,11 +168,41 @@ class MentionHandler:
                 current_date_info = format_datetime_for_prompt()
                 system_prompt = DEFAULT_SYSTEM_PROMPT + current_date_info
 
-                # AI応答を生成
-                response_text, token_info = await self.ai_provider.generate_response(
-                    messages=session.get_conversation_history(),
-                    system_prompt=system_prompt,
-                )
+                # 要約済みの古いターンは要約に置き換える
+                history = session.get_conversation_history()
+                if self.summarizer is not None:
+                    history, system_prompt = self.summarizer.apply(
+                        session, system_prompt
+                    )
+
+                # 知識ベースから関連情報を検索してプロンプトに注入
+                # （タイムアウト・失敗時はコンテキストなしで応答する）
+                if self.retriever is not None:
+                    history, system_prompt = await self.retriever.augment(
+                        user_message,
+                        history,
+                        system_prompt,
+                        channel_id=get_context_channel_id(message.channel),
+                    )
+
+                # AI応答を生成（ストリーミング時は生成しながら逐次返信する）
+                if self.stream_edit_interval is not None:
+                    response_text, token_info = await stream_reply(
+                        self.ai_provider,
+                        history,
+                        system_prompt,
+                        reply=message.reply,
+                        channel=message.channel,
+                        edit_interval=self.stream_edit_interval,
+                    )
+                else:
+                    (
+                        response_text,
+                        token_info,
+                    ) = await self.ai_provider.generate_response(
+                        messages=history,
+                        system_prompt=system_prompt,
+                    )
 
                 # アシスタントメッセージを追加
                 await self.session_manager.add_message(
@@ -148,29 +214,35 @@ class MentionHandler:
                 # セッションを保存
                 await self.session_manager.save_session(session_key)
 
-                # 返信（メッセージ分割対応）
-                response_chunks = split_message(response_text)
-                formatted_chunks = format_split_messages(
-                    response_chunks, len(response_chunks)
-                )
-
-                # 使用モデル名とレート制限使用率を取得
-                model_name = self.ai_provider.get_last_used_model()
-                rate_limit_usage = self.ai_provider.get_rate_limit_usage()
+                # 要約が必要であればバックグラウンドで更新する
+                if self.summarizer is not None:
+                    self.summarizer.schedule_update(session)
 
-                # 最初のメッセージは reply で送信（フッター付き）
-                if formatted_chunks:
-                    # 最初のメッセージのみEmbedで送信（フッター付き）
-                    embed = create_response_embed(
-                        formatted_chunks[0], model_name, rate_limit_usage
+                # ストリーミング時は送信済みのため、ここではまとめて送信しない
+                if self.stream_edit_interval is None:
+                    # 返信（メッセージ分割対応）
+                    response_chunks = split_message(response_text)
+                    formatted_chunks = format_split_messages(
+                        response_chunks, len(response_chunks)
                     )
-                    await message.reply(embed=embed)
 
-                    # 残りのメッセージは順次送信
-                    for chunk in formatted_chunks[1:]:
-                        await message.channel.send(chunk)
-                        # レート制限を考慮して少し待機
-                        await asyncio.sleep(0.5)
+                    # 使用モデル名とレート制限使用率を取得
+                    model_name = self.ai_provider.get_last_used_model()
+                    rate_limit_usage = self.ai_provider.get_rate_limit_usage()
+
+                    # 最初のメッセージは reply で送信（フッター付き）
+                    if formatted_chunks:
+                        # 最初のメッセージのみEmbedで送信（フッター付き）
+                        embed = create_response_embed(
+                            formatted_chunks[0], model_name, rate_limit_usage
+                        )
+                        await message.reply(embed=embed)
+
+                        # 残りのメッセージは順次送信
+                        for chunk in formatted_chunks[1:]:
+                            await message.channel.send(chunk)
+                            # レート制限を考慮して少し待機
+                            await asyncio.sleep(0.5)
 
                 logger.info(f"Sent response to {message.author}")
 
@@ -0,0 +1,179 @@
+"""ストリーミング応答の Discord 送信."""
+
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+import discord
+
+from kotonoha_bot.db.models import Message
+from kotonoha_bot.errors.ai import AIServiceError
+from kotonoha_bot.services.ai import AIProvider, TokenInfo
+from kotonoha_bot.utils.message import (
+    DISCORD_MESSAGE_MAX_LENGTH,
+    create_response_embed,
+    find_split_position,
+)
+
+logger = logging.getLogger(__name__)
+
+# index 番目のメッセージを送信する関数
+SendFunc = Callable[[int, str], Awaitable[discord.Message]]
+# index 番目のメッセージを編集する関数
+EditFunc = Callable[[int, discord.Message, str], Awaitable[object]]
+
+
+class StreamingReply:
+    """ストリーミング中の応答を Discord メッセージに反映するクラス.
+
+    最初のテキストが届いた時点で1通目を送信し、以降は edit_interval 秒ごとに
+    まとめて編集する（Discord の編集レート制限を避けるため）。
+    1通が最大文字数を超える場合は区切りの良い位置で確定し、続きを新しいメッセージで送信する。
+    """
+
+    def __init__(
+        self,
+        send: SendFunc,
+        edit: EditFunc,
+        edit_interval: float = 1.0,
+        max_length: int = DISCORD_MESSAGE_MAX_LENGTH,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """StreamingReply を初期化.
+
+        Args:
+            send: index 番目のメッセージを送信する関数
+            edit: index 番目のメッセージを編集する関数
+            edit_interval: 編集の最小間隔（秒）
+            max_length: 1通あたりの最大文字数
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self.send = send
+        self.edit = edit
+        self.edit_interval = edit_interval
+        self.max_length = max_length
+        self.clock = clock
+        self.messages: list[discord.Message] = []
+        # 各メッセージのテキストと、Discord に反映済みのテキスト
+        self._texts: list[str] = [""]
+        self._shown: list[str] = []
+        self._last_edit_at = 0.0
+
+    @property
+    def text(self) -> str:
+        """これまでに受け取った応答テキスト（分割前）."""
+        return "".join(self._texts)
+
+    async def append(self, delta: str) -> None:
+        """応答テキストの差分を追加.
+
+        Args:
+            delta: 応答テキストの差分
+        """
+        self._texts[-1] += delta
+
+        # 最大文字数を超えた分は新しいメッセージに送る
+        while len(self._texts[-1]) > self.max_length:
+            current = self._texts[-1]
+            split_pos = find_split_position(current, self.max_length)
+            if split_pos <= 0:
+                split_pos = self.max_length
+            self._texts[-1] = current[:split_pos]
+            await self._flush(force=True)
+            self._texts.append(current[split_pos:])
+
+        await self._flush()
+
+    async def finish(self) -> None:
+        """残りのテキストを反映する."""
+        await self._flush(force=True)
+
+    async def _flush(self, force: bool = False) -> None:
+        """最後のメッセージを送信または編集する.
+
+        Args:
+            force: 編集間隔に関係なく反映するか
+        """
+        index = len(self._texts) - 1
+        text = self._texts[index]
+        if not text.strip():
+            return
+
+        if index >= len(self.messages):
+            self.messages.append(await self.send(index, text))
+            self._shown.append(text)
+            self._last_edit_at = self.clock()
+            return
+
+        if self._shown[index] == text:
+            return
+        if not force and self.clock() - self._last_edit_at < self.edit_interval:
+            return
+
+        await self.edit(index, self.messages[index], text)
+        self._shown[index] = text
+        self._last_edit_at = self.clock()
+
+
+async def stream_reply(
+    ai_provider: AIProvider,
+    messages: list[Message],
+    system_prompt: str,
+    reply: Callable[..., Awaitable[discord.Message]],
+    channel: discord.abc.Messageable,
+    edit_interval: float,
+) -> tuple[str, TokenInfo]:
+    """応答をストリーミングで生成し、Discord に逐次反映する.
+
+    1通目は reply で Embed（フッター付き）として送信し、
+    最大文字数を超えた続きは channel に通常のメッセージとして送信する。
+
+    Args:
+        ai_provider: AIプロバイダー
+        messages: 会話履歴
+        system_prompt: システムプロンプト
+        reply: 1通目を送信する関数（message.reply や thread.send）
+        channel: 2通目以降を送信するチャンネル
+        edit_interval: 編集の最小間隔（秒）
+
+    Returns:
+        (応答テキスト, トークン使用情報) のタプル
+
+    Raises:
+        AIServiceError: ストリームがトークン使用情報を返さずに終了した場合
+    """
+
+    def create_embed(text: str) -> discord.Embed:
+        return create_response_embed(
+            text,
+            ai_provider.get_last_used_model(),
+            ai_provider.get_rate_limit_usage(),
+        )
+
+    async def send(index: int, text: str) -> discord.Message:
+        if index == 0:
+            return await reply(embed=create_embed(text))
+        return await channel.send(text)
+
+    async def edit(index: int, sent: discord.Message, text: str) -> object:
+        if index == 0:
+            return await sent.edit(embed=create_embed(text))
+        return await sent.edit(content=text)
+
+    streaming_reply = StreamingReply(send, edit, edit_interval=edit_interval)
+    token_info: TokenInfo | None = None
+
+    async for item in ai_provider.stream_response(
+        messages=messages, system_prompt=system_prompt
+    ):
+        if isinstance(item, TokenInfo):
+            token_info = item
+        else:
+            await streaming_reply.append(item)
+
+    await streaming_reply.finish()
+    if token_info is None:
+        raise AIServiceError("Stream ended without usage information")
+
+    logger.debug(f"Streamed response into {len(streaming_reply.messages)} messages")
+    return streaming_reply.text, token_info
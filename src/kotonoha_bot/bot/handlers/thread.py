@@ -7,7 +7,7 @@ from typing import Literal, cast
 import discord
 
 from kotonoha_bot.bot.client import KotonohaBot
-from kotonoha_bot.bot.handlers.mention import MentionHandler
+from kotonoha_bot.bot.handlers.mention import MentionHandler, get_context_channel_id
 from kotonoha_bot.bot.router import MessageRouter
 from kotonoha_bot.config import Config
 from kotonoha_bot.db.models import MessageRole
@@ -22,7 +22,9 @@ from kotonoha_bot.errors.discord import (
 from kotonoha_bot.errors.messages import ErrorMessages
 from kotonoha_bot.rate_limit.request_queue import RequestPriority, RequestQueue
 from kotonoha_bot.services.ai import AIProvider
+from kotonoha_bot.services.retrieval import KnowledgeRetriever
 from kotonoha_bot.services.session import SessionManager
+from kotonoha_bot.services.summary import ConversationSummarizer
 from kotonoha_bot.utils.datetime import format_datetime_for_prompt
 from kotonoha_bot.utils.message import (
     create_response_embed,
@@ -31,6 +33,8 @@ from kotonoha_bot.utils.message import (
 )
 from kotonoha_bot.utils.prompts import DEFAULT_SYSTEM_PROMPT
 
+from .streaming import stream_reply
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,6 +50,9 @@ class ThreadHandler:
         request_queue: RequestQueue,
         mention_handler: MentionHandler,
         config: Config | None = None,
+        retriever: KnowledgeRetriever | None = None,
+        summarizer: ConversationSummarizer | None = None,
+        stream_edit_interval: float | None = None,
     ):
         """ThreadHandler を初期化.
 
@@ -57,6 +64,10 @@ class ThreadHandler:
             request_queue: リクエストキュー
             mention_handler: メンションハンドラー（フォールバック用）
             config: 設定インスタンス（省略可）
+            retriever: 知識ベース検索（省略時は検索しない）
+            summarizer: 会話要約（省略時は要約しない）
+            stream_edit_interval: ストリーミング応答の編集間隔（秒）
+                （省略時はストリーミングせず、応答の完成後にまとめて送信する）
         """
         self.bot = bot
         self.session_manager = session_manager
@@ -65,6 +76,9 @@ class ThreadHandler:
         self.request_queue = request_queue
         self.mention_handler = mention_handler
         self.config = config
+        self.retriever = retriever
+        self.summarizer = summarizer
+        self.stream_edit_interval = stream_edit_interval
 
     async def handle(self, message: discord.Message) -> None:
         """スレッド型の処理（リクエストキューに追加）.
@@ -83,18 +97,22 @@ class ThreadHandler:
             # 既存スレッド内での会話か、新規スレッド作成か判定
             if isinstance(message.channel, discord.Thread):
                 # 既存スレッド内での会話
+                # 同じスレッドのメッセージは到着順に処理する（セッション単位）
                 future = await self.request_queue.enqueue(
                     RequestPriority.THREAD,
                     self._process_message,
                     message,
+                    order_key=f"thread:{message.channel.id}",
                 )
             else:
                 # メンション検知時の新規スレッド作成
                 if self.bot.user in message.mentions:
+                    # 新規スレッドは別セッションになるため、チャンネル単位で順序を保つ
                     future = await self.request_queue.enqueue(
                         RequestPriority.THREAD,
                         self._process_creation,
                         message,
+                        order_key=f"channel:{message.channel.id}",
                     )
                 else:
                     return  # メンションされていない場合は処理しない
@@ -234,75 +252,113 @@ class ThreadHandler:
             # セッションキーを生成
             session_key = f"thread:{thread.id}"
 
-            # セッションを取得または作成
-            session = await self.session_manager.get_session(session_key)
-            if not session:
-                # ⚠️ 重要: guild_id は Discord URL生成に必要
-                guild_id = thread.guild.id if thread.guild else None
-                session = await self.session_manager.create_session(
+            # 処理中はセッションがキャッシュから解放されないようにする
+            async with self.session_manager.pinned(session_key):
+                # セッションを取得または作成
+                session = await self.session_manager.get_session(session_key)
+                if not session:
+                    # ⚠️ 重要: guild_id は Discord URL生成に必要
+                    guild_id = thread.guild.id if thread.guild else None
+                    session = await self.session_manager.create_session(
+                        session_key=session_key,
+                        session_type="thread",
+                        guild_id=guild_id,
+                        channel_id=message.channel.id,
+                        thread_id=thread.id,
+                        user_id=message.author.id,
+                    )
+                    logger.info(f"Created new thread session: {session_key}")
+
+                # ユーザーメッセージを追加
+                await self.session_manager.add_message(
                     session_key=session_key,
-                    session_type="thread",
-                    guild_id=guild_id,
-                    channel_id=message.channel.id,
-                    thread_id=thread.id,
-                    user_id=message.author.id,
+                    role=MessageRole.USER,
+                    content=user_message,
                 )
-                logger.info(f"Created new thread session: {session_key}")
 
-            # ユーザーメッセージを追加
-            await self.session_manager.add_message(
-                session_key=session_key,
-                role=MessageRole.USER,
-                content=user_message,
-            )
+                # AI応答を生成
+                async with thread.typing():
+                    # 現在の日付情報を含むシステムプロンプトを生成
+                    current_date_info = format_datetime_for_prompt()
+                    system_prompt = DEFAULT_SYSTEM_PROMPT + current_date_info
+
+                    # 要約済みの古いターンは要約に置き換える
+                    history = session.get_conversation_history()
+                    if self.summarizer is not None:
+                        history, system_prompt = self.summarizer.apply(
+                            session, system_prompt
+                        )
 
-            # AI応答を生成
-            async with thread.typing():
-                # 現在の日付情報を含むシステムプロンプトを生成
-                current_date_info = format_datetime_for_prompt()
-                system_prompt = DEFAULT_SYSTEM_PROMPT + current_date_info
+                    # 知識ベースから関連情報を検索してプロンプトに注入
+                    # （タイムアウト・失敗時はコンテキストなしで応答する）
+                    if self.retriever is not None:
+                        history, system_prompt = await self.retriever.augment(
+                            user_message,
+                            history,
+                            system_prompt,
+                            channel_id=get_context_channel_id(thread),
+                        )
 
-                # AI応答を生成
-                response_text, token_info = await self.ai_provider.generate_response(
-                    messages=session.get_conversation_history(),
-                    system_prompt=system_prompt,
-                )
+                    # AI応答を生成（ストリーミング時は生成しながら逐次返信する）
+                    if self.stream_edit_interval is not None:
+                        response_text, token_info = await stream_reply(
+                            self.ai_provider,
+                            history,
+                            system_prompt,
+                            reply=thread.send,
+                            channel=thread,
+                            edit_interval=self.stream_edit_interval,
+                        )
+                    else:
+                        (
+                            response_text,
+                            token_info,
+                        ) = await self.ai_provider.generate_response(
+                            messages=history,
+                            system_prompt=system_prompt,
+                        )
 
-                # アシスタントメッセージを追加
-                await self.session_manager.add_message(
-                    session_key=session_key,
-                    role=MessageRole.ASSISTANT,
-                    content=response_text,
-                )
+                    # アシスタントメッセージを追加
+                    await self.session_manager.add_message(
+                        session_key=session_key,
+                        role=MessageRole.ASSISTANT,
+                        content=response_text,
+                    )
 
-                # セッションを保存
-                await self.session_manager.save_session(session_key)
+                    # セッションを保存
+                    await self.session_manager.save_session(session_key)
 
-                # スレッド内で返信（メッセージ分割対応）
-                response_chunks = split_message(response_text)
-                formatted_chunks = format_split_messages(
-                    response_chunks, len(response_chunks)
-                )
+                    # 要約が必要であればバックグラウンドで更新する
+                    if self.summarizer is not None:
+                        self.summarizer.schedule_update(session)
 
-                # 使用モデル名とレート制限使用率を取得
-                model_name = self.ai_provider.get_last_used_model()
-                rate_limit_usage = self.ai_provider.get_rate_limit_usage()
+                    # ストリーミング時は送信済みのため、ここではまとめて送信しない
+                    if self.stream_edit_interval is None:
+                        # スレッド内で返信（メッセージ分割対応）
+                        response_chunks = split_message(response_text)
+                        formatted_chunks = format_split_messages(
+                            response_chunks, len(response_chunks)
+                        )
 
-                # 最初のメッセージは reply で送信（フッター付き）
-                if formatted_chunks:
-                    # 最初のメッセージのみEmbedで送信（フッター付き）
-                    embed = create_response_embed(
-                        formatted_chunks[0], model_name, rate_limit_usage
-                    )
-                    await thread.send(embed=embed)
+                        # 使用モデル名とレート制限使用率を取得
+                        model_name = self.ai_provider.get_last_used_model()
+                        rate_limit_usage = self.ai_provider.get_rate_limit_usage()
 
-                    # 残りのメッセージは順次送信
-                    for chunk in formatted_chunks[1:]:
-                        await thread.send(chunk)
-                        await asyncio.sleep(0.5)
+                        # 最初のメッセージは reply で送信（フッター付き）
+                        if formatted_chunks:
+                            # 最初のメッセージのみEmbedで送信（フッター付き）
+                            embed = create_response_embed(
+                                formatted_chunks[0], model_name, rate_limit_usage
+                            )
+                            await thread.send(embed=embed)
 
-                logger.info(f"Sent response in thread: {thread.id}")
-                return True
+                            # 残りのメッセージは順次送信
+                            for chunk in formatted_chunks[1:]:
+                                await thread.send(chunk)
+                                await asyncio.sleep(0.5)
+
+                    logger.info(f"Sent response in thread: {thread.id}")
+                    return True
 
         except Exception as e:
             logger.exception(
@@ -325,97 +381,137 @@ class ThreadHandler:
         thread = message.channel
         session_key = f"thread:{thread.id}"
 
-        # セッションを取得または作成
-        session = await self.session_manager.get_session(session_key)
-        if not session:
-            # スレッドが既に存在する場合、会話履歴を復元
-            # ⚠️ 重要: guild_id は Discord URL生成に必要
-            guild_id = thread.guild.id if thread.guild else None
-            parent_id = thread.parent_id if thread.parent_id else None
-            session = await self.session_manager.create_session(
+        # 処理中はセッションがキャッシュから解放されないようにする
+        async with self.session_manager.pinned(session_key):
+            # セッションを取得または作成
+            session = await self.session_manager.get_session(session_key)
+            if not session:
+                # スレッドが既に存在する場合、会話履歴を復元
+                # ⚠️ 重要: guild_id は Discord URL生成に必要
+                guild_id = thread.guild.id if thread.guild else None
+                parent_id = thread.parent_id if thread.parent_id else None
+                session = await self.session_manager.create_session(
+                    session_key=session_key,
+                    session_type="thread",
+                    guild_id=guild_id,
+                    channel_id=parent_id,
+                    thread_id=thread.id,
+                    user_id=message.author.id,
+                )
+                logger.info(
+                    f"Created thread session from existing thread: {session_key}"
+                )
+
+            # ユーザーメッセージを追加
+            await self.session_manager.add_message(
                 session_key=session_key,
-                session_type="thread",
-                guild_id=guild_id,
-                channel_id=parent_id,
-                thread_id=thread.id,
-                user_id=message.author.id,
+                role=MessageRole.USER,
+                content=message.content,
             )
-            logger.info(f"Created thread session from existing thread: {session_key}")
 
-        # ユーザーメッセージを追加
-        await self.session_manager.add_message(
-            session_key=session_key,
-            role=MessageRole.USER,
-            content=message.content,
-        )
+            # AI応答を生成
+            try:
+                async with thread.typing():
+                    # 現在の日付情報を含むシステムプロンプトを生成
+                    current_date_info = format_datetime_for_prompt()
+                    system_prompt = DEFAULT_SYSTEM_PROMPT + current_date_info
+
+                    # 要約済みの古いターンは要約に置き換える
+                    history = session.get_conversation_history()
+                    if self.summarizer is not None:
+                        history, system_prompt = self.summarizer.apply(
+                            session, system_prompt
+                        )
 
-        # AI応答を生成
-        try:
-            async with thread.typing():
-                # 現在の日付情報を含むシステムプロンプトを生成
-                current_date_info = format_datetime_for_prompt()
-                system_prompt = DEFAULT_SYSTEM_PROMPT + current_date_info
+                    # 知識ベースから関連情報を検索してプロンプトに注入
+                    # （タイムアウト・失敗時はコンテキストなしで応答する）
+                    if self.retriever is not None:
+                        history, system_prompt = await self.retriever.augment(
+                            message.content,
+                            history,
+                            system_prompt,
+                            channel_id=get_context_channel_id(thread),
+                        )
 
-                # AI応答を生成
-                response_text, token_info = await self.ai_provider.generate_response(
-                    messages=session.get_conversation_history(),
-                    system_prompt=system_prompt,
-                )
+                    # AI応答を生成（ストリーミング時は生成しながら逐次返信する）
+                    if self.stream_edit_interval is not None:
+                        response_text, token_info = await stream_reply(
+                            self.ai_provider,
+                            history,
+                            system_prompt,
+                            reply=message.reply,
+                            channel=thread,
+                            edit_interval=self.stream_edit_interval,
+                        )
+                    else:
+                        (
+                            response_text,
+                            token_info,
+                        ) = await self.ai_provider.generate_response(
+                            messages=history,
+                            system_prompt=system_prompt,
+                        )
 
-                # アシスタントメッセージを追加
-                await self.session_manager.add_message(
-                    session_key=session_key,
-                    role=MessageRole.ASSISTANT,
-                    content=response_text,
-                )
+                    # アシスタントメッセージを追加
+                    await self.session_manager.add_message(
+                        session_key=session_key,
+                        role=MessageRole.ASSISTANT,
+                        content=response_text,
+                    )
 
-                # セッションを保存
-                await self.session_manager.save_session(session_key)
+                    # セッションを保存
+                    await self.session_manager.save_session(session_key)
 
-                # 使用モデル名とレート制限使用率を取得
-                model_name = self.ai_provider.get_last_used_model()
-                rate_limit_usage = self.ai_provider.get_rate_limit_usage()
+                    # 要約が必要であればバックグラウンドで更新する
+                    if self.summarizer is not None:
+                        self.summarizer.schedule_update(session)
 
-                # スレッド内で返信（メッセージ分割対応）
-                response_chunks = split_message(response_text)
-                formatted_chunks = format_split_messages(
-                    response_chunks, len(response_chunks)
-                )
+                    # ストリーミング時は送信済みのため、ここではまとめて送信しない
+                    if self.stream_edit_interval is None:
+                        # 使用モデル名とレート制限使用率を取得
+                        model_name = self.ai_provider.get_last_used_model()
+                        rate_limit_usage = self.ai_provider.get_rate_limit_usage()
 
-                # 最初のメッセージのみEmbedで送信（フッター付き）
-                if formatted_chunks:
-                    embed = create_response_embed(
-                        formatted_chunks[0], model_name, rate_limit_usage
-                    )
-                    await message.reply(embed=embed)
+                        # スレッド内で返信（メッセージ分割対応）
+                        response_chunks = split_message(response_text)
+                        formatted_chunks = format_split_messages(
+                            response_chunks, len(response_chunks)
+                        )
 
-                    # 残りのメッセージは順次送信
-                    for chunk in formatted_chunks[1:]:
-                        await thread.send(chunk)
-                        await asyncio.sleep(0.5)
+                        # 最初のメッセージのみEmbedで送信（フッター付き）
+                        if formatted_chunks:
+                            embed = create_response_embed(
+                                formatted_chunks[0], model_name, rate_limit_usage
+                            )
+                            await message.reply(embed=embed)
 
-                logger.info(f"Sent response in thread: {thread.id}")
+                            # 残りのメッセージは順次送信
+                            for chunk in formatted_chunks[1:]:
+                                await thread.send(chunk)
+                                await asyncio.sleep(0.5)
 
-        except discord.errors.DiscordException as e:
-            logger.exception(f"Discord error handling thread message: {e}")
-            error_type = classify_discord_error(e)
-            error_message = get_user_friendly_message(error_type)
-            try:
-                await message.reply(error_message)
-            except Exception as reply_error:
-                logger.error(f"Failed to send error message: {reply_error}")
-        except Exception as e:
-            logger.exception(f"Error handling thread message: {e}")
-            # データベースエラーの可能性をチェック
-            if "sqlite" in str(type(e)).lower() or "database" in str(e).lower():
-                error_type = classify_database_error(e)
-                error_message = get_database_error_message(error_type)
+                    logger.info(f"Sent response in thread: {thread.id}")
+
+            except discord.errors.DiscordException as e:
+                logger.exception(f"Discord error handling thread message: {e}")
+                error_type = classify_discord_error(e)
+                error_message = get_user_friendly_message(error_type)
                 try:
                     await message.reply(error_message)
                 except Exception as reply_error:
                     logger.error(f"Failed to send error message: {reply_error}")
-            else:
-                try:
-                    await message.reply(ErrorMessages.GENERIC)
-                except Exception as reply_error:
-                    logger.error(f"Failed to send error message: {reply_error}")
+            except Exception as e:
+                logger.exception(f"Error handling thread message: {e}")
+                # データベースエラーの可能性をチェック
+                if "sqlite" in str(type(e)).lower() or "database" in str(e).lower():
+                    error_type = classify_database_error(e)
+                    error_message = get_database_error_message(error_type)
+                    try:
+                        await message.reply(error_message)
+                    except Exception as reply_error:
+                        logger.error(f"Failed to send error message: {reply_error}")
+                else:
+                    try:
+                        await message.reply(ErrorMessages.GENERIC)
+                    except Exception as reply_error:
+                        logger.error(f"Failed to send error message: {reply_error}")
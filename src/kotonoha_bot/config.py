@@ -33,6 +33,13 @@ class Config(BaseSettings):
     llm_temperature: float = 0.7
     llm_max_tokens: int = 2048
     llm_fallback_model: str | None = None
+    # 会話履歴とシステムプロンプトに使う入力トークンの上限（超過分は古い履歴から削る）
+    llm_context_max_tokens: int = 16000
+    # システムプロンプトと会話履歴の先頭部分にプロンプトキャッシュを設定するか
+    llm_prompt_caching_enabled: bool = True
+    # メンション・スレッド応答をストリーミングで生成し、Discord のメッセージを逐次編集するか
+    llm_streaming_enabled: bool = True
+    llm_stream_edit_interval_seconds: float = 1.0  # メッセージ編集の最小間隔（秒）
     # リトライ設定（一時的なエラーに対するリトライ）
     llm_max_retries: int = 3  # 最大リトライ回数
     llm_retry_delay_base: float = 1.0  # 指数バックオフのベース遅延（秒）
@@ -49,8 +56,15 @@ class Config(BaseSettings):
 
     # セッション設定
     max_sessions: int = 100  # メモリ内の最大セッション数
+    max_session_messages: int = 5000  # メモリ内に保持するメッセージ総数の上限
     session_timeout_hours: int = 24  # セッションのタイムアウト（時間）
 
+    # 会話要約設定（古いターンを要約して直近のターンと一緒に送る）
+    summary_enabled: bool = True
+    summary_update_interval_turns: int = 10  # 要約を更新する間隔（ターン数）
+    summary_keep_recent_messages: int = 10  # 要約せずにそのまま送る直近のメッセージ数
+    summary_max_tokens: int = 1024  # 要約の最大トークン数
+
     # ヘルスチェック設定
     health_check_enabled: bool = True
     health_check_port: int = (
@@ -65,6 +79,20 @@ class Config(BaseSettings):
         3  # 判定・応答生成に必要な最低メッセージ数（会話の流れを理解するため）
     )
     eavesdrop_min_intervention_interval_minutes: int = 10  # 介入の最小間隔（分）
+    # 状態分析・状況変化・発言要否を1回の LLM 呼び出しでまとめて判定するか
+    # （False の場合は従来どおり判定ごとに LLM を呼び出す）
+    eavesdrop_structured_judge: bool = False
+    # LLM で判定する前の事前フィルタのスコア閾値（0 以下の場合は事前フィルタを無効化）
+    eavesdrop_prefilter_threshold: float = 1.0
+    # 判定結果のキャッシュ（LRU + TTL）の最大件数と有効期限（秒）
+    eavesdrop_judge_cache_size: int = 1024
+    eavesdrop_judge_cache_ttl_seconds: int = 300
+    # 判定結果のキャッシュを PostgreSQL にも保存するか（再起動後も再利用する）
+    eavesdrop_judge_cache_persistent: bool = False
+    # 連続したメッセージをまとめて判定する待機時間（秒、0 の場合はメッセージごとに判定）
+    eavesdrop_debounce_seconds: float = 3.0
+    # 最初のメッセージから判定までの最大待機時間（秒）
+    eavesdrop_debounce_max_delay_seconds: float = 10.0
 
     # スレッド型設定
     thread_auto_archive_duration: int | None = (
@@ -83,6 +111,21 @@ class Config(BaseSettings):
             return int(v)
         return v
 
+    # 知識ベース検索（RAG）設定
+    rag_enabled: bool = True  # メンション・スレッド応答で知識ベースを検索するか
+    rag_top_k: int = 5  # プロンプトに注入するチャンク数
+    rag_timeout_seconds: float = 2.0  # 検索全体（ベクトル化+検索）のタイムアウト（秒）
+    rag_history_messages: int = 10  # コンテキスト注入時に送信する直近の会話履歴数
+    rag_max_context_chars: int = 4000  # 注入するコンテキストの最大文字数
+    rag_query_cache_size: int = 256  # クエリのベクトルのキャッシュ件数（0 で無効）
+    rag_query_cache_ttl_seconds: float = (
+        3600  # クエリのベクトルのキャッシュ有効期限（秒）
+    )
+
+    # リクエストキュー設定
+    # 同時に処理するリクエストの最大数（同じセッション・チャンネル内は到着順に1件ずつ処理）
+    request_queue_max_concurrency: int = 4
+
     # レート制限設定
     rate_limit_capacity: int = 50  # レート制限の上限値（1分間に50リクエストまで）
     rate_limit_refill: float = 0.8  # 補充レート（リクエスト/秒、1分間に約48リクエスト）
@@ -155,6 +198,26 @@ class Config(BaseSettings):
         """LLM フォールバックモデル（後方互換性）."""
         return self.llm_fallback_model
 
+    @property
+    def LLM_CONTEXT_MAX_TOKENS(self) -> int:
+        """会話履歴の入力トークン上限（後方互換性）."""
+        return self.llm_context_max_tokens
+
+    @property
+    def LLM_PROMPT_CACHING_ENABLED(self) -> bool:
+        """プロンプトキャッシュの有効化（後方互換性）."""
+        return self.llm_prompt_caching_enabled
+
+    @property
+    def LLM_STREAMING_ENABLED(self) -> bool:
+        """ストリーミング応答の有効化（後方互換性）."""
+        return self.llm_streaming_enabled
+
+    @property
+    def LLM_STREAM_EDIT_INTERVAL_SECONDS(self) -> float:
+        """ストリーミング応答の編集間隔（後方互換性）."""
+        return self.llm_stream_edit_interval_seconds
+
     @property
     def LLM_MAX_RETRIES(self) -> int:
         """LLM 最大リトライ回数（後方互換性）."""
@@ -200,6 +263,11 @@ class Config(BaseSettings):
         """最大セッション数（後方互換性）."""
         return self.max_sessions
 
+    @property
+    def MAX_SESSION_MESSAGES(self) -> int:
+        """メモリ内の最大メッセージ総数（後方互換性）."""
+        return self.max_session_messages
+
     @property
     def SESSION_TIMEOUT_HOURS(self) -> int:
         """セッションタイムアウト（後方互換性）."""
@@ -240,11 +308,106 @@ class Config(BaseSettings):
         """聞き耳型最小介入間隔（後方互換性）."""
         return self.eavesdrop_min_intervention_interval_minutes
 
+    @property
+    def EAVESDROP_STRUCTURED_JUDGE(self) -> bool:
+        """聞き耳型の統合判定の有効化（後方互換性）."""
+        return self.eavesdrop_structured_judge
+
+    @property
+    def EAVESDROP_PREFILTER_THRESHOLD(self) -> float:
+        """聞き耳型の事前フィルタのスコア閾値（後方互換性）."""
+        return self.eavesdrop_prefilter_threshold
+
+    @property
+    def EAVESDROP_JUDGE_CACHE_SIZE(self) -> int:
+        """聞き耳型の判定結果キャッシュの最大件数（後方互換性）."""
+        return self.eavesdrop_judge_cache_size
+
+    @property
+    def EAVESDROP_JUDGE_CACHE_TTL_SECONDS(self) -> int:
+        """聞き耳型の判定結果キャッシュの有効期限（後方互換性）."""
+        return self.eavesdrop_judge_cache_ttl_seconds
+
+    @property
+    def EAVESDROP_JUDGE_CACHE_PERSISTENT(self) -> bool:
+        """聞き耳型の判定結果キャッシュの永続化（後方互換性）."""
+        return self.eavesdrop_judge_cache_persistent
+
+    @property
+    def EAVESDROP_DEBOUNCE_SECONDS(self) -> float:
+        """聞き耳型の判定の待機時間（後方互換性）."""
+        return self.eavesdrop_debounce_seconds
+
+    @property
+    def EAVESDROP_DEBOUNCE_MAX_DELAY_SECONDS(self) -> float:
+        """聞き耳型の判定の最大待機時間（後方互換性）."""
+        return self.eavesdrop_debounce_max_delay_seconds
+
     @property
     def THREAD_AUTO_ARCHIVE_DURATION(self) -> int | None:
         """スレッド自動アーカイブ期間（後方互換性）."""
         return self.thread_auto_archive_duration
 
+    @property
+    def SUMMARY_ENABLED(self) -> bool:
+        """会話要約の有効化（後方互換性）."""
+        return self.summary_enabled
+
+    @property
+    def SUMMARY_UPDATE_INTERVAL_TURNS(self) -> int:
+        """会話要約の更新間隔（後方互換性）."""
+        return self.summary_update_interval_turns
+
+    @property
+    def SUMMARY_KEEP_RECENT_MESSAGES(self) -> int:
+        """要約せずに送る直近のメッセージ数（後方互換性）."""
+        return self.summary_keep_recent_messages
+
+    @property
+    def SUMMARY_MAX_TOKENS(self) -> int:
+        """会話要約の最大トークン数（後方互換性）."""
+        return self.summary_max_tokens
+
+    @property
+    def RAG_ENABLED(self) -> bool:
+        """知識ベース検索の有効化（後方互換性）."""
+        return self.rag_enabled
+
+    @property
+    def RAG_TOP_K(self) -> int:
+        """知識ベース検索の取得件数（後方互換性）."""
+        return self.rag_top_k
+
+    @property
+    def RAG_TIMEOUT_SECONDS(self) -> float:
+        """知識ベース検索のタイムアウト（後方互換性）."""
+        return self.rag_timeout_seconds
+
+    @property
+    def RAG_HISTORY_MESSAGES(self) -> int:
+        """コンテキスト注入時の会話履歴数（後方互換性）."""
+        return self.rag_history_messages
+
+    @property
+    def RAG_MAX_CONTEXT_CHARS(self) -> int:
+        """注入するコンテキストの最大文字数（後方互換性）."""
+        return self.rag_max_context_chars
+
+    @property
+    def RAG_QUERY_CACHE_SIZE(self) -> int:
+        """クエリのベクトルのキャッシュ件数（後方互換性）."""
+        return self.rag_query_cache_size
+
+    @property
+    def RAG_QUERY_CACHE_TTL_SECONDS(self) -> float:
+        """クエリのベクトルのキャッシュ有効期限（後方互換性）."""
+        return self.rag_query_cache_ttl_seconds
+
+    @property
+    def REQUEST_QUEUE_MAX_CONCURRENCY(self) -> int:
+        """リクエストキューの最大同時処理数（後方互換性）."""
+        return self.request_queue_max_concurrency
+
     @property
     def RATE_LIMIT_CAPACITY(self) -> int:
         """レート制限容量（後方互換性）."""
@@ -339,6 +502,9 @@ class Settings(BaseSettings):
     # HNSWインデックスパラメータ
     kb_hnsw_m: int = 16
     kb_hnsw_ef_construction: int = 64
+    kb_hnsw_ef_search: int = 40
+    kb_hnsw_ef_search_max: int = 1000
+    kb_hnsw_filtered_scan: bool = True
 
     # 検索設定
     kb_similarity_threshold: float = 0.7
@@ -349,6 +515,10 @@ class Settings(BaseSettings):
     kb_embedding_batch_size: int = 100
     kb_embedding_max_concurrent: int = 5
     kb_embedding_interval_minutes: int = 1
+    kb_embedding_listen_notify: bool = True
+    kb_embedding_backoff_max_seconds: float = 60.0
+    kb_embedding_cache_enabled: bool = True
+    kb_embedding_cache_memory_size: int = 256
 
     # チャンク登録・更新のバッチサイズ制御
     kb_chunk_insert_batch_size: int = 100
@@ -398,6 +568,7 @@ class Settings(BaseSettings):
     # セッション管理設定
     session_timeout_hours: int = 72
     max_sessions: int = 100
+    max_session_messages: int = 5000
 
     # ログ設定
     log_level: str = "INFO"
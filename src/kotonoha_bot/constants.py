@@ -14,3 +14,5 @@ class SearchConstants:
     VECTOR_DIMENSION = 1536  # ベクトル次元数（OpenAI text-embedding-3-small）
     VECTOR_SEARCH_CANDIDATE_LIMIT = 50  # ベクトル検索の候補数（ハイブリッド検索用）
     KEYWORD_SEARCH_LIMIT = 100  # キーワード検索の上限（ハイブリッド検索用）
+    KEYWORD_SEARCH_MAX_TERMS = 8  # キーワード検索に使う語の上限（ハイブリッド検索用）
+    RRF_K = 60  # Reciprocal Rank Fusion の定数 k（ハイブリッド検索用）
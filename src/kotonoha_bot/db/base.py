@@ -4,6 +4,8 @@ from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from datetime import datetime
+
     from ..db.models import ChatSession
 
 
@@ -46,6 +48,13 @@ class DatabaseProtocol(ABC):
         """すべてのセッションを読み込み."""
         pass
 
+    @abstractmethod
+    async def load_session_headers(
+        self, active_since: datetime, limit: int
+    ) -> list[ChatSession]:
+        """最近アクティブなセッションのヘッダー（メッセージなし）を読み込み."""
+        pass
+
 
 class SearchResult(dict):
     """検索結果の型定義（TypedDictの代替としてdictを継承）."""
@@ -89,6 +98,29 @@ class KnowledgeBaseProtocol(ABC):
         """
         pass
 
+    @abstractmethod
+    async def similarity_search_many(
+        self,
+        query_embeddings: list[list[float]],
+        top_k: int = 10,
+        filters: dict | None = None,
+        similarity_threshold: float | None = None,
+        apply_threshold: bool = True,
+    ) -> list[list[SearchResult]]:
+        """複数のクエリの類似度検索をまとめて実行.
+
+        Args:
+            query_embeddings: クエリのベクトルのリスト
+            top_k: クエリごとに取得する結果の数
+            filters: フィルタ条件（全クエリに共通）
+            similarity_threshold: 類似度閾値（Noneの場合は設定値を使用）
+            apply_threshold: 閾値フィルタリングを適用するか（Falseの場合は生の類似度スコアを返す）
+
+        Returns:
+            クエリと同じ順序の検索結果のリスト
+        """
+        pass
+
     @abstractmethod
     async def save_source(
         self,
@@ -128,11 +160,83 @@ class KnowledgeBaseProtocol(ABC):
             query_embedding: クエリのベクトル（1536次元）
             query_text: クエリのテキスト（キーワード検索用）
             limit: 返却する結果の数（デフォルト: 10）
-            vector_weight: ベクトル類似度の重み（デフォルト: 0.7）
-            keyword_weight: キーワードスコアの重み（デフォルト: 0.3）
-            filters: フィルタ条件（source_type, channel_id, user_id等）
+            vector_weight: ベクトル検索の順位の重み（デフォルト: 0.7）
+            keyword_weight: キーワード検索の順位の重み（デフォルト: 0.3）
+            filters: フィルタ条件（source_type, channel_id, guild_id, user_id等）
 
         Returns:
             検索結果のリスト（スコア順）
         """
         pass
+
+
+class JudgementStoreProtocol(ABC):
+    """聞き耳型の判定結果キャッシュの永続化プロトコル.
+
+    `JudgementCache` の書き込み先（write-through）として使用し、
+    再起動後もキャッシュ済みの判定結果を再利用できるようにする。
+    """
+
+    @abstractmethod
+    async def load_judgement(self, cache_key: str) -> tuple[str, datetime] | None:
+        """有効期限内の判定結果を読み込み.
+
+        Args:
+            cache_key: キャッシュキー
+
+        Returns:
+            (判定結果, 有効期限) のタプル（存在しないか期限切れの場合は None）
+        """
+        pass
+
+    @abstractmethod
+    async def save_judgement(
+        self, cache_key: str, kind: str, response: str, expires_at: datetime
+    ) -> None:
+        """判定結果を保存（同じキーがある場合は上書き）.
+
+        Args:
+            cache_key: キャッシュキー
+            kind: 判定の種類
+            response: 判定結果（LLM の応答）
+            expires_at: 有効期限
+        """
+        pass
+
+    @abstractmethod
+    async def delete_expired_judgements(self) -> int:
+        """期限切れの判定結果を削除し、削除した件数を返す."""
+        pass
+
+
+class EmbeddingStoreProtocol(ABC):
+    """Embedding キャッシュの永続化プロトコル.
+
+    `EmbeddingCache` の書き込み先として使用し、同じ内容のチャンクを
+    再アーカイブ時などに再びベクトル化しないようにする。
+    """
+
+    @abstractmethod
+    async def load_embeddings(self, cache_keys: list[str]) -> dict[str, list[float]]:
+        """キャッシュ済みのベクトルをまとめて読み込み.
+
+        Args:
+            cache_keys: キャッシュキーのリスト
+
+        Returns:
+            キャッシュキーからベクトルへの辞書（存在しないキーは含まない）
+        """
+        pass
+
+    @abstractmethod
+    async def save_embeddings(
+        self, model: str, dimension: int, embeddings: dict[str, list[float]]
+    ) -> None:
+        """ベクトルをまとめて保存（同じキーがある場合は何もしない）.
+
+        Args:
+            model: Embedding モデル
+            dimension: ベクトルの次元数
+            embeddings: キャッシュキーからベクトルへの辞書
+        """
+        pass
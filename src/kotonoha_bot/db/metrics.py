@@ -0,0 +1,27 @@
+"""データベース層のメトリクス収集（Prometheus）."""
+
+from prometheus_client import Histogram
+
+# ベクトル検索のメトリクス
+vector_search_duration = Histogram(
+    "vector_search_seconds",
+    "Time spent on vector searches by HNSW scan mode",
+    [
+        "search",
+        "mode",
+    ],  # search: 'similarity', 'similarity_many', 'hybrid' / mode: 'default', 'ef_search', 'iterative'
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],  # バケット設定
+)
+
+vector_search_fill_ratio = Histogram(
+    "vector_search_fill_ratio",
+    "Returned results divided by top_k (recall proxy for filtered HNSW scans)",
+    ["mode"],  # 'default', 'ef_search', 'iterative'でラベル付け
+    buckets=[0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0],  # バケット設定
+)
+
+vector_search_ef_search = Histogram(
+    "vector_search_ef_search",
+    "hnsw.ef_search chosen for filtered vector searches",
+    buckets=[40, 64, 100, 200, 400, 800, 1000],  # バケット設定
+)
@@ -21,6 +21,8 @@ class Message:
     role: MessageRole
     content: str
     timestamp: datetime = field(default_factory=datetime.now)
+    # トークン数のキャッシュ（コンテキスト予算の計算用、永続化しない）
+    token_count: int | None = field(default=None, repr=False, compare=False)
 
     def to_dict(self) -> dict:
         """辞書形式に変換."""
@@ -61,6 +63,12 @@ class ChatSession:
     )
     created_at: datetime = field(default_factory=datetime.now)
     last_active_at: datetime = field(default_factory=datetime.now)
+    summary: str | None = None  # 古いターンの要約（ローリングサマリー）
+    summary_message_index: int = 0  # 要約に含まれているメッセージ数（先頭から）
+    # DBに保存済みのメッセージ数（追記保存の差分計算用、永続化しない）
+    persisted_message_count: int = field(default=0, repr=False, compare=False)
+    # messages を読み込み済みかどうか（ヘッダーのみ読み込んだ場合は False、永続化しない）
+    messages_loaded: bool = field(default=True, repr=False, compare=False)
 
     def add_message(self, role: MessageRole, content: str) -> None:
         """メッセージを追加."""
@@ -89,6 +97,8 @@ class ChatSession:
             "last_archived_message_index": self.last_archived_message_index,
             "created_at": self.created_at.isoformat(),
             "last_active_at": self.last_active_at.isoformat(),
+            "summary": self.summary,
+            "summary_message_index": self.summary_message_index,
         }
 
     @classmethod
@@ -108,4 +118,6 @@ class ChatSession:
             last_archived_message_index=data.get("last_archived_message_index", 0),
             created_at=datetime.fromisoformat(data["created_at"]),
             last_active_at=datetime.fromisoformat(data["last_active_at"]),
+            summary=data.get("summary"),
+            summary_message_index=data.get("summary_message_index", 0),
         )
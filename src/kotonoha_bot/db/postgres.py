@@ -1,5 +1,8 @@
 """PostgreSQL データベース実装."""
 
+import math
+import re
+import time
 from datetime import datetime
 from typing import TYPE_CHECKING
 
@@ -8,7 +11,18 @@ import orjson
 import structlog
 
 from ..config import settings
-from .base import DatabaseProtocol, KnowledgeBaseProtocol, SearchResult
+from .base import (
+    DatabaseProtocol,
+    EmbeddingStoreProtocol,
+    JudgementStoreProtocol,
+    KnowledgeBaseProtocol,
+    SearchResult,
+)
+from .metrics import (
+    vector_search_duration,
+    vector_search_ef_search,
+    vector_search_fill_ratio,
+)
 
 if TYPE_CHECKING:
     from ..db.models import ChatSession
@@ -24,16 +38,98 @@ VALID_SOURCE_TYPES = {
     "audio_transcript",
 }
 
+# セッション読み込み時のカラム（session_messages の追記分を pending_messages として結合）
+SESSION_SELECT_COLUMNS = """
+    s.*,
+    COALESCE(
+        (
+            SELECT jsonb_agg(m.message ORDER BY m.id)
+            FROM session_messages m
+            WHERE m.session_key = s.session_key
+        ),
+        '[]'::jsonb
+    ) AS pending_messages
+"""
+
 # フィルタキーのAllow-list（SQLインジェクション対策）
 ALLOWED_FILTER_KEYS = {
     "source_type",
     "source_types",
     "channel_id",
+    "guild_id",
     "user_id",
 }
 
+# ID のフィルタキーと、knowledge_sources のカラムの対応
+ID_FILTER_COLUMNS = {
+    "channel_id": "channel_id",
+    "guild_id": "guild_id",
+    "user_id": "author_id",
+}
+
+# フィルタの選択率の分母にするチャンクの総数（推定値）のキャッシュ有効期限（秒）
+CHUNK_ROWS_CACHE_SECONDS = 300
+
+
+# キーワード検索の語の切り出し（漢字・カタカナ・英数字の連続。ひらがなは助詞等が多いため除外）
+KEYWORD_TERM_PATTERN = re.compile(
+    r"[\u4e00-\u9fff\u3005\u3006]+|[\u30a1-\u30fa\u30fc\uff66-\uff9f]+|[0-9A-Za-z\uff10-\uff19\uff21-\uff3a\uff41-\uff5a]+"
+)
+
+
+def _keyword_terms(query_text: str, max_terms: int) -> list[str]:
+    """キーワード検索に使う語をクエリから切り出す.
+
+    語が見つからない場合はクエリ全体を 1 語として扱う。
+
+    Args:
+        query_text: クエリのテキスト
+        max_terms: 語の上限
+
+    Returns:
+        重複を除いた語のリスト（出現順）
+    """
+    terms = list(dict.fromkeys(KEYWORD_TERM_PATTERN.findall(query_text)))
+    if not terms and query_text.strip():
+        terms = [query_text.strip()]
+    return terms[:max_terms]
+
+
+def _like_pattern(term: str) -> str:
+    """部分一致の LIKE パターンを作成（ワイルドカードはエスケープ）.
+
+    Args:
+        term: 検索語
+
+    Returns:
+        LIKE パターン
+    """
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _parse_id(value: object) -> int | None:
+    """Metadata の ID を整数に変換（数値でない場合は None）.
 
-class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
+    Args:
+        value: metadata の値
+
+    Returns:
+        ID（数値でない場合は None）
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+class PostgreSQLDatabase(
+    DatabaseProtocol,
+    KnowledgeBaseProtocol,
+    JudgementStoreProtocol,
+    EmbeddingStoreProtocol,
+):
     """PostgreSQL データベース（非同期）.
 
     ⚠️ 改善（抽象化の粒度）: `DatabaseProtocol` と `KnowledgeBaseProtocol` の両方を実装することで、
@@ -115,6 +211,12 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
                 "(host, database, user, password) must be provided"
             )
         self.pool: asyncpg.Pool | None = None
+        # pgvector が反復スキャン（hnsw.iterative_scan）に対応しているか（初回検索時に確認）
+        self._iterative_scan_supported: bool | None = None
+        # チャンクの総数の推定値と有効期限（フィルタの選択率の分母、一定時間キャッシュする）
+        self._chunk_rows_total: tuple[float, float] | None = None
+        # pg_bigm 拡張が有効か（初回のハイブリッド検索時に確認）
+        self._bigm_available: bool | None = None
 
     def _ensure_pool(self) -> asyncpg.Pool:
         """接続プールが初期化されていることを確認し、返す.
@@ -395,45 +497,185 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
             self.pool = None
 
     async def save_session(self, session: ChatSession) -> None:
-        """セッションを保存（トランザクション付き）."""
+        """セッションを保存（トランザクション付き）.
+
+        ⚠️ 改善（書き込み増幅対策）: 1ターンごとに messages 配列全体を書き換えると、
+        長いスレッドほど WAL と TOAST の書き込みが増える（O(n²)）。
+        DBのメッセージ数が前回保存時と一致する場合は、新しいメッセージだけを
+        session_messages に追記し、sessions はヘッダーのみ更新する。
+        一致しない場合（新規・リセット・アーカイブ後など）は従来通り全体を保存する。
+
+        Raises:
+            ValueError: メッセージ未読み込み（ヘッダーのみ）のセッションの場合
+        """
+        # ヘッダーのみのセッションを保存すると messages が空で上書きされるため拒否する
+        if not session.messages_loaded:
+            raise ValueError(f"Session messages are not loaded: {session.session_key}")
+
         async with (
             self._ensure_pool().acquire() as conn,
             conn.transaction(),
         ):
-            await conn.execute(
+            stored_count = await conn.fetchval(
                 """
-                    INSERT INTO sessions
-                    (session_key, session_type, messages, status, guild_id,
-                     channel_id, thread_id, user_id, version, created_at, last_active_at)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                    ON CONFLICT (session_key)
-                    DO UPDATE SET
-                        messages = EXCLUDED.messages,
-                        last_active_at = EXCLUDED.last_active_at,
-                        status = COALESCE(EXCLUDED.status, sessions.status),
-                        guild_id = COALESCE(EXCLUDED.guild_id, sessions.guild_id),
-                        version = sessions.version + 1
-                        -- ⚠️ 注意: last_archived_message_index は更新しない
+                    SELECT message_count FROM sessions
+                    WHERE session_key = $1
+                    FOR UPDATE
                 """,
                 session.session_key,
-                session.session_type,
-                [msg.to_dict() for msg in session.messages],
-                getattr(session, "status", "active"),
-                getattr(session, "guild_id", None),
-                session.channel_id,
-                getattr(session, "thread_id", None),
-                session.user_id,
-                getattr(session, "version", 1),
-                session.created_at,
-                session.last_active_at,
             )
 
+            if (
+                stored_count is not None
+                and stored_count == session.persisted_message_count
+                and stored_count <= len(session.messages)
+            ):
+                await self._append_session_messages(conn, session, stored_count)
+            else:
+                await self._write_full_session(conn, session)
+
+        session.persisted_message_count = len(session.messages)
+
+    async def _append_session_messages(
+        self, conn: asyncpg.Connection, session: ChatSession, stored_count: int
+    ) -> None:
+        """未保存のメッセージのみを追記し、セッションのヘッダーを更新する.
+
+        Args:
+            conn: データベース接続（トランザクション内）
+            session: 保存するセッション
+            stored_count: DBに保存済みのメッセージ数
+        """
+        new_messages = session.messages[stored_count:]
+        if new_messages:
+            await conn.executemany(
+                """
+                    INSERT INTO session_messages (session_key, message)
+                    VALUES ($1, $2::jsonb)
+                """,
+                [(session.session_key, msg.to_dict()) for msg in new_messages],
+            )
+
+        await conn.execute(
+            """
+                UPDATE sessions
+                SET message_count = $2,
+                    last_active_at = $3,
+                    status = COALESCE($4, sessions.status),
+                    guild_id = COALESCE($5, sessions.guild_id),
+                    summary = $6,
+                    summary_message_index = $7,
+                    version = sessions.version + 1
+                WHERE session_key = $1
+            """,
+            session.session_key,
+            len(session.messages),
+            session.last_active_at,
+            getattr(session, "status", "active"),
+            getattr(session, "guild_id", None),
+            session.summary,
+            session.summary_message_index,
+        )
+
+    async def _write_full_session(
+        self, conn: asyncpg.Connection, session: ChatSession
+    ) -> None:
+        """セッション全体を sessions.messages に書き込み、追記ログを破棄する.
+
+        Args:
+            conn: データベース接続（トランザクション内）
+            session: 保存するセッション
+        """
+        await conn.execute(
+            """
+                INSERT INTO sessions
+                (session_key, session_type, messages, status, guild_id,
+                 channel_id, thread_id, user_id, version, created_at, last_active_at,
+                 message_count, summary, summary_message_index)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
+                ON CONFLICT (session_key)
+                DO UPDATE SET
+                    messages = EXCLUDED.messages,
+                    message_count = EXCLUDED.message_count,
+                    last_active_at = EXCLUDED.last_active_at,
+                    status = COALESCE(EXCLUDED.status, sessions.status),
+                    guild_id = COALESCE(EXCLUDED.guild_id, sessions.guild_id),
+                    summary = EXCLUDED.summary,
+                    summary_message_index = EXCLUDED.summary_message_index,
+                    version = sessions.version + 1
+                    -- ⚠️ 注意: last_archived_message_index は更新しない
+            """,
+            session.session_key,
+            session.session_type,
+            [msg.to_dict() for msg in session.messages],
+            getattr(session, "status", "active"),
+            getattr(session, "guild_id", None),
+            session.channel_id,
+            getattr(session, "thread_id", None),
+            session.user_id,
+            getattr(session, "version", 1),
+            session.created_at,
+            session.last_active_at,
+            len(session.messages),
+            session.summary,
+            session.summary_message_index,
+        )
+        await conn.execute(
+            "DELETE FROM session_messages WHERE session_key = $1",
+            session.session_key,
+        )
+
+    def _row_to_session(self, row: asyncpg.Record) -> ChatSession:
+        """DB の行（pending_messages 付き）を ChatSession に変換する.
+
+        Args:
+            row: SESSION_SELECT_COLUMNS で取得した行
+
+        Returns:
+            ChatSession インスタンス
+        """
+        from ..db.models import ChatSession, Message, MessageRole
+
+        raw_messages = list(row["messages"] or []) + list(
+            row.get("pending_messages") or []
+        )
+        messages = [
+            Message(
+                role=MessageRole(msg["role"]),
+                content=msg["content"],
+                timestamp=datetime.fromisoformat(msg["timestamp"])
+                if msg.get("timestamp")
+                else datetime.now(),
+            )
+            for msg in raw_messages
+        ]
+
+        return ChatSession(
+            session_key=row["session_key"],
+            session_type=row["session_type"],
+            messages=messages,
+            status=row.get("status", "active"),
+            guild_id=row.get("guild_id"),
+            channel_id=row["channel_id"],
+            thread_id=row.get("thread_id"),
+            user_id=row["user_id"],
+            version=row.get("version", 1),
+            last_archived_message_index=row.get("last_archived_message_index", 0),
+            created_at=row["created_at"],
+            last_active_at=row["last_active_at"],
+            summary=row.get("summary"),
+            summary_message_index=row.get("summary_message_index", 0),
+            persisted_message_count=len(messages),
+        )
+
     async def load_session(self, session_key: str) -> ChatSession | None:
         """セッションを読み込み."""
         async with self._ensure_pool().acquire() as conn:
             row = await conn.fetchrow(
-                """
-                SELECT * FROM sessions WHERE session_key = $1
+                f"""
+                SELECT {SESSION_SELECT_COLUMNS}
+                FROM sessions s
+                WHERE s.session_key = $1
             """,
                 session_key,
             )
@@ -441,84 +683,173 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
             if not row:
                 return None
 
-            from ..db.models import ChatSession, Message, MessageRole
+            return self._row_to_session(row)
 
-            messages = [
-                Message(
-                    role=MessageRole(msg["role"]),
-                    content=msg["content"],
-                    timestamp=datetime.fromisoformat(msg["timestamp"])
-                    if msg.get("timestamp")
-                    else datetime.now(),
-                )
-                for msg in row["messages"]
-            ]
+    async def delete_session(self, session_key: str) -> None:
+        """セッションを削除."""
+        async with self._ensure_pool().acquire() as conn:
+            await conn.execute(
+                "DELETE FROM sessions WHERE session_key = $1", session_key
+            )
+
+    async def load_all_sessions(self) -> list[ChatSession]:
+        """すべてのセッションを読み込み."""
+        async with self._ensure_pool().acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT {SESSION_SELECT_COLUMNS}
+                FROM sessions s
+                ORDER BY s.last_active_at DESC
+            """)
+
+            return [self._row_to_session(row) for row in rows]
+
+    async def load_session_headers(
+        self, active_since: datetime, limit: int
+    ) -> list[ChatSession]:
+        """最近アクティブなセッションのヘッダー（メッセージなし）を読み込み.
+
+        起動時の読み込み用。タイムアウトの判定と件数の上限を SQL 側で行い、
+        messages（JSONB）と session_messages は読み込まない。
+        メッセージ本文は最初の get_session で load_session により読み込む。
+
+        Args:
+            active_since: この日時より後にアクティブだったセッションのみ読み込む
+            limit: 読み込む最大件数（最終アクティブ日時の新しい順）
 
-            return ChatSession(
+        Returns:
+            messages_loaded=False の ChatSession のリスト（最終アクティブ日時の降順）
+        """
+        from ..db.models import ChatSession
+
+        async with self._ensure_pool().acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT session_key, session_type, status, guild_id, channel_id,
+                       thread_id, user_id, version, last_archived_message_index,
+                       created_at, last_active_at, message_count,
+                       summary, summary_message_index
+                FROM sessions
+                WHERE last_active_at > $1
+                ORDER BY last_active_at DESC
+                LIMIT $2
+            """,
+                active_since,
+                limit,
+            )
+
+        return [
+            ChatSession(
                 session_key=row["session_key"],
                 session_type=row["session_type"],
-                messages=messages,
-                status=row.get("status", "active"),
-                guild_id=row.get("guild_id"),
+                status=row["status"],
+                guild_id=row["guild_id"],
                 channel_id=row["channel_id"],
-                thread_id=row.get("thread_id"),
+                thread_id=row["thread_id"],
                 user_id=row["user_id"],
-                version=row.get("version", 1),
-                last_archived_message_index=row.get("last_archived_message_index", 0),
+                version=row["version"],
+                last_archived_message_index=row["last_archived_message_index"],
                 created_at=row["created_at"],
                 last_active_at=row["last_active_at"],
+                summary=row["summary"],
+                summary_message_index=row["summary_message_index"],
+                persisted_message_count=row["message_count"],
+                messages_loaded=False,
             )
+            for row in rows
+        ]
 
-    async def delete_session(self, session_key: str) -> None:
-        """セッションを削除."""
+    async def load_judgement(self, cache_key: str) -> tuple[str, datetime] | None:
+        """有効期限内の判定結果を読み込み."""
+        async with self._ensure_pool().acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT response, expires_at
+                FROM eavesdrop_judgement_cache
+                WHERE cache_key = $1 AND expires_at > CURRENT_TIMESTAMP
+            """,
+                cache_key,
+            )
+
+        if not row:
+            return None
+        return row["response"], row["expires_at"]
+
+    async def save_judgement(
+        self, cache_key: str, kind: str, response: str, expires_at: datetime
+    ) -> None:
+        """判定結果を保存（同じキーがある場合は上書き）."""
         async with self._ensure_pool().acquire() as conn:
             await conn.execute(
-                "DELETE FROM sessions WHERE session_key = $1", session_key
+                """
+                INSERT INTO eavesdrop_judgement_cache
+                    (cache_key, kind, response, expires_at)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    kind = EXCLUDED.kind,
+                    response = EXCLUDED.response,
+                    expires_at = EXCLUDED.expires_at
+            """,
+                cache_key,
+                kind,
+                response,
+                expires_at,
             )
 
-    async def load_all_sessions(self) -> list[ChatSession]:
-        """すべてのセッションを読み込み."""
+    async def delete_expired_judgements(self) -> int:
+        """期限切れの判定結果を削除し、削除した件数を返す."""
         async with self._ensure_pool().acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT * FROM sessions
-                ORDER BY last_active_at DESC
-            """)
+            result = await conn.execute(
+                """
+                DELETE FROM eavesdrop_judgement_cache
+                WHERE expires_at <= CURRENT_TIMESTAMP
+            """
+            )
+        # asyncpg の execute は "DELETE <件数>" を返す
+        return int(result.split()[-1])
 
-            from ..db.models import ChatSession, Message, MessageRole
-
-            sessions = []
-            for row in rows:
-                messages = [
-                    Message(
-                        role=MessageRole(msg["role"]),
-                        content=msg["content"],
-                        timestamp=datetime.fromisoformat(msg["timestamp"])
-                        if msg.get("timestamp")
-                        else datetime.now(),
-                    )
-                    for msg in row["messages"]
-                ]
-
-                sessions.append(
-                    ChatSession(
-                        session_key=row["session_key"],
-                        session_type=row["session_type"],
-                        messages=messages,
-                        status=row.get("status", "active"),
-                        guild_id=row.get("guild_id"),
-                        channel_id=row["channel_id"],
-                        thread_id=row.get("thread_id"),
-                        user_id=row["user_id"],
-                        version=row.get("version", 1),
-                        last_archived_message_index=row.get(
-                            "last_archived_message_index", 0
-                        ),
-                        created_at=row["created_at"],
-                        last_active_at=row["last_active_at"],
-                    )
-                )
+    async def load_embeddings(self, cache_keys: list[str]) -> dict[str, list[float]]:
+        """キャッシュ済みのベクトルをまとめて読み込み."""
+        if not cache_keys:
+            return {}
+
+        async with self._ensure_pool().acquire() as conn:
+            # real[] にキャストし、ベクトル型に関係なく float のリストとして受け取る
+            rows = await conn.fetch(
+                """
+                SELECT cache_key, embedding::real[] AS embedding
+                FROM knowledge_embedding_cache
+                WHERE cache_key = ANY($1::text[])
+            """,
+                cache_keys,
+            )
+
+        return {row["cache_key"]: list(row["embedding"]) for row in rows}
+
+    async def save_embeddings(
+        self, model: str, dimension: int, embeddings: dict[str, list[float]]
+    ) -> None:
+        """ベクトルをまとめて保存（同じキーがある場合は何もしない）."""
+        if not embeddings:
+            return
+
+        from ..constants import SearchConstants
 
-            return sessions
+        vector_cast = SearchConstants.VECTOR_CAST
+        vector_dimension = SearchConstants.VECTOR_DIMENSION
+
+        async with self._ensure_pool().acquire() as conn:
+            await conn.executemany(
+                f"""
+                INSERT INTO knowledge_embedding_cache
+                    (cache_key, model, dimension, embedding)
+                VALUES ($1, $2, $3, $4::{vector_cast}({vector_dimension}))
+                ON CONFLICT (cache_key) DO NOTHING
+            """,
+                [
+                    (key, model, dimension, embedding)
+                    for key, embedding in embeddings.items()
+                ],
+            )
 
     async def similarity_search(
         self,
@@ -551,6 +882,8 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
         if similarity_threshold is None:
             similarity_threshold = settings.kb_similarity_threshold
         top_k_limit = top_k or settings.kb_default_top_k
+        limit = min(top_k, top_k_limit)
+        filter_clause, filter_params = self._build_filter_clause(filters, 2)
 
         try:
             from asyncio import timeout
@@ -576,67 +909,9 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
                         WHERE c.embedding IS NOT NULL
                     """
 
-                    params = [query_embedding]
-                    param_index = 2
-
-                    # フィルタの適用
-                    if filters:
-                        invalid_keys = set(filters.keys()) - ALLOWED_FILTER_KEYS
-                        if invalid_keys:
-                            raise ValueError(
-                                f"Invalid filter keys: {invalid_keys}. "
-                                f"Allowed keys: {ALLOWED_FILTER_KEYS}"
-                            )
-
-                        if "source_type" in filters:
-                            source_type = filters["source_type"]
-                            if source_type not in VALID_SOURCE_TYPES:
-                                raise ValueError(f"Invalid source_type: {source_type}.")
-                            query += f" AND s.type = ${param_index}"
-                            params.append(source_type)
-                            param_index += 1
-
-                        if "source_types" in filters:
-                            source_types = filters["source_types"]
-                            if not isinstance(source_types, list):
-                                raise ValueError("source_types must be a list")
-
-                            if len(source_types) == 0:
-                                raise ValueError("source_types must not be empty")
-
-                            invalid_types = set(source_types) - VALID_SOURCE_TYPES
-                            if invalid_types:
-                                raise ValueError(
-                                    f"Invalid source_types: {invalid_types}."
-                                )
-
-                            query += (
-                                f" AND s.type = ANY(${param_index}::source_type_enum[])"
-                            )
-                            params.append(source_types)
-                            param_index += 1
-
-                        if "channel_id" in filters:
-                            try:
-                                channel_id = int(filters["channel_id"])
-                            except (ValueError, TypeError) as err:
-                                raise ValueError(
-                                    "Invalid channel_id: must be an integer."
-                                ) from err
-                            query += f" AND (s.metadata->>'channel_id')::bigint = ${param_index}"
-                            params.append(channel_id)
-                            param_index += 1
-
-                        if "user_id" in filters:
-                            try:
-                                user_id = int(filters["user_id"])
-                            except (ValueError, TypeError) as err:
-                                raise ValueError(
-                                    "Invalid user_id: must be an integer."
-                                ) from err
-                            query += f" AND (s.metadata->>'author_id')::bigint = ${param_index}"
-                            params.append(user_id)
-                            param_index += 1
+                    query += filter_clause
+                    params = [query_embedding, *filter_params]
+                    param_index = 2 + len(filter_params)
 
                     # 類似度でソート
                     if apply_threshold:
@@ -647,14 +922,14 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
                             LIMIT ${param_index + 1}
                         """
                         params.append(similarity_threshold)
-                        params.append(min(top_k, top_k_limit))
+                        params.append(limit)
                     else:
                         # 閾値フィルタリングを適用せず、生の類似度スコアを返す
                         query += f"""
                             ORDER BY c.embedding <=> $1::{vector_cast}({vector_dimension})
                             LIMIT ${param_index}
                         """
-                        params.append(min(top_k, top_k_limit))
+                        params.append(limit)
 
                     # 安全チェック
                     query_upper = query.upper()
@@ -664,7 +939,15 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
                             "CRITICAL: embedding IS NOT NULL condition is missing."
                         )
 
-                    rows = await conn.fetch(query, *params)
+                    # ⚠️ 改善（フィルタ付き検索）: SET LOCAL で HNSW のスキャン設定を
+                    # このクエリだけに適用するため、トランザクション内で実行する
+                    start_time = time.perf_counter()
+                    async with conn.transaction():
+                        mode = await self._configure_filtered_scan(conn, filters, limit)
+                        rows = await conn.fetch(query, *params)
+                    vector_search_duration.labels(
+                        search="similarity", mode=mode
+                    ).observe(time.perf_counter() - start_time)
         except TimeoutError:
             logger.error("Failed to acquire database connection: pool exhausted")
             raise RuntimeError("Database connection pool exhausted") from None
@@ -675,6 +958,13 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
             logger.error(f"Error during similarity search: {e}", exc_info=True)
             raise
 
+        if mode == "iterative":
+            # relaxed_order の反復スキャンは距離順がわずかに前後するため並べ直す
+            rows = sorted(rows, key=lambda row: row["similarity"], reverse=True)
+        vector_search_fill_ratio.labels(mode=mode).observe(
+            len(rows) / limit if limit else 1.0
+        )
+
         return [
             SearchResult(
                 {
@@ -693,6 +983,387 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
             for row in rows
         ]
 
+    async def similarity_search_many(
+        self,
+        query_embeddings: list[list[float]],
+        top_k: int = 10,
+        filters: dict | None = None,
+        similarity_threshold: float | None = None,
+        apply_threshold: bool = True,
+    ) -> list[list[SearchResult]]:
+        """複数のクエリの類似度検索を 1 つのクエリでまとめて実行.
+
+        ⚠️ 改善（検索のレイテンシ）: クエリごとに接続の取得と往復を繰り返さず、
+        ベクトルの配列に対する LATERAL JOIN で全クエリの近傍を 1 回で取得する。
+        複数のクエリで共有されるチャンクの本文は 1 回だけ転送する。
+
+        Args:
+            query_embeddings: クエリのベクトルのリスト（各1536次元）
+            top_k: クエリごとに取得する結果の数
+            filters: フィルタ条件（全クエリに共通）
+                （例: {"source_type": "discord_session", "channel_id": 123}）
+            similarity_threshold: 類似度閾値（Noneの場合は設定値を使用）
+            apply_threshold: 閾値フィルタリングを適用するか（Falseの場合は生の類似度スコアを返す）
+
+        Returns:
+            クエリと同じ順序の検索結果のリスト（各リストは類似度順）
+
+        Raises:
+            ValueError: 無効なsource_typeが指定された場合
+        """
+        from ..constants import DatabaseConstants, SearchConstants
+
+        if not query_embeddings:
+            return []
+
+        vector_cast = SearchConstants.VECTOR_CAST
+        vector_dimension = SearchConstants.VECTOR_DIMENSION
+        if similarity_threshold is None:
+            similarity_threshold = settings.kb_similarity_threshold
+        top_k_limit = top_k or settings.kb_default_top_k
+        limit = min(top_k, top_k_limit)
+        filter_clause, filter_params = self._build_filter_clause(filters, 2)
+
+        # ベクトルはテキスト表現の配列として渡し、SQL 側で halfvec に変換する
+        embedding_literals = [
+            "[" + ",".join(str(value) for value in embedding) + "]"
+            for embedding in query_embeddings
+        ]
+        params: list = [embedding_literals, *filter_params]
+        param_index = 2 + len(filter_params)
+
+        threshold_clause = ""
+        if apply_threshold:
+            threshold_clause = (
+                f"AND 1 - (c.embedding <=> q.embedding) >= ${param_index}"
+            )
+            params.append(similarity_threshold)
+            param_index += 1
+        params.append(limit)
+
+        # ⚠️ 重要: WHERE c.embedding IS NOT NULL 条件は必須です
+        query = f"""
+            WITH queries AS MATERIALIZED (
+                SELECT
+                    q.ordinality - 1 AS query_index,
+                    q.embedding::{vector_cast}({vector_dimension}) AS embedding
+                FROM unnest($1::text[]) WITH ORDINALITY AS q(embedding, ordinality)
+            ),
+            matches AS (
+                SELECT q.query_index, r.chunk_id, r.similarity
+                FROM queries q
+                CROSS JOIN LATERAL (
+                    SELECT
+                        c.id AS chunk_id,
+                        1 - (c.embedding <=> q.embedding) AS similarity
+                    FROM knowledge_chunks c
+                    JOIN knowledge_sources s ON c.source_id = s.id
+                    WHERE c.embedding IS NOT NULL{filter_clause}
+                    {threshold_clause}
+                    ORDER BY c.embedding <=> q.embedding
+                    LIMIT ${param_index}
+                ) r
+            ),
+            grouped AS (
+                SELECT
+                    chunk_id,
+                    array_agg(query_index ORDER BY query_index) AS query_indexes,
+                    array_agg(similarity ORDER BY query_index) AS similarities
+                FROM matches
+                GROUP BY chunk_id
+            )
+            SELECT
+                s.id as source_id,
+                s.type,
+                s.title,
+                s.uri,
+                s.metadata as source_metadata,
+                c.id as chunk_id,
+                c.content,
+                c.location,
+                c.token_count,
+                g.query_indexes,
+                g.similarities
+            FROM grouped g
+            JOIN knowledge_chunks c ON c.id = g.chunk_id
+            JOIN knowledge_sources s ON c.source_id = s.id
+        """
+
+        try:
+            from asyncio import timeout
+
+            async with timeout(DatabaseConstants.POOL_ACQUIRE_TIMEOUT):
+                async with self._ensure_pool().acquire() as conn:
+                    start_time = time.perf_counter()
+                    async with conn.transaction():
+                        mode = await self._configure_filtered_scan(conn, filters, limit)
+                        rows = await conn.fetch(query, *params)
+                    vector_search_duration.labels(
+                        search="similarity_many", mode=mode
+                    ).observe(time.perf_counter() - start_time)
+        except TimeoutError:
+            logger.error("Failed to acquire database connection: pool exhausted")
+            raise RuntimeError("Database connection pool exhausted") from None
+        except asyncpg.PostgresConnectionError as e:
+            logger.error(f"Database connection failed: {e}")
+            raise RuntimeError(f"Database connection failed: {e}") from e
+        except Exception as e:
+            logger.error(f"Error during batched similarity search: {e}", exc_info=True)
+            raise
+
+        results: list[list[SearchResult]] = [[] for _ in query_embeddings]
+        for row in rows:
+            for query_index, similarity in zip(
+                row["query_indexes"], row["similarities"], strict=True
+            ):
+                results[query_index].append(
+                    SearchResult(
+                        {
+                            "source_id": row["source_id"],
+                            "source_type": row["type"],
+                            "title": row["title"],
+                            "uri": row["uri"],
+                            "source_metadata": row["source_metadata"] or {},
+                            "chunk_id": row["chunk_id"],
+                            "content": row["content"],
+                            "location": row["location"] or {},
+                            "token_count": row["token_count"],
+                            "similarity": float(similarity),
+                        }
+                    )
+                )
+
+        # チャンク単位で集約して取得しているため、クエリごとに類似度順に並べ直す
+        for query_results in results:
+            query_results.sort(
+                key=lambda result: (-result["similarity"], result["chunk_id"])
+            )
+            vector_search_fill_ratio.labels(mode=mode).observe(
+                len(query_results) / limit if limit else 1.0
+            )
+
+        return results
+
+    def _build_filter_clause(
+        self, filters: dict | None, param_index: int
+    ) -> tuple[str, list]:
+        """検索のフィルタ条件を SQL の条件句に変換.
+
+        Args:
+            filters: フィルタ条件
+                （例: {"source_type": "discord_session", "channel_id": 123}）
+            param_index: 最初のパラメータの番号
+
+        Returns:
+            (" AND ..." 形式の条件句, パラメータのリスト) のタプル
+
+        Raises:
+            ValueError: 無効なフィルタが指定された場合
+        """
+        if not filters:
+            return "", []
+
+        invalid_keys = set(filters.keys()) - ALLOWED_FILTER_KEYS
+        if invalid_keys:
+            raise ValueError(
+                f"Invalid filter keys: {invalid_keys}. "
+                f"Allowed keys: {ALLOWED_FILTER_KEYS}"
+            )
+
+        clause = ""
+        params: list = []
+
+        if "source_type" in filters:
+            source_type = filters["source_type"]
+            if source_type not in VALID_SOURCE_TYPES:
+                raise ValueError(f"Invalid source_type: {source_type}.")
+            clause += f" AND s.type = ${param_index}"
+            params.append(source_type)
+            param_index += 1
+
+        if "source_types" in filters:
+            source_types = filters["source_types"]
+            if not isinstance(source_types, list):
+                raise ValueError("source_types must be a list")
+
+            if len(source_types) == 0:
+                raise ValueError("source_types must not be empty")
+
+            invalid_types = set(source_types) - VALID_SOURCE_TYPES
+            if invalid_types:
+                raise ValueError(f"Invalid source_types: {invalid_types}.")
+
+            clause += f" AND s.type = ANY(${param_index}::source_type_enum[])"
+            params.append(source_types)
+            param_index += 1
+
+        # ⚠️ 改善（パフォーマンス）: metadata のキャスト比較ではなく、
+        # インデックスのある型付きカラムで絞り込む
+        for key, column in ID_FILTER_COLUMNS.items():
+            if key not in filters:
+                continue
+            try:
+                value = int(filters[key])
+            except (ValueError, TypeError) as err:
+                raise ValueError(f"Invalid {key}: must be an integer.") from err
+            clause += f" AND s.{column} = ${param_index}"
+            params.append(value)
+            param_index += 1
+
+        return clause, params
+
+    async def _configure_filtered_scan(
+        self, conn: asyncpg.Connection, filters: dict | None, top_k: int
+    ) -> str:
+        """フィルタ付きベクトル検索の HNSW スキャンを設定し、検索モードを返す.
+
+        ⚠️ 改善（フィルタ付き検索）: HNSW インデックスは ef_search 件の候補を返してから
+        フィルタを適用するため、絞り込みの強いフィルタ（チャンネル指定など）では
+        top_k 件に満たない結果しか返らない。プランナーの推定行数からフィルタの選択率を求め、
+        ef_search を top_k / 選択率 まで引き上げる（上限あり）。
+        pgvector 0.8.0 以降では反復スキャンも有効にし、結果が足りない場合に
+        インデックスのスキャンを続けさせる。
+
+        ⚠️ 重要: SET LOCAL 相当の設定のため、トランザクション内で呼び出すこと。
+
+        Args:
+            conn: データベース接続（トランザクション内）
+            filters: フィルタ条件
+            top_k: 取得する結果の数
+
+        Returns:
+            検索モード（'default': 設定なし, 'ef_search': ef_search のみ,
+            'iterative': ef_search + 反復スキャン）
+        """
+        if not filters or not settings.kb_hnsw_filtered_scan:
+            return "default"
+
+        clause, params = self._build_filter_clause(filters, 1)
+        total_rows = await self._estimate_total_chunk_rows(conn)
+        matching_rows = await self._estimate_chunk_rows(conn, clause, params)
+        selectivity = min(1.0, max(matching_rows, 1.0) / max(total_rows, 1.0))
+
+        ef_search = min(
+            settings.kb_hnsw_ef_search_max,
+            max(settings.kb_hnsw_ef_search, math.ceil(top_k / selectivity)),
+        )
+        vector_search_ef_search.observe(ef_search)
+
+        # ⚠️ 改善（パフォーマンス）: 設定は 1 回のクエリでまとめて適用する
+        if not await self._supports_iterative_scan(conn):
+            await conn.execute(
+                "SELECT set_config('hnsw.ef_search', $1, true)", str(ef_search)
+            )
+            return "ef_search"
+        await conn.execute(
+            """
+            SELECT set_config('hnsw.ef_search', $1, true),
+                   set_config('hnsw.iterative_scan', 'relaxed_order', true)
+        """,
+            str(ef_search),
+        )
+        return "iterative"
+
+    async def _estimate_total_chunk_rows(self, conn: asyncpg.Connection) -> float:
+        """チャンクの総数を統計情報（pg_class.reltuples）の推定値で求める.
+
+        検索のたびに EXPLAIN しないよう、一定時間（CHUNK_ROWS_CACHE_SECONDS）キャッシュする。
+        ANALYZE 前で統計情報がない場合は、EXPLAIN の推定行数を使う。
+
+        Args:
+            conn: データベース接続
+
+        Returns:
+            推定行数
+        """
+        now = time.monotonic()
+        if self._chunk_rows_total is not None and self._chunk_rows_total[1] > now:
+            return self._chunk_rows_total[0]
+
+        total_rows = await conn.fetchval(
+            "SELECT reltuples FROM pg_class WHERE oid = 'knowledge_chunks'::regclass"
+        )
+        if total_rows is None or total_rows <= 0:
+            # reltuples は ANALYZE 前は -1（PostgreSQL 14 以降）または 0
+            total_rows = await self._estimate_chunk_rows(conn, "", [])
+        self._chunk_rows_total = (float(total_rows), now + CHUNK_ROWS_CACHE_SECONDS)
+        return float(total_rows)
+
+    async def _estimate_chunk_rows(
+        self, conn: asyncpg.Connection, clause: str, params: list
+    ) -> float:
+        """フィルタ条件に一致するチャンク数をプランナーの推定値で求める.
+
+        実際に数えるとフィルタが緩い場合に検索より重くなるため、EXPLAIN の推定行数を使う。
+
+        Args:
+            conn: データベース接続
+            clause: _build_filter_clause で作成した条件句（$1 から始まる）
+            params: 条件句のパラメータ
+
+        Returns:
+            推定行数
+        """
+        plan = await conn.fetchval(
+            f"""
+            EXPLAIN (FORMAT JSON)
+            SELECT 1
+            FROM knowledge_chunks c
+            JOIN knowledge_sources s ON c.source_id = s.id
+            WHERE c.embedding IS NOT NULL{clause}
+        """,
+            *params,
+        )
+        if isinstance(plan, str):
+            plan = orjson.loads(plan)
+        return float(plan[0]["Plan"]["Plan Rows"])
+
+    async def _supports_iterative_scan(self, conn: asyncpg.Connection) -> bool:
+        """Pgvector が反復スキャンに対応しているか（0.8.0 以降）.
+
+        Args:
+            conn: データベース接続
+
+        Returns:
+            対応している場合は True
+        """
+        if self._iterative_scan_supported is None:
+            version = await conn.fetchval(
+                "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+            )
+            try:
+                parts = tuple(int(part) for part in str(version).split(".")[:2])
+            except ValueError:
+                parts = (0, 0)
+            self._iterative_scan_supported = parts >= (0, 8)
+            logger.info(
+                f"pgvector {version}: iterative scan "
+                f"{'enabled' if self._iterative_scan_supported else 'unavailable'}"
+            )
+        return self._iterative_scan_supported
+
+    async def _has_bigm(self, conn: asyncpg.Connection) -> bool:
+        """pg_bigm 拡張が有効か.
+
+        Args:
+            conn: データベース接続
+
+        Returns:
+            有効な場合は True
+        """
+        if self._bigm_available is None:
+            self._bigm_available = bool(
+                await conn.fetchval(
+                    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_bigm')"
+                )
+            )
+            if not self._bigm_available:
+                logger.warning(
+                    "pg_bigm is not installed: hybrid search keyword leg "
+                    "falls back to LIKE term matching"
+                )
+        return self._bigm_available
+
     async def save_source(
         self,
         source_type: str,
@@ -706,10 +1377,12 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
             raise ValueError(f"Invalid source_type: {source_type}")
 
         async with self._ensure_pool().acquire() as conn:
+            # フィルタ用のカラムは metadata から埋める（投稿者は author_id、なければ user_id）
             source_id = await conn.fetchval(
                 """
-                INSERT INTO knowledge_sources (type, title, uri, metadata, status)
-                VALUES ($1, $2, $3, $4::jsonb, $5)
+                INSERT INTO knowledge_sources
+                (type, title, uri, metadata, status, channel_id, guild_id, author_id)
+                VALUES ($1, $2, $3, $4::jsonb, $5, $6, $7, $8)
                 RETURNING id
             """,
                 source_type,
@@ -717,6 +1390,9 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
                 uri,
                 metadata,
                 status,
+                _parse_id(metadata.get("channel_id")),
+                _parse_id(metadata.get("guild_id")),
+                _parse_id(metadata.get("author_id", metadata.get("user_id"))),
             )
 
             return source_id
@@ -769,12 +1445,13 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
             query_embedding: クエリのベクトル（1536次元）
             query_text: クエリのテキスト（キーワード検索用）
             limit: 返却する結果の数（デフォルト: 10）
-            vector_weight: ベクトル類似度の重み（デフォルト: 0.7）
-            keyword_weight: キーワードスコアの重み（デフォルト: 0.3）
-            filters: フィルタ条件（source_type, channel_id, user_id等）
+            vector_weight: ベクトル検索の順位の重み（デフォルト: 0.7）
+            keyword_weight: キーワード検索の順位の重み（デフォルト: 0.3）
+            filters: フィルタ条件（source_type, channel_id, guild_id, user_id等）
 
         Returns:
-            検索結果のリスト（スコア順）
+            検索結果のリスト（スコア順。similarity は両方で 1 位の場合に 1.0 となる
+            Reciprocal Rank Fusion のスコア）
         """
         from ..constants import DatabaseConstants, SearchConstants
 
@@ -788,169 +1465,145 @@ class PostgreSQLDatabase(DatabaseProtocol, KnowledgeBaseProtocol):
                 "must equal 1.0"
             )
 
-        # キーワード検索用のLIKEパターンを作成（SQLインジェクション対策）
-        # query_textは信頼できる入力として扱う（内部からの呼び出しのみ）
-        keyword_pattern = f"%{query_text}%"
+        # ⚠️ 改善（検索精度・性能）: キーワード検索は語ごとの部分一致（pg_bigm の
+        # GIN インデックスで候補を絞り込み）で候補を集め、一致した語の割合で順位付けする。
+        # bigm_similarity はチャンクが長いほど低くなるため、同順位の並べ替えにだけ使う。
+        # 2 つの検索結果は Reciprocal Rank Fusion で統合し、幅の広いカラムは
+        # 最終的な上位 limit 件についてのみ結合する
+        terms = _keyword_terms(query_text, SearchConstants.KEYWORD_SEARCH_MAX_TERMS)
+        rrf_k = SearchConstants.RRF_K
+        # フィルタのパラメータは両方の検索で共有する
+        filter_clause, filter_params = self._build_filter_clause(filters, 2)
 
         try:
             from asyncio import timeout
 
             async with timeout(DatabaseConstants.POOL_ACQUIRE_TIMEOUT):
                 async with self._ensure_pool().acquire() as conn:
-                    # ベースクエリの構築
-                    query = f"""
-                        WITH vector_results AS (
-                            SELECT
-                                s.id as source_id,
-                                s.type,
-                                s.title,
-                                s.uri,
-                                s.metadata as source_metadata,
-                                c.id as chunk_id,
-                                c.content,
-                                c.location,
-                                c.token_count,
-                                1 - (c.embedding <=> $1::{vector_cast}({vector_dimension})) AS vector_similarity
-                            FROM knowledge_chunks c
-                            JOIN knowledge_sources s ON c.source_id = s.id
-                            WHERE c.embedding IS NOT NULL
-                    """
+                    use_bigm = await self._has_bigm(conn)
 
-                    params = [query_embedding]
-                    param_index = 2
+                    params: list = [query_embedding, *filter_params]
+                    param_index = 2 + len(filter_params)
 
-                    # フィルタの適用（ベクトル検索用）
-                    if filters:
-                        invalid_keys = set(filters.keys()) - ALLOWED_FILTER_KEYS
-                        if invalid_keys:
-                            raise ValueError(
-                                f"Invalid filter keys: {invalid_keys}. "
-                                f"Allowed keys: {ALLOWED_FILTER_KEYS}"
+                    # キーワード検索の条件とスコア
+                    term_conditions = []
+                    for term in terms:
+                        if use_bigm:
+                            term_conditions.append(
+                                f"c.content LIKE likequery(${param_index})"
                             )
-
-                        if "source_type" in filters:
-                            source_type = filters["source_type"]
-                            if source_type not in VALID_SOURCE_TYPES:
-                                raise ValueError(f"Invalid source_type: {source_type}.")
-                            query += f" AND s.type = ${param_index}"
-                            params.append(source_type)
-                            param_index += 1
-
-                        if "source_types" in filters:
-                            source_types = filters["source_types"]
-                            if not isinstance(source_types, list):
-                                raise ValueError("source_types must be a list")
-                            if len(source_types) == 0:
-                                raise ValueError("source_types must not be empty")
-                            invalid_types = set(source_types) - VALID_SOURCE_TYPES
-                            if invalid_types:
-                                raise ValueError(
-                                    f"Invalid source_types: {invalid_types}."
-                                )
-                            query += (
-                                f" AND s.type = ANY(${param_index}::source_type_enum[])"
+                            params.append(term)
+                        else:
+                            term_conditions.append(f"c.content LIKE ${param_index}")
+                            params.append(_like_pattern(term))
+                        param_index += 1
+
+                    if not term_conditions:
+                        keyword_condition = "FALSE"
+                        keyword_score = "0.0"
+                        keyword_tiebreak = "0.0"
+                    else:
+                        # 一致した語の割合をスコアとする（チャンクの長さに左右されない）
+                        keyword_condition = " OR ".join(term_conditions)
+                        keyword_score = (
+                            "("
+                            + " + ".join(
+                                f"CASE WHEN {condition} THEN 1 ELSE 0 END"
+                                for condition in term_conditions
                             )
-                            params.append(source_types)
-                            param_index += 1
-
-                        if "channel_id" in filters:
-                            try:
-                                channel_id = int(filters["channel_id"])
-                            except (ValueError, TypeError) as err:
-                                raise ValueError(
-                                    "Invalid channel_id: must be an integer."
-                                ) from err
-                            query += f" AND (s.metadata->>'channel_id')::bigint = ${param_index}"
-                            params.append(channel_id)
-                            param_index += 1
-
-                        if "user_id" in filters:
-                            try:
-                                user_id = int(filters["user_id"])
-                            except (ValueError, TypeError) as err:
-                                raise ValueError(
-                                    "Invalid user_id: must be an integer."
-                                ) from err
-                            query += f" AND (s.metadata->>'author_id')::bigint = ${param_index}"
-                            params.append(user_id)
+                            + f")::float8 / {len(term_conditions)}"
+                        )
+                        if use_bigm:
+                            # 一致した語の割合が同じ場合は bigm_similarity で並べる
+                            keyword_tiebreak = (
+                                f"bigm_similarity(${param_index}, c.content)"
+                            )
+                            params.append(query_text)
                             param_index += 1
+                        else:
+                            keyword_tiebreak = "0.0"
 
-                    query += f"""
+                    query = f"""
+                        WITH vector_candidates AS (
+                            SELECT
+                                c.id AS chunk_id,
+                                c.embedding <=> $1::{vector_cast}({vector_dimension}) AS distance
+                            FROM knowledge_chunks c
+                            JOIN knowledge_sources s ON c.source_id = s.id
+                            WHERE c.embedding IS NOT NULL{filter_clause}
                             ORDER BY c.embedding <=> $1::{vector_cast}({vector_dimension})
                             LIMIT {SearchConstants.VECTOR_SEARCH_CANDIDATE_LIMIT}
                         ),
-                        keyword_results AS (
+                        vector_ranked AS (
+                            SELECT
+                                chunk_id,
+                                ROW_NUMBER() OVER (ORDER BY distance, chunk_id) AS rank
+                            FROM vector_candidates
+                        ),
+                        keyword_candidates AS (
                             SELECT
-                                s.id as source_id,
-                                s.type,
-                                s.title,
-                                s.uri,
-                                s.metadata as source_metadata,
-                                c.id as chunk_id,
-                                c.content,
-                                c.location,
-                                c.token_count,
-                                1.0 AS keyword_score
+                                c.id AS chunk_id,
+                                {keyword_score} AS keyword_score,
+                                {keyword_tiebreak} AS keyword_tiebreak
                             FROM knowledge_chunks c
                             JOIN knowledge_sources s ON c.source_id = s.id
-                            WHERE c.content LIKE ${param_index}
-                              AND c.embedding IS NOT NULL
-                    """
-
-                    params.append(keyword_pattern)
-                    param_index += 1
-
-                    # フィルタの適用（キーワード検索用）
-                    if filters:
-                        if "source_type" in filters:
-                            query += f" AND s.type = ${param_index}"
-                            params.append(filters["source_type"])
-                            param_index += 1
-                        if "source_types" in filters:
-                            query += (
-                                f" AND s.type = ANY(${param_index}::source_type_enum[])"
-                            )
-                            params.append(filters["source_types"])
-                            param_index += 1
-                        if "channel_id" in filters:
-                            query += f" AND (s.metadata->>'channel_id')::bigint = ${param_index}"
-                            params.append(int(filters["channel_id"]))
-                            param_index += 1
-                        if "user_id" in filters:
-                            query += f" AND (s.metadata->>'author_id')::bigint = ${param_index}"
-                            params.append(int(filters["user_id"]))
-                            param_index += 1
-
-                    query += f"""
+                            WHERE ({keyword_condition})
+                              AND c.embedding IS NOT NULL{filter_clause}
+                            ORDER BY keyword_score DESC, keyword_tiebreak DESC, c.id
                             LIMIT {SearchConstants.KEYWORD_SEARCH_LIMIT}
                         ),
-                        combined AS (
+                        keyword_ranked AS (
                             SELECT
-                                source_id, type, title, uri, source_metadata,
-                                chunk_id, content, location, token_count,
-                                vector_similarity * {vector_weight} AS score
-                            FROM vector_results
-                            UNION ALL
+                                chunk_id,
+                                ROW_NUMBER() OVER (
+                                    ORDER BY
+                                        keyword_score DESC,
+                                        keyword_tiebreak DESC,
+                                        chunk_id
+                                ) AS rank
+                            FROM keyword_candidates
+                        ),
+                        fused AS (
                             SELECT
-                                source_id, type, title, uri, source_metadata,
-                                chunk_id, content, location, token_count,
-                                keyword_score * {keyword_weight} AS score
-                            FROM keyword_results
+                                COALESCE(v.chunk_id, k.chunk_id) AS chunk_id,
+                                COALESCE({float(vector_weight)}::float8 / ({rrf_k} + v.rank), 0)
+                                    + COALESCE(
+                                        {float(keyword_weight)}::float8 / ({rrf_k} + k.rank), 0
+                                    )
+                                    AS rrf_score
+                            FROM vector_ranked v
+                            FULL OUTER JOIN keyword_ranked k ON v.chunk_id = k.chunk_id
+                            ORDER BY rrf_score DESC, chunk_id
+                            LIMIT ${param_index}
                         )
                         SELECT
-                            source_id, type, title, uri, source_metadata,
-                            chunk_id, content, location, token_count,
-                            SUM(score) AS combined_score
-                        FROM combined
-                        GROUP BY source_id, type, title, uri, source_metadata,
-                                 chunk_id, content, location, token_count
-                        ORDER BY combined_score DESC
-                        LIMIT ${param_index}
+                            s.id AS source_id,
+                            s.type,
+                            s.title,
+                            s.uri,
+                            s.metadata AS source_metadata,
+                            c.id AS chunk_id,
+                            c.content,
+                            c.location,
+                            c.token_count,
+                            f.rrf_score * {rrf_k + 1} AS combined_score
+                        FROM fused f
+                        JOIN knowledge_chunks c ON c.id = f.chunk_id
+                        JOIN knowledge_sources s ON c.source_id = s.id
+                        ORDER BY f.rrf_score DESC, f.chunk_id
                     """
 
                     params.append(limit)
 
-                    rows = await conn.fetch(query, *params)
+                    start_time = time.perf_counter()
+                    async with conn.transaction():
+                        mode = await self._configure_filtered_scan(
+                            conn, filters, SearchConstants.VECTOR_SEARCH_CANDIDATE_LIMIT
+                        )
+                        rows = await conn.fetch(query, *params)
+                    vector_search_duration.labels(search="hybrid", mode=mode).observe(
+                        time.perf_counter() - start_time
+                    )
         except TimeoutError:
             logger.error("Failed to acquire database connection: pool exhausted")
             raise RuntimeError("Database connection pool exhausted") from None
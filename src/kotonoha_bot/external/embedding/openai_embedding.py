@@ -1,9 +1,12 @@
 """OpenAI Embedding API プロバイダー."""
 
+import asyncio
 import os
+from functools import cached_property
 
 import openai
 import structlog
+import tiktoken
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -15,15 +18,28 @@ from . import EmbeddingProvider
 
 logger = structlog.get_logger(__name__)
 
+# Embedding API の1リクエストあたりの上限
+MAX_REQUEST_TOKENS = 300_000  # 全入力の合計トークン数
+MAX_REQUEST_ITEMS = 2048  # 入力の件数
+
 
 class OpenAIEmbeddingProvider(EmbeddingProvider):
     """OpenAI text-embedding-3-small を使用（リトライロジック付き）."""
 
-    def __init__(self, api_key: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        max_request_tokens: int = MAX_REQUEST_TOKENS,
+        max_request_items: int = MAX_REQUEST_ITEMS,
+        max_concurrent_requests: int = 4,
+    ):
         """OpenAIEmbeddingProvider を初期化.
 
         Args:
             api_key: OpenAI API キー（省略時は環境変数 OPENAI_API_KEY を使用）
+            max_request_tokens: 1リクエストあたりの合計トークン数の上限
+            max_request_items: 1リクエストあたりの入力件数の上限
+            max_concurrent_requests: 同時に送信するリクエスト数の上限
 
         Raises:
             ValueError: API キーが設定されていない場合
@@ -33,7 +49,31 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
             raise ValueError("OPENAI_API_KEY is not set")
         self.model = "text-embedding-3-small"
         self.dimension = 1536
+        self.max_request_tokens = max_request_tokens
+        self.max_request_items = max(1, max_request_items)
         self._client = openai.AsyncOpenAI(api_key=self.api_key)
+        # バッチを分割したリクエストの同時実行数の制限（呼び出し元をまたいで共有）
+        self._request_semaphore = asyncio.Semaphore(max(1, max_concurrent_requests))
+
+    @cached_property
+    def _encoding(self) -> tiktoken.Encoding | None:
+        """トークン数の計算に使う tiktoken エンコーディング（読み込めない場合は None）."""
+        try:
+            return tiktoken.encoding_for_model(self.model)
+        except Exception as e:
+            logger.warning(f"Failed to load tiktoken encoding, using char count: {e}")
+            return None
+
+    def _count_tokens(self, text: str) -> int:
+        """テキストのトークン数を数える.
+
+        エンコーディングを読み込めない場合は文字数で代用する
+        （日本語では1文字≒1トークン以上になるため、安全側の見積もりになる）。
+        """
+        encoding = self._encoding
+        if encoding is None:
+            return len(text)
+        return len(encoding.encode(text))
 
     @retry(
         stop=stop_after_attempt(3),
@@ -82,6 +122,12 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
         個別にAPIを呼ぶのではなく、バッチで一度に送信することで効率化します。
         API呼び出し回数を大幅に削減（100回→1回）、レート制限にかかりにくくなります。
 
+        ⚠️ 改善（リクエスト分割）: 1リクエストのトークン数・件数の上限を超えないように
+        入力を順に詰めたリクエストに分割し、同時実行数を制限して並行に送信する。
+        タイムアウトのリトライはリクエストごとに行い、結果は入力と同じ順序に並べ直す。
+        レート制限はリトライせずに送出する（呼び出し元の EmbeddingProcessor が
+        並行数とバックオフで制御するため、ここでリトライすると制御が遅れ二重になる）。
+
         Args:
             texts: ベクトル化するテキストのリスト
 
@@ -93,12 +139,78 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
             openai.APITimeoutError: タイムアウトエラー
             openai.APIError: APIエラー
         """
-        try:
-            response = await self._client.embeddings.create(
-                model=self.model,
-                input=texts,  # リストを直接渡せる
-                dimensions=self.dimension,
+        if not texts:
+            return []
+
+        requests = self._pack_requests(texts)
+        if len(requests) > 1:
+            logger.debug(
+                f"Split {len(texts)} inputs into {len(requests)} embedding requests"
             )
+
+        # 失敗したリクエストがあっても、他のリクエストの完了を待ってから例外を送出する
+        results = await asyncio.gather(
+            *[self._embed_request(request) for request in requests],
+            return_exceptions=True,
+        )
+        embeddings: list[list[float]] = []
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+            embeddings.extend(result)
+        return embeddings
+
+    def _pack_requests(self, texts: list[str]) -> list[list[str]]:
+        """入力を先頭から順に、上限を超えないリクエストに詰める.
+
+        1件で上限を超える入力は単独のリクエストにする（失敗しても他の入力を巻き込まない）。
+
+        Args:
+            texts: ベクトル化するテキストのリスト
+
+        Returns:
+            リクエストごとの入力のリスト（連結すると texts と同じ順序になる）
+        """
+        requests: list[list[str]] = []
+        current: list[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = self._count_tokens(text)
+            if current and (
+                current_tokens + tokens > self.max_request_tokens
+                or len(current) >= self.max_request_items
+            ):
+                requests.append(current)
+                current = []
+                current_tokens = 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            requests.append(current)
+        return requests
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=60),
+        retry=retry_if_exception_type(openai.APITimeoutError),
+        reraise=True,
+    )
+    async def _embed_request(self, texts: list[str]) -> list[list[float]]:
+        """1リクエスト分の入力をベクトル化（タイムアウト時のみリトライ）.
+
+        Args:
+            texts: 1リクエスト分のテキストのリスト
+
+        Returns:
+            ベクトルのリスト
+        """
+        try:
+            async with self._request_semaphore:
+                response = await self._client.embeddings.create(
+                    model=self.model,
+                    input=texts,  # リストを直接渡せる
+                    dimensions=self.dimension,
+                )
             return [data.embedding for data in response.data]
         except openai.RateLimitError as e:
             logger.warning(f"Rate limit hit in batch embedding: {e}")
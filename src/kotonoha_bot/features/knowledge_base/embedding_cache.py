@@ -0,0 +1,146 @@
+"""Embedding のキャッシュ（内容のハッシュ + LRU）."""
+
+import hashlib
+import unicodedata
+
+import structlog
+
+from ...db.base import EmbeddingStoreProtocol
+from .metrics import embedding_cache_requests_counter
+
+logger = structlog.get_logger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """キャッシュキー用にテキストを正規化.
+
+    Unicode を NFC に揃え、連続する空白を1つにまとめて前後の空白を取り除く。
+
+    Args:
+        text: ベクトル化するテキスト
+
+    Returns:
+        正規化した文字列
+    """
+    return unicodedata.normalize("NFC", " ".join(text.split()))
+
+
+class EmbeddingCache:
+    """Embedding のキャッシュ.
+
+    会話のオーバーラップや再アーカイブで同じ内容のチャンクが繰り返し登録されるため、
+    正規化したテキスト・モデル・次元数のハッシュをキーにベクトルを再利用する。
+    内容が同じならベクトルも同じため、有効期限は設けない。
+    store（PostgreSQL）に永続化し、メモリには最近使用したものを max_entries 件まで保持する
+    （dict の挿入順を LRU 順として使う。0 の場合はメモリに保持しない）。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        store: EmbeddingStoreProtocol | None = None,
+    ):
+        """EmbeddingCache を初期化.
+
+        Args:
+            max_entries: メモリに保持する最大件数（0 の場合はメモリに保持しない）
+            store: 永続化先（省略時はメモリのみ）
+        """
+        self.max_entries = max(0, max_entries)
+        self.store = store
+        self._entries: dict[str, list[float]] = {}
+
+    def __len__(self) -> int:
+        """メモリに保持しているエントリ数."""
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(model: str, dimension: int, text: str) -> str:
+        """キャッシュキーを作成.
+
+        Args:
+            model: Embedding モデル
+            dimension: ベクトルの次元数
+            text: ベクトル化するテキスト
+
+        Returns:
+            キャッシュキー（正規化した内容の SHA-256）
+        """
+        payload = f"{model}\x00{dimension}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """ベクトルをまとめて取得.
+
+        メモリにないキーは store からまとめて読み込む。
+
+        Args:
+            keys: キャッシュキーのリスト
+
+        Returns:
+            キャッシュキーからベクトルへの辞書（見つからないキーは含まない）
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found: dict[str, list[float]] = {}
+        missing: list[str] = []
+        for key in unique_keys:
+            embedding = self._entries.pop(key, None)
+            if embedding is None:
+                missing.append(key)
+                continue
+            # 最近使用したものとして末尾に付け直す
+            self._entries[key] = embedding
+            found[key] = embedding
+        embedding_cache_requests_counter.labels(result="hit").inc(len(found))
+
+        if missing and self.store is not None:
+            try:
+                stored = await self.store.load_embeddings(missing)
+            except Exception as e:
+                logger.warning(f"Failed to load embeddings from store: {e}")
+                stored = {}
+            for key, embedding in stored.items():
+                self._put(key, embedding)
+            found.update(stored)
+            embedding_cache_requests_counter.labels(result="store_hit").inc(len(stored))
+
+        embedding_cache_requests_counter.labels(result="miss").inc(
+            len(unique_keys) - len(found)
+        )
+        return found
+
+    async def put_many(
+        self, model: str, dimension: int, embeddings: dict[str, list[float]]
+    ) -> None:
+        """ベクトルをまとめて保存.
+
+        Args:
+            model: Embedding モデル
+            dimension: ベクトルの次元数
+            embeddings: キャッシュキーからベクトルへの辞書
+        """
+        for key, embedding in embeddings.items():
+            self._put(key, embedding)
+
+        if self.store is not None and embeddings:
+            try:
+                await self.store.save_embeddings(model, dimension, embeddings)
+            except Exception as e:
+                # 永続化に失敗してもベクトル化の結果は有効
+                logger.warning(f"Failed to save embeddings to store: {e}")
+
+    def _put(self, key: str, embedding: list[float]) -> None:
+        """メモリにエントリを追加し、上限を超えた分を削除.
+
+        Args:
+            key: キャッシュキー
+            embedding: ベクトル
+        """
+        if self.max_entries == 0:
+            return
+
+        self._entries.pop(key, None)
+        self._entries[key] = embedding
+        while len(self._entries) > self.max_entries:
+            # 先頭が最も長く使われていないエントリ
+            del self._entries[next(iter(self._entries))]
@@ -6,11 +6,16 @@ from collections.abc import Awaitable, Callable
 from typing import TYPE_CHECKING, cast
 
 import asyncpg
+import openai
 import structlog
 from discord.ext import tasks
 
 from ...config import settings
+from .embedding_cache import EmbeddingCache
 from .metrics import (
+    embedding_backoff_seconds,
+    embedding_chunk_processing_duration,
+    embedding_concurrency_gauge,
     embedding_errors_counter,
     embedding_processed_counter,
     embedding_processing_duration,
@@ -23,6 +28,29 @@ if TYPE_CHECKING:
 
 logger = structlog.get_logger(__name__)
 
+# チャンク登録時に通知されるチャンネル（マイグレーションのトリガーで発行）
+NOTIFY_CHANNEL = "knowledge_chunks_pending"
+
+# 通知の待ち受けの接続が切れた場合の再接続の待機時間（秒、1秒から倍々で上限まで）
+LISTEN_RETRY_MAX_SECONDS = 60.0
+
+# バッチを二分して再試行するエラーコード（入力が原因のもの = 400 Bad Request）
+# レート制限・認証エラー・接続エラー・サーバーエラー・原因不明のエラーは
+# 全チャンクで失敗するため二分しない（API 呼び出しが約 2N-1 倍に増えるのを防ぐ）
+BISECT_ERROR_CODES = {"INVALID_INPUT"}
+
+# OpenAI の例外の型とエラーコードの対応（上から順に判定。サブクラスを先に置く）
+OPENAI_ERROR_CODES: tuple[tuple[type[Exception], str], ...] = (
+    (openai.RateLimitError, "RATE_LIMIT"),
+    (openai.APITimeoutError, "EMBEDDING_API_TIMEOUT"),
+    (openai.APIConnectionError, "CONNECTION_ERROR"),
+    (openai.BadRequestError, "INVALID_INPUT"),
+    (openai.AuthenticationError, "AUTHENTICATION_ERROR"),
+    (openai.PermissionDeniedError, "PERMISSION_ERROR"),
+    (openai.NotFoundError, "NOT_FOUND"),
+    (openai.InternalServerError, "SERVER_ERROR"),
+)
+
 
 class EmbeddingProcessor:
     """Embedding処理を管理するクラス."""
@@ -34,6 +62,7 @@ class EmbeddingProcessor:
         bot=None,  # Botインスタンス（tasks.loopに必要）
         batch_size: int | None = None,
         max_concurrent: int | None = None,
+        embedding_cache: EmbeddingCache | None = None,
     ):
         """EmbeddingProcessor を初期化.
 
@@ -43,6 +72,8 @@ class EmbeddingProcessor:
             bot: Bot インスタンス（tasks.loop に必要）
             batch_size: バッチサイズ（省略時は設定値を使用）
             max_concurrent: 最大並行数（省略時は設定値を使用）
+            embedding_cache: Embedding のキャッシュ（省略時は設定値に従って
+                db に永続化するキャッシュを作成）
         """
         self.db = db
         self.embedding_provider = embedding_provider
@@ -65,6 +96,26 @@ class EmbeddingProcessor:
         self._semaphore = asyncio.Semaphore(max_concurrent)  # レート制限用セマフォ
         self._lock = asyncio.Lock()  # 競合状態対策
 
+        # ⚠️ 改善（スループット）: バックログがある間は連続で処理し、
+        # 最大 max_concurrent バッチを並行して処理する（セマフォと同じ上限）。
+        # レート制限に達したら並行数を半減し、成功が続けば1ずつ戻す
+        self._max_concurrent = max_concurrent
+        self._concurrency = max_concurrent
+        self._rate_limit_streak = 0
+        self._rate_limited = False
+        self._last_failed = False
+        self._draining = False
+        self._drain_requested = False
+        self._listener_task: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # ⚠️ 改善（API呼び出し削減）: 同じ内容のチャンクはキャッシュしたベクトルを使う
+        if embedding_cache is None and settings.kb_embedding_cache_enabled:
+            embedding_cache = EmbeddingCache(
+                max_entries=settings.kb_embedding_cache_memory_size, store=db
+            )
+        self.embedding_cache = embedding_cache
+
         # ⚠️ 重要: @tasks.loop デコレータのパラメータはクラス定義時に評価されるため、
         # 環境変数の遅延読み込みが必要な場合は、__init__で間隔を保存し、
         # start()メソッドでchange_interval()を呼び出します。
@@ -77,10 +128,14 @@ class EmbeddingProcessor:
     async def process_pending_embeddings(self):
         """pending状態のチャンクをバッチでベクトル化.
 
+        ⚠️ 改善（スループット）: 1回のループで1バッチだけ処理すると、
+        5万チャンクのバックログの処理に500分かかる。バックログがなくなるまで連続で処理し、
+        このループはNOTIFYの取りこぼしに備えたポーリングとして使う。
+
         ⚠️ 重要: エラーハンドリングを実装し、例外が発生してもタスクが継続するようにする
         """
         try:
-            await self._process_pending_embeddings_impl()
+            await self._drain()
         except Exception as e:
             logger.exception(f"Error in embedding processing: {e}")
             # タスクは継続（次のループで再試行）
@@ -98,28 +153,144 @@ class EmbeddingProcessor:
             await self.bot.wait_until_ready()
         logger.info(
             f"Embedding processor starting with interval={self._interval} minutes, "
-            f"batch_size={self.batch_size}, max_concurrent={self._semaphore._value}"
+            f"batch_size={self.batch_size}, max_concurrent={self._max_concurrent}"
+        )
+
+    async def _drain(self) -> int:
+        """バックログがなくなるまでEmbedding処理を繰り返す.
+
+        既に処理中の場合は、処理中のループに再確認を依頼して戻る。
+        レート制限に達した場合は、並行数を減らしてバックオフしてから再開する。
+        それ以外のエラーの場合は、次のポーリングまたは通知まで処理を中断する
+        （API障害時にリトライ回数を短時間で使い切らないようにする）。
+
+        Returns:
+            取得したチャンク数の合計
+        """
+        if self._draining:
+            self._drain_requested = True
+            return 0
+
+        self._draining = True
+        total = 0
+        try:
+            while True:
+                self._drain_requested = False
+                claimed = await self._process_pending_embeddings_impl()
+                total += claimed
+
+                if self._rate_limited:
+                    # ⚠️ 改善（レート制限）: 並行数を半減し、指数バックオフしてから再開
+                    delay = self._next_backoff()
+                    logger.warning(
+                        f"Embedding API rate limited, backing off {delay:.1f}s "
+                        f"(concurrency={self._concurrency})"
+                    )
+                    embedding_backoff_seconds.observe(delay)
+                    await asyncio.sleep(delay)
+                    continue
+                if self._last_failed:
+                    break
+                if claimed == 0 and not self._drain_requested:
+                    break
+        finally:
+            self._draining = False
+
+        if total:
+            logger.info(f"Embedding backlog drained: {total} chunks claimed")
+        return total
+
+    def _next_backoff(self) -> float:
+        """レート制限時の待機時間（秒）を返す（1秒から倍々、上限あり）."""
+        self._rate_limit_streak += 1
+        return min(
+            2.0 ** (self._rate_limit_streak - 1),
+            settings.kb_embedding_backoff_max_seconds,
         )
 
-    async def _process_pending_embeddings_impl(self):
-        """Embedding処理の実装（エラーハンドリング分離）."""
+    def _on_chunks_inserted(self, *_args) -> None:
+        """チャンク登録の通知（LISTEN/NOTIFY）を受けて処理を起動."""
+        if self._draining:
+            self._drain_requested = True
+            return
+        task = asyncio.create_task(self._drain())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _listen_for_chunks(self) -> None:
+        """チャンク登録の通知を待ち受ける（専用の接続を保持する）.
+
+        通知を受け取れない間もポーリングで処理は継続する。接続が切れた場合は
+        待機時間を倍々に延ばしながら再接続し、切断中に登録されたチャンクを処理する。
+        """
+        assert self.db.pool is not None, "Database pool must be initialized"
+        retry_delay = 1.0
+        reconnecting = False
+        while True:
+            try:
+                async with self.db.pool.acquire() as conn:
+                    # ⚠️ 改善（障害対応）: 接続が切れても気付けるよう、終了を監視する
+                    lost = asyncio.get_running_loop().create_future()
+
+                    def on_terminated(_conn, lost=lost) -> None:
+                        if not lost.done():
+                            lost.set_result(None)
+
+                    conn.add_termination_listener(on_terminated)
+                    try:
+                        await conn.add_listener(
+                            NOTIFY_CHANNEL, self._on_chunks_inserted
+                        )
+                        logger.info(f"Listening for {NOTIFY_CHANNEL} notifications")
+                        retry_delay = 1.0
+                        if reconnecting:
+                            # 切断中に届かなかった通知の分を処理する
+                            self._on_chunks_inserted()
+                        await lost  # 接続が切れるか、キャンセルされるまで待機
+                    finally:
+                        conn.remove_termination_listener(on_terminated)
+                        if not conn.is_closed():
+                            await conn.remove_listener(
+                                NOTIFY_CHANNEL, self._on_chunks_inserted
+                            )
+                logger.warning(
+                    "Chunk notification connection lost, falling back to polling "
+                    f"until reconnected (retry in {retry_delay:.0f}s)"
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    "Failed to listen for chunk notifications, falling back to "
+                    f"polling (retry in {retry_delay:.0f}s): {e}"
+                )
+            reconnecting = True
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, LISTEN_RETRY_MAX_SECONDS)
+
+    async def _process_pending_embeddings_impl(self) -> int:
+        """Embedding処理の実装（エラーハンドリング分離）.
+
+        現在の並行数ぶんのバッチをまとめて取得し、並行してベクトル化する。
+
+        Returns:
+            取得したチャンク数（0 の場合はバックログなし、またはスキップ）
+        """
         # 競合状態対策: asyncio.Lockを使用
         if self._lock.locked():
             logger.debug("Embedding processing already in progress, skipping...")
-            return
+            return 0
 
         # メトリクス: 処理時間の計測開始
         start_time = time.time()
 
         async with self._lock:
             logger.info("Starting embedding processing...")
+            self._rate_limited = False
+            self._last_failed = False
 
             # ⚠️ 重要: Dead Letter Queue対応 - retry_countを考慮
-            from ...constants import SearchConstants
-
             MAX_RETRY_COUNT = settings.kb_embedding_max_retry
-            vector_cast = SearchConstants.VECTOR_CAST
-            vector_dimension = SearchConstants.VECTOR_DIMENSION
 
             # ⚠️ 重要: トランザクション内でのAPIコールを回避するため、
             # Tx1: FOR UPDATE SKIP LOCKED で対象行を取得し、IDとcontentをメモリに保持して即コミット
@@ -127,6 +298,8 @@ class EmbeddingProcessor:
             # Tx2: 結果を UPDATE
 
             # Tx1: 対象チャンクを取得（FOR UPDATE SKIP LOCKEDでロック）
+            # ⚠️ 改善（スループット）: 並行して処理するバッチの分をまとめて取得し、
+            # 同じチャンクを複数のバッチで処理しないようにする
             assert self.db.pool is not None, "Database pool must be initialized"
             async with (
                 self.db.pool.acquire() as conn,
@@ -145,7 +318,7 @@ class EmbeddingProcessor:
                         FOR UPDATE SKIP LOCKED
                     """,
                     MAX_RETRY_COUNT,
-                    self.batch_size,
+                    self.batch_size * self._concurrency,
                 )
                 # トランザクションを即コミット（ロックを解放）
 
@@ -153,148 +326,209 @@ class EmbeddingProcessor:
                 logger.info("No pending chunks to process")
                 # メトリクス: pendingチャンク数を更新
                 pending_chunks_gauge.set(0)
-                return
+                return 0
 
-            logger.info(f"Processing {len(pending_chunks)} pending chunks...")
+            logger.info(
+                f"Processing {len(pending_chunks)} pending chunks "
+                f"(concurrency={self._concurrency})..."
+            )
             # メトリクス: pendingチャンク数を更新
             pending_chunks_gauge.set(len(pending_chunks))
 
-            # No Tx: OpenAI Embedding APIのバッチリクエスト（時間かかる処理）
-            # ⚠️ 重要: この時点ではトランザクションを保持していないため、
-            # 接続プールが枯渇したり、他のクエリをブロックしない
-            texts = [chunk["content"] for chunk in pending_chunks]
-            try:
-                embeddings = await self._generate_embeddings_batch(texts)
-            except Exception as e:
-                # Embedding API全体障害時の処理: 失敗したチャンクのretry_countをインクリメント
-                error_code = self._classify_error(e)
-                logger.error(
-                    f"Embedding API failed for batch: {error_code}",
-                    exc_info=True,
-                )
-                # メトリクス: エラーを記録
-                embedding_errors_counter.labels(error_type=error_code).inc()
-                # Tx2: エラー時の更新（別トランザクション）
-                assert self.db.pool is not None, "Database pool must be initialized"
-                async with (
-                    self.db.pool.acquire() as conn,
-                    conn.transaction(),
-                ):
-                    for chunk in pending_chunks:
-                        # retry_countをインクリメント
-                        new_retry_count = await conn.fetchval(
-                            """
-                                UPDATE knowledge_chunks
-                                SET retry_count = COALESCE(retry_count, 0) + 1
-                                WHERE id = $1
-                                RETURNING retry_count
-                            """,
-                            chunk["id"],
-                        )
-
-                        # ⚠️ 改善（データ整合性）: DLQへの移動ロジックを追加
-                        if new_retry_count >= MAX_RETRY_COUNT:
-                            # retry_countを更新したchunkを渡す
-                            chunk_with_updated_retry = dict(chunk)
-                            chunk_with_updated_retry["retry_count"] = new_retry_count
-                            await self._move_to_dlq(
-                                cast(asyncpg.Connection, conn),
-                                chunk_with_updated_retry,
-                                e,
-                            )
-
-                    # retry_countが上限に達したソースはfailedに
-                    source_ids = {chunk["source_id"] for chunk in pending_chunks}
-                    for source_id in source_ids:
-                        failed_count = await conn.fetchval(
-                            """
-                                SELECT COUNT(*)
-                                FROM knowledge_chunks
-                                WHERE source_id = $1
-                                AND retry_count >= $2
-                            """,
-                            source_id,
-                            MAX_RETRY_COUNT,
-                        )
-
-                        if failed_count > 0:
-                            error_code = "EMBEDDING_MAX_RETRIES_EXCEEDED"
-                            error_message = (
-                                f"Embedding failed after {MAX_RETRY_COUNT} retries"
-                            )
-                            await conn.execute(
-                                """
-                                    UPDATE knowledge_sources
-                                    SET status = 'failed',
-                                        error_code = $1,
-                                        error_message = $2,
-                                        updated_at = CURRENT_TIMESTAMP
-                                    WHERE id = $3
-                                """,
-                                error_code,
-                                error_message,
-                                source_id,
-                            )
-                return  # 処理を中断
-
-            # Tx2: 結果を UPDATE（別トランザクション）
-            # ⚠️ 重要: APIコールが完了してからトランザクションを開始するため、
-            # トランザクションの保持時間が最小限になる
-            # 正常に処理されたチャンクのみを更新
-            successful_chunks = [
-                chunk
-                for chunk in pending_chunks
-                if chunk.get("retry_count", 0) < MAX_RETRY_COUNT
+            batches = [
+                pending_chunks[i : i + self.batch_size]
+                for i in range(0, len(pending_chunks), self.batch_size)
             ]
-
-            if successful_chunks:
-                successful_embeddings = [
-                    emb
-                    for emb, chunk in zip(embeddings, pending_chunks, strict=False)
-                    if chunk.get("retry_count", 0) < MAX_RETRY_COUNT
-                ]
-
-                assert self.db.pool is not None, "Database pool must be initialized"
-                async with (
-                    self.db.pool.acquire() as conn,
-                    conn.transaction(),
-                ):
-                    # ⚠️ 改善（パフォーマンス）: executemany のバッチサイズ制御
-
-                    update_data = [
-                        (emb, chunk["id"])
-                        for emb, chunk in zip(
-                            successful_embeddings, successful_chunks, strict=True
-                        )
-                    ]
-                    BATCH_SIZE = settings.kb_chunk_update_batch_size
-
-                    for i in range(0, len(update_data), BATCH_SIZE):
-                        batch = update_data[i : i + BATCH_SIZE]
-                        await conn.executemany(
-                            f"""
-                                UPDATE knowledge_chunks
-                                SET embedding = $1::{vector_cast}({vector_dimension}),
-                                    retry_count = 0
-                                WHERE id = $2
-                            """,
-                            batch,
-                        )
+            results = await asyncio.gather(
+                *[self._process_batch(batch) for batch in batches]
+            )
+            processed = sum(results)
 
             # Sourceのステータスも更新
             await self._update_source_status([dict(chunk) for chunk in pending_chunks])
 
+            if self._rate_limited:
+                # ⚠️ 改善（レート制限）: 並行数を半減（AIMD）
+                self._concurrency = max(1, self._concurrency // 2)
+            elif not self._last_failed:
+                # 成功が続く間は並行数を1ずつ戻す
+                self._rate_limit_streak = 0
+                self._concurrency = min(self._max_concurrent, self._concurrency + 1)
+            embedding_concurrency_gauge.set(self._concurrency)
+
             # メトリクス: 処理時間を記録
             elapsed_time = time.time() - start_time
             embedding_processing_duration.observe(elapsed_time)
+            if processed:
+                embedding_chunk_processing_duration.observe(elapsed_time / processed)
 
             # メトリクス: 処理済みチャンク数を記録
-            embedding_processed_counter.inc(len(successful_chunks))
+            embedding_processed_counter.inc(processed)
 
             # メトリクス: pendingチャンク数を更新
             pending_chunks_gauge.set(0)
 
-            logger.info(f"Successfully processed {len(successful_chunks)} chunks")
+            logger.info(f"Successfully processed {processed} chunks")
+            return len(pending_chunks)
+
+    async def _process_batch(self, chunks: list) -> int:
+        """1バッチのチャンクをベクトル化して保存.
+
+        ⚠️ 改善（部分失敗の分離）: 1件の不正な入力でバッチ全体が失敗すると、
+        正常なチャンクまで retry_count が増え、まとめて DLQ に移動してしまう。
+        入力が原因と思われる失敗はバッチを二分して再試行し、
+        原因のチャンクだけを失敗として記録する（正常なチャンクはその場で保存する）。
+
+        Args:
+            chunks: 取得したチャンクのレコード
+
+        Returns:
+            ベクトル化したチャンク数
+        """
+        processed, failures = await self._embed_and_save(chunks)
+
+        # エラーコードごとにまとめて記録する
+        failed: dict[str, tuple[Exception, list[int]]] = {}
+        for chunk, error in failures:
+            error_code = self._classify_error(error)
+            if error_code == "RATE_LIMIT":
+                # ⚠️ 改善（レート制限）: チャンク側の問題ではないため retry_count は増やさず、
+                # バックオフ後に再取得する
+                self._rate_limited = True
+                continue
+            failed.setdefault(error_code, (error, []))[1].append(chunk["id"])
+
+        if self._rate_limited:
+            logger.warning(f"Embedding API rate limited for batch of {len(chunks)}")
+
+        for error_code, (error, chunk_ids) in failed.items():
+            logger.error(
+                f"Embedding failed for {len(chunk_ids)}/{len(chunks)} chunks: "
+                f"{error_code}",
+                exc_info=error,
+            )
+            # Tx2: エラー時の更新（別トランザクション）
+            await self._record_failures(chunk_ids, error)
+
+        if failed and processed == 0:
+            # Embedding API全体の障害とみなし、次のポーリングまで処理を中断する
+            self._last_failed = True
+        return processed
+
+    async def _embed_and_save(self, chunks: list) -> tuple[int, list[tuple]]:
+        """チャンクをベクトル化して保存し、失敗したチャンクを返す.
+
+        入力が原因と思われるエラーの場合は、チャンクを二分して再帰的に再試行する。
+
+        Args:
+            chunks: ベクトル化するチャンクのレコード
+
+        Returns:
+            (保存したチャンク数, (チャンク, エラー) のリスト) のタプル
+        """
+        # No Tx: OpenAI Embedding APIのバッチリクエスト（時間かかる処理）
+        # ⚠️ 重要: この時点ではトランザクションを保持していないため、
+        # 接続プールが枯渇したり、他のクエリをブロックしない
+        texts = [chunk["content"] for chunk in chunks]
+        try:
+            embeddings = await self._generate_embeddings_cached(texts)
+        except Exception as e:
+            error_code = self._classify_error(e)
+            # メトリクス: エラーを記録
+            embedding_errors_counter.labels(error_type=error_code).inc()
+            if len(chunks) == 1 or error_code not in BISECT_ERROR_CODES:
+                return 0, [(chunk, e) for chunk in chunks]
+
+            logger.warning(
+                f"Embedding failed for {len(chunks)} chunks ({error_code}), "
+                "bisecting to isolate the failing chunks"
+            )
+            mid = len(chunks) // 2
+            left, right = await asyncio.gather(
+                self._embed_and_save(chunks[:mid]),
+                self._embed_and_save(chunks[mid:]),
+            )
+            return left[0] + right[0], left[1] + right[1]
+
+        await self._save_embeddings(chunks, embeddings)
+        return len(chunks), []
+
+    async def _save_embeddings(
+        self, chunks: list, embeddings: list[list[float]]
+    ) -> None:
+        """ベクトルをチャンクに保存.
+
+        Args:
+            chunks: チャンクのレコード
+            embeddings: ベクトルのリスト（chunks と同じ順序）
+        """
+        from ...constants import SearchConstants
+
+        vector_cast = SearchConstants.VECTOR_CAST
+        vector_dimension = SearchConstants.VECTOR_DIMENSION
+
+        # Tx2: 結果を UPDATE（別トランザクション）
+        # ⚠️ 重要: APIコールが完了してからトランザクションを開始するため、
+        # トランザクションの保持時間が最小限になる
+        assert self.db.pool is not None, "Database pool must be initialized"
+        async with (
+            self.db.pool.acquire() as conn,
+            conn.transaction(),
+        ):
+            # ⚠️ 改善（パフォーマンス）: executemany のバッチサイズ制御
+            update_data = [
+                (emb, chunk["id"])
+                for emb, chunk in zip(embeddings, chunks, strict=True)
+            ]
+            BATCH_SIZE = settings.kb_chunk_update_batch_size
+
+            for i in range(0, len(update_data), BATCH_SIZE):
+                batch = update_data[i : i + BATCH_SIZE]
+                await conn.executemany(
+                    f"""
+                        UPDATE knowledge_chunks
+                        SET embedding = $1::{vector_cast}({vector_dimension}),
+                            retry_count = 0
+                        WHERE id = $2
+                    """,
+                    batch,
+                )
+
+    async def _generate_embeddings_cached(self, texts: list[str]) -> list[list[float]]:
+        """キャッシュを確認してから、残りのテキストをバッチでベクトル化.
+
+        同じバッチ内で内容が重複するテキストも1回だけベクトル化する。
+
+        Args:
+            texts: ベクトル化するテキストのリスト
+
+        Returns:
+            ベクトルのリスト（texts と同じ順序）
+        """
+        if self.embedding_cache is None:
+            return await self._generate_embeddings_batch(texts)
+
+        model = str(getattr(self.embedding_provider, "model", ""))
+        dimension = self.embedding_provider.get_dimension()
+        keys = [self.embedding_cache.make_key(model, dimension, text) for text in texts]
+        found = await self.embedding_cache.get_many(keys)
+
+        # 内容が重複する場合は最初のテキストをベクトル化する
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            generated = await self._generate_embeddings_batch(list(missing.values()))
+            new_embeddings = dict(zip(missing, generated, strict=True))
+            await self.embedding_cache.put_many(model, dimension, new_embeddings)
+            found.update(new_embeddings)
+
+        if len(missing) < len(texts):
+            logger.debug(
+                f"Embedding cache: {len(texts) - len(missing)}/{len(texts)} reused"
+            )
+        return [found[key] for key in keys]
 
     async def _generate_embedding_with_limit(self, text: str) -> list[float]:
         """セマフォで制限されたEmbedding生成（レート制限対策）.
@@ -339,8 +573,73 @@ class EmbeddingProcessor:
         )
         return embeddings
 
+    async def _record_failures(self, chunk_ids: list[int], error: Exception) -> None:
+        """Embedding に失敗したチャンクの retry_count を増やし、上限に達したものを DLQ に移動.
+
+        ⚠️ 改善（ラウンドトリップ削減）: チャンクごと・ソースごとにクエリを発行すると、
+        Embedding API の障害時に1回の処理が数百回のラウンドトリップになる。
+        retry_count の更新・DLQ への移動・ソースのステータス更新を、
+        それぞれ対象のチャンクをまとめた1つのステートメントで行う。
+
+        Args:
+            chunk_ids: 失敗したチャンクの ID のリスト
+            error: エラーオブジェクト
+        """
+        if not chunk_ids:
+            return
+
+        MAX_RETRY_COUNT = settings.kb_embedding_max_retry
+
+        assert self.db.pool is not None, "Database pool must be initialized"
+        async with (
+            self.db.pool.acquire() as conn,
+            conn.transaction(),
+        ):
+            # retry_countをまとめてインクリメント
+            rows = await conn.fetch(
+                """
+                    UPDATE knowledge_chunks
+                    SET retry_count = COALESCE(retry_count, 0) + 1
+                    WHERE id = ANY($1::bigint[])
+                    RETURNING id, source_id, retry_count
+                """,
+                chunk_ids,
+            )
+
+            # ⚠️ 改善（データ整合性）: リトライ上限に達したチャンクをDLQへ移動
+            exhausted_ids = [
+                row["id"] for row in rows if row["retry_count"] >= MAX_RETRY_COUNT
+            ]
+            if exhausted_ids:
+                await self._move_to_dlq(
+                    cast(asyncpg.Connection, conn), exhausted_ids, error
+                )
+
+            # retry_countが上限に達したチャンクが残っているソースはfailedに
+            # （DLQへの移動に失敗した場合など）
+            source_ids = list({row["source_id"] for row in rows})
+            await conn.execute(
+                """
+                    UPDATE knowledge_sources s
+                    SET status = 'failed',
+                        error_code = $2,
+                        error_message = $3,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE s.id = ANY($1::bigint[])
+                    AND EXISTS (
+                        SELECT 1 FROM knowledge_chunks c
+                        WHERE c.source_id = s.id
+                        AND c.retry_count >= $4
+                    )
+                """,
+                source_ids,
+                "EMBEDDING_MAX_RETRIES_EXCEEDED",
+                f"Embedding failed after {MAX_RETRY_COUNT} retries",
+                MAX_RETRY_COUNT,
+            )
+
     async def _move_to_dlq(
-        self, conn: asyncpg.Connection, chunk: dict, error: Exception
+        self, conn: asyncpg.Connection, chunk_ids: list[int], error: Exception
     ) -> None:
         """チャンクをDead Letter Queueに移動.
 
@@ -355,7 +654,7 @@ class EmbeddingProcessor:
 
         Args:
             conn: データベース接続（トランザクション内）
-            chunk: 移動するチャンク（id, source_id, content を含む）
+            chunk_ids: 移動するチャンクの ID のリスト
             error: エラーオブジェクト（詳細な情報を含む）
         """
         try:
@@ -365,57 +664,41 @@ class EmbeddingProcessor:
 
             # 詳細なスタックトレースはログのみに出力（情報漏洩を防ぐ）
             logger.error(
-                f"Chunk {chunk['id']} moved to DLQ after "
-                f"{chunk.get('retry_count', 0)} retries: {error_code}",
+                f"Chunks {chunk_ids} moved to DLQ after max retries: {error_code}",
                 exc_info=error,  # スタックトレースはログのみ
             )
 
-            # DLQに移動（エラーコードと一般化されたメッセージのみ）
-            source_id = chunk.get("source_id")
-
-            # ⚠️ 改善: source_typeとsource_titleを取得（トレーサビリティ向上）
-            source_info = None
-            if source_id:
-                source_info = await conn.fetchrow(
+            # ⚠️ 重要: セーブポイント内で実行し、失敗しても外側のトランザクションを中断しない
+            async with conn.transaction():
+                # ⚠️ 改善（データ整合性）: 元のチャンクを削除し、削除した行をそのままDLQに登録
+                # source_typeとsource_titleも記録する（トレーサビリティ向上）
+                await conn.execute(
                     """
-                    SELECT type, title FROM knowledge_sources WHERE id = $1
+                    WITH moved AS (
+                        DELETE FROM knowledge_chunks
+                        WHERE id = ANY($1::bigint[])
+                        RETURNING id, source_id, content, retry_count
+                    )
+                    INSERT INTO knowledge_chunks_dlq
+                    (
+                        original_chunk_id, source_id, source_type, source_title,
+                        content, error_code, error_message, retry_count,
+                        last_retry_at
+                    )
+                    SELECT
+                        m.id, m.source_id, s.type, s.title,
+                        m.content, $2, $3, m.retry_count,
+                        CURRENT_TIMESTAMP
+                    FROM moved m
+                    LEFT JOIN knowledge_sources s ON s.id = m.source_id
                 """,
-                    source_id,
+                    chunk_ids,
+                    error_code,
+                    error_message,
                 )
-
-            source_type = source_info["type"] if source_info else None
-            source_title = source_info["title"] if source_info else None
-
-            await conn.execute(
-                """
-                INSERT INTO knowledge_chunks_dlq
-                (
-                    original_chunk_id, source_id, source_type, source_title,
-                    content, error_code, error_message, retry_count,
-                    last_retry_at
-                )
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, CURRENT_TIMESTAMP)
-            """,
-                chunk["id"],
-                source_id,
-                source_type,
-                source_title,
-                chunk["content"],
-                error_code,
-                error_message,
-                chunk.get("retry_count", 0),
-            )
-
-            # ⚠️ 改善（データ整合性）: 元のチャンクを削除（DLQに移動したため、元のテーブルからは削除）
-            await conn.execute(
-                """
-                DELETE FROM knowledge_chunks WHERE id = $1
-            """,
-                chunk["id"],
-            )
         except Exception as e:
             logger.error(
-                f"Failed to move chunk {chunk['id']} to DLQ: {e}",
+                f"Failed to move chunks {chunk_ids} to DLQ: {e}",
                 exc_info=True,
             )
 
@@ -428,9 +711,15 @@ class EmbeddingProcessor:
         Returns:
             エラーコード（例: 'EMBEDDING_API_TIMEOUT', 'RATE_LIMIT', 'UNKNOWN_ERROR'）
         """
+        # OpenAI の例外は型で分類する（エラー本文の 'invalid_request_error' や
+        # 'invalid_api_key' などの文字列に左右されないようにする）
+        for error_type, error_code in OPENAI_ERROR_CODES:
+            if isinstance(error, error_type):
+                return error_code
+
         error_str = str(error).lower()
 
-        # エラータイプとメッセージからエラーコードを分類
+        # その他の例外はメッセージからエラーコードを分類
         if "timeout" in error_str or "timed out" in error_str:
             return "EMBEDDING_API_TIMEOUT"
         elif "rate limit" in error_str or "429" in error_str:
@@ -441,6 +730,8 @@ class EmbeddingProcessor:
             return "PERMISSION_ERROR"
         elif "not found" in error_str or "404" in error_str:
             return "NOT_FOUND"
+        elif "error code: 400" in error_str or "maximum context length" in error_str:
+            return "INVALID_INPUT"
         elif "server error" in error_str or "500" in error_str:
             return "SERVER_ERROR"
         else:
@@ -461,8 +752,10 @@ class EmbeddingProcessor:
         error_messages = {
             "EMBEDDING_API_TIMEOUT": "Embedding API request timed out",
             "RATE_LIMIT": "Rate limit exceeded",
+            "INVALID_INPUT": "Invalid input for embedding",
             "AUTHENTICATION_ERROR": "Authentication failed",
             "PERMISSION_ERROR": "Permission denied",
+            "CONNECTION_ERROR": "Connection to embedding API failed",
             "NOT_FOUND": "Resource not found",
             "SERVER_ERROR": "Server error occurred",
             "UNKNOWN_ERROR": "An error occurred during processing",
@@ -476,51 +769,58 @@ class EmbeddingProcessor:
         ⚠️ 改善（データ整合性）: knowledge_sources と knowledge_chunks の整合性リスクを改善
         - retry_count >= MAX_RETRY のチャンクが存在する場合の扱いを明確化
         - DLQに移動したチャンクがある場合は 'partial' ステータスを設定
+
+        ⚠️ 改善（ラウンドトリップ削減）: ソースごとに COUNT(*) を2回と UPDATE を発行すると、
+        小さなセッションが多いバッチではDBコストの大半を占める。
+        対象ソースの pending 数と DLQ 数をまとめて集計し、1つのステートメントで更新する。
         """
-        source_ids = {chunk["source_id"] for chunk in processed_chunks}
+        source_ids = list({chunk["source_id"] for chunk in processed_chunks})
+        if not source_ids:
+            return
+
+        MAX_RETRY_COUNT = settings.kb_embedding_max_retry
 
         assert self.db.pool is not None, "Database pool must be initialized"
         async with self.db.pool.acquire() as conn:
-            for source_id in source_ids:
-                MAX_RETRY_COUNT = settings.kb_embedding_max_retry
-
-                # ⚠️ 改善: 完了判定: embedding が NULL で、かつリトライ上限未達のチャンクがないこと
-                pending_count = await conn.fetchval(
-                    """
-                    SELECT COUNT(*) FROM knowledge_chunks
-                    WHERE source_id = $1
+            # ⚠️ 改善: 完了判定: embedding が NULL で、かつリトライ上限未達のチャンクがないこと
+            # ⚠️ 改善: DLQに移動したチャンクがある場合は 'partial'、ない場合は 'completed'
+            updated = await conn.fetch(
+                """
+                WITH pending AS (
+                    SELECT source_id, COUNT(*) AS pending_count
+                    FROM knowledge_chunks
+                    WHERE source_id = ANY($1::bigint[])
                       AND embedding IS NULL
                       AND retry_count < $2
-                """,
-                    source_id,
-                    MAX_RETRY_COUNT,
-                )
-
-                # ⚠️ 改善: DLQ行きのチャンク数も確認
-                dlq_count = await conn.fetchval(
-                    """
-                    SELECT COUNT(*) FROM knowledge_chunks_dlq
-                    WHERE source_id = $1
-                """,
-                    source_id,
+                    GROUP BY source_id
+                ),
+                dlq AS (
+                    SELECT source_id, COUNT(*) AS dlq_count
+                    FROM knowledge_chunks_dlq
+                    WHERE source_id = ANY($1::bigint[])
+                    GROUP BY source_id
                 )
+                UPDATE knowledge_sources s
+                SET status = (
+                        CASE
+                            WHEN EXISTS (SELECT 1 FROM dlq WHERE dlq.source_id = s.id)
+                            THEN 'partial'
+                            ELSE 'completed'
+                        END
+                    )::source_status_enum,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE s.id = ANY($1::bigint[])
+                  AND NOT EXISTS (
+                      SELECT 1 FROM pending WHERE pending.source_id = s.id
+                  )
+                RETURNING s.id, s.status
+            """,
+                source_ids,
+                MAX_RETRY_COUNT,
+            )
 
-                if pending_count == 0:
-                    # ⚠️ 改善: DLQに移動したチャンクがある場合は 'partial'、ない場合は 'completed'
-                    new_status = "partial" if dlq_count > 0 else "completed"
-                    await conn.execute(
-                        """
-                        UPDATE knowledge_sources
-                        SET status = $1, updated_at = CURRENT_TIMESTAMP
-                        WHERE id = $2
-                    """,
-                        new_status,
-                        source_id,
-                    )
-                    logger.debug(
-                        f"Source {source_id} marked as {new_status} "
-                        f"(pending: {pending_count}, dlq: {dlq_count})"
-                    )
+        for row in updated:
+            logger.debug(f"Source {row['id']} marked as {row['status']}")
 
     def start(self):
         """バックグラウンドタスクを開始（動的に間隔を設定）."""
@@ -533,6 +833,9 @@ class EmbeddingProcessor:
         self.process_pending_embeddings.change_interval(minutes=self._interval)
         logger.debug(f"Changed interval to {self._interval} minutes")
         self.process_pending_embeddings.start()
+        if settings.kb_embedding_listen_notify and self._listener_task is None:
+            # チャンク登録の通知で、ポーリングを待たずに処理を開始する
+            self._listener_task = asyncio.create_task(self._listen_for_chunks())
         logger.info("Embedding processor task started successfully")
         logger.debug(f"Task running: {self.process_pending_embeddings.is_running()}")
 
@@ -543,6 +846,16 @@ class EmbeddingProcessor:
         # タスクをキャンセル
         self.process_pending_embeddings.cancel()
 
+        # 通知の待ち受けと、通知で起動した処理をキャンセル
+        pending = list(self._tasks)
+        if self._listener_task is not None:
+            pending.append(self._listener_task)
+            self._listener_task = None
+        for background_task in pending:
+            background_task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
         # 処理中のタスクが完了するまで待機
         try:
             # タスクが存在する場合、完了を待つ
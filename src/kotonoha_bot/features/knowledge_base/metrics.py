@@ -9,6 +9,12 @@ embedding_processing_duration = Histogram(
     buckets=[0.1, 0.5, 1.0, 2.0, 5.0, 10.0],  # バケット設定
 )
 
+embedding_chunk_processing_duration = Histogram(
+    "embedding_chunk_processing_seconds",
+    "Time spent processing embeddings per chunk (batch time / batch size)",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0],  # バケット設定
+)
+
 pending_chunks_gauge = Gauge(
     "pending_chunks_count",
     "Number of chunks waiting for embedding",
@@ -25,6 +31,23 @@ embedding_processed_counter = Counter(
     "Total embeddings processed successfully",
 )
 
+embedding_cache_requests_counter = Counter(
+    "embedding_cache_requests_total",
+    "Total embedding cache lookups per chunk",
+    ["result"],  # 'hit', 'store_hit', 'miss'でラベル付け
+)
+
+embedding_concurrency_gauge = Gauge(
+    "embedding_concurrency",
+    "Number of embedding batches processed concurrently (reduced on rate limits)",
+)
+
+embedding_backoff_seconds = Histogram(
+    "embedding_backoff_seconds",
+    "Time the embedding pipeline waited after a rate limit",
+    buckets=[1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 120.0],  # バケット設定
+)
+
 # データベースのメトリクス
 db_query_duration = Histogram(
     "db_query_duration_seconds",
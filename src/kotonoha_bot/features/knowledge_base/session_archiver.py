@@ -6,6 +6,8 @@ import time
 from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
+import asyncpg
+import orjson
 import structlog
 import tiktoken
 from discord.ext import tasks
@@ -89,14 +91,22 @@ class SessionArchiver:
                     async with self.db.pool.acquire() as conn:
                         inactive_sessions = await conn.fetch(
                             """
-                            SELECT id, session_key, session_type, messages,
-                                   guild_id, channel_id, thread_id,
-                                   user_id, last_active_at, version,
-                                   last_archived_message_index
-                            FROM sessions
-                            WHERE status = 'active'
-                            AND last_active_at < $1
-                            ORDER BY last_active_at ASC
+                            SELECT s.id, s.session_key, s.session_type,
+                                   s.messages || COALESCE(
+                                       (
+                                           SELECT jsonb_agg(m.message ORDER BY m.id)
+                                           FROM session_messages m
+                                           WHERE m.session_key = s.session_key
+                                       ),
+                                       '[]'::jsonb
+                                   ) AS messages,
+                                   s.guild_id, s.channel_id, s.thread_id,
+                                   s.user_id, s.last_active_at, s.version,
+                                   s.last_archived_message_index
+                            FROM sessions s
+                            WHERE s.status = 'active'
+                            AND s.last_active_at < $1
+                            ORDER BY s.last_active_at ASC
                             LIMIT $2
                         """,
                             threshold_time,
@@ -327,6 +337,7 @@ class SessionArchiver:
         # メタデータを構築
         session_id = session_row.get("id")
         metadata = {
+            "guild_id": session_row.get("guild_id"),
             "channel_id": session_row.get("channel_id"),
             "thread_id": session_row.get("thread_id"),
             "user_id": session_row.get("user_id"),
@@ -345,39 +356,30 @@ class SessionArchiver:
             conn.transaction(isolation="repeatable_read"),
         ):
             # 1. knowledge_sources に登録（status='pending'）
+            # 検索のフィルタ用カラム（channel_id, guild_id, author_id）も登録する
             source_id = await conn.fetchval(
                 """
-                    INSERT INTO knowledge_sources (type, title, uri, metadata, status)
-                    VALUES ($1, $2, $3, $4::jsonb, 'pending')
+                    INSERT INTO knowledge_sources
+                    (
+                        type, title, uri, metadata, status,
+                        channel_id, guild_id, author_id
+                    )
+                    VALUES ($1, $2, $3, $4::jsonb, 'pending', $5, $6, $7)
                     RETURNING id
                 """,
                 "discord_session",
                 title,
                 uri,
                 metadata,
+                session_row.get("channel_id"),
+                session_row.get("guild_id"),
+                session_row.get("user_id"),
             )
 
-            # 2. knowledge_chunks に登録（複数チャンクに対応）
-            for i, chunk_content in enumerate(chunks):
-                chunk_token_count = len(encoding.encode(chunk_content))
-                location = {
-                    "url": uri,
-                    "label": f"チャンク {i + 1}/{len(chunks)}",
-                    "session_key": session_key,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                }
-                await conn.execute(
-                    """
-                        INSERT INTO knowledge_chunks
-                        (source_id, content, embedding, location, token_count)
-                        VALUES ($1, $2, NULL, $3::jsonb, $4)
-                    """,
-                    source_id,
-                    chunk_content,
-                    location,
-                    chunk_token_count,
-                )
+            # 2. knowledge_chunks に登録（複数チャンクをまとめて INSERT）
+            await self._insert_chunks(
+                conn, source_id, chunks, uri, session_key, encoding
+            )
 
             # アーカイブ済み地点を記録（将来の差分アーカイブ用）
             archived_message_count = len(messages)
@@ -427,7 +429,12 @@ class SessionArchiver:
                         UPDATE sessions
                         SET status = 'archived',
                             messages = $3::jsonb,
+                            message_count = jsonb_array_length($3::jsonb),
                             last_archived_message_index = $4,
+                            -- 要約済みの位置を、削除したメッセージ数だけ前にずらす
+                            summary_message_index = GREATEST(
+                                summary_message_index - $5, 0
+                            ),
                             version = version + 1
                         WHERE session_key = $1
                         AND status = 'active'
@@ -437,6 +444,7 @@ class SessionArchiver:
                     original_version,
                     overlap_messages,
                     reset_index,
+                    len(messages) - len(overlap_messages),
                 )
             else:
                 # 一部のみアーカイブ済みの場合
@@ -453,7 +461,12 @@ class SessionArchiver:
                     """
                         UPDATE sessions
                         SET messages = $3::jsonb,
+                            message_count = jsonb_array_length($3::jsonb),
                             last_archived_message_index = $4,
+                            -- 要約済みの位置を、削除したメッセージ数だけ前にずらす
+                            summary_message_index = GREATEST(
+                                summary_message_index - $5, 0
+                            ),
                             version = version + 1
                         WHERE session_key = $1
                         AND status = 'active'
@@ -463,6 +476,7 @@ class SessionArchiver:
                     original_version,
                     overlap_messages,
                     reset_index,
+                    len(messages) - len(overlap_messages),
                 )
 
             # asyncpgのexecuteは "UPDATE N" 形式の文字列を返す
@@ -477,12 +491,83 @@ class SessionArchiver:
                     f"archiving aborted to prevent duplicate"
                 )
 
+            # のりしろを sessions.messages に畳み込んだため、追記ログは不要になる
+            await conn.execute(
+                "DELETE FROM session_messages WHERE session_key = $1",
+                session_key,
+            )
+
         # トランザクションが正常にコミットされた場合のみ、このログが出力されます
         logger.info(
             f"Archived session {session_key} as knowledge source {source_id} "
             f"({len(chunks)} chunks)"
         )
 
+    async def _insert_chunks(
+        self,
+        conn: asyncpg.Connection,
+        source_id: int,
+        chunks: list[str],
+        uri: str | None,
+        session_key: str,
+        encoding: tiktoken.Encoding,
+    ) -> list[int]:
+        """チャンクを knowledge_chunks にまとめて登録.
+
+        ⚠️ 改善（ラウンドトリップ削減）: 1チャンクごとに INSERT を発行すると、
+        長いセッションのバックフィルではラウンドトリップが支配的になる。
+        kb_chunk_insert_batch_size 件ずつ unnest した配列から複数行を1回で INSERT する。
+
+        Args:
+            conn: トランザクション中のコネクション
+            source_id: 知識ソースの ID
+            chunks: チャンクの本文のリスト
+            uri: 知識ソースの URI
+            session_key: セッションキー
+            encoding: トークン数の計算に使うエンコーディング
+
+        Returns:
+            登録したチャンクの ID のリスト（chunks と同じ順序）
+        """
+        batch_size = max(1, settings.kb_chunk_insert_batch_size)
+        chunk_ids: list[int] = []
+
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start : start + batch_size]
+            locations = [
+                orjson.dumps(
+                    {
+                        "url": uri,
+                        "label": f"チャンク {i + 1}/{len(chunks)}",
+                        "session_key": session_key,
+                        "chunk_index": i,
+                        "total_chunks": len(chunks),
+                    }
+                ).decode("utf-8")
+                for i in range(start, start + len(batch))
+            ]
+            token_counts = [len(encoding.encode(content)) for content in batch]
+
+            # WITH ORDINALITY の順に INSERT し、RETURNING の ID を入力順に並べる
+            rows = await conn.fetch(
+                """
+                    INSERT INTO knowledge_chunks
+                    (source_id, content, embedding, location, token_count)
+                    SELECT $1, c.content, NULL, c.location::jsonb, c.token_count
+                    FROM unnest($2::text[], $3::text[], $4::int[])
+                        WITH ORDINALITY AS c(content, location, token_count, ord)
+                    ORDER BY c.ord
+                    RETURNING id
+                """,
+                source_id,
+                batch,
+                locations,
+                token_counts,
+            )
+            chunk_ids.extend(sorted(row["id"] for row in rows))
+
+        return chunk_ids
+
     def _should_archive_session(self, messages: list[dict]) -> bool:
         """セッションをアーカイブすべきか判定（フィルタリング）."""
         # 文字数チェック
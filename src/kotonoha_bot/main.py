@@ -282,6 +282,7 @@ async def async_main() -> None:
         session_archiver=session_archiver,
         db=db,  # DBインスタンスを共有（Alembicマイグレーションの重複を防ぐ）
         config=config,
+        embedding_provider=embedding_provider,  # 知識ベース検索（RAG）用
     )
     logger.debug("Event handlers setup completed")
     logger.info("Event handlers set up")
@@ -398,6 +399,14 @@ async def shutdown_gracefully(
         # ヘルスチェックサーバーを停止
         health_server.stop()
 
+        # 待機中の聞き耳型の判定を取り消す（新しい応答を始めない）
+        await handler.eavesdrop.close()
+
+        # 実行中の要約タスクの完了を待ってからセッションを保存する
+        # （要約の結果がセッションに反映される前に保存しないため）
+        if handler.summarizer is not None:
+            await handler.summarizer.close()
+
         # セッションを保存
         await handler.session_manager.save_all_sessions()
 
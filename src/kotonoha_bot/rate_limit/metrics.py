@@ -0,0 +1,21 @@
+"""リクエストキューのメトリクス収集（Prometheus）."""
+
+from prometheus_client import Gauge, Histogram
+
+request_queue_depth = Gauge(
+    "request_queue_depth",
+    "Number of requests waiting in the request queue",
+    ["priority"],  # 'THREAD', 'MENTION', 'EAVESDROP'でラベル付け
+)
+
+request_queue_in_flight = Gauge(
+    "request_queue_in_flight",
+    "Number of requests currently being processed",
+)
+
+request_queue_wait_duration = Histogram(
+    "request_queue_wait_seconds",
+    "Time requests spend waiting in the request queue",
+    ["priority"],  # 'THREAD', 'MENTION', 'EAVESDROP'でラベル付け
+    buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0],  # バケット設定
+)
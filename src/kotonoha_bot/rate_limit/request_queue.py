@@ -1,12 +1,22 @@
 """リクエストキュー."""
 
 import asyncio
+import heapq
+import itertools
 import logging
+import time
+from collections import deque
 from collections.abc import Callable
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import IntEnum
 
+from .metrics import (
+    request_queue_depth,
+    request_queue_in_flight,
+    request_queue_wait_duration,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,25 +38,52 @@ class QueuedRequest:
     kwargs: dict = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.now)
     future: asyncio.Future | None = None
+    order_key: str | None = None
+    enqueued_at: float = field(default_factory=time.monotonic)
 
 
 class RequestQueue:
-    """リクエストキュー.
+    """リクエストキュー（スケジューラー）.
 
-    リクエストを優先度順に処理するキュー。
+    リクエストを優先度順に、最大 max_concurrency 件まで並行して処理する。
+    同じ order_key（セッションやチャンネル）のリクエストは到着順に1件ずつ処理し、
+    異なる order_key のリクエストは並行して処理する（あるセッションの LLM 呼び出しが
+    他のセッションの応答を待たせないようにする）。
     """
 
-    def __init__(self, max_size: int = 100):
+    def __init__(self, max_size: int = 100, max_concurrency: int = 1):
         """初期化.
 
         Args:
-            max_size: キューの最大サイズ
+            max_size: キューの最大サイズ（処理待ちのリクエスト数）
+            max_concurrency: 同時に処理するリクエストの最大数
         """
         self.max_size = max_size
-        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=max_size)
+        self.max_concurrency = max(1, max_concurrency)
+        # 実行可能なリクエスト（order_key ごとの先頭のみ）
+        # 要素: (-priority, 作成順, request)
+        self._ready: list[tuple[int, int, QueuedRequest]] = []
+        # order_key ごとの後続リクエスト（先頭の処理中・待機中に到着したもの）
+        self._waiting: dict[str, deque[QueuedRequest]] = {}
+        # 処理中または実行可能キューにある order_key
+        self._active_keys: set[str] = set()
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
         self._worker_task: asyncio.Task | None = None
         self._running = False
 
+    @property
+    def pending_count(self) -> int:
+        """処理待ちのリクエスト数."""
+        return self._pending
+
+    @property
+    def in_flight_count(self) -> int:
+        """処理中のリクエスト数."""
+        return len(self._tasks)
+
     async def start(self) -> None:
         """ワーカーを開始."""
         if self._running:
@@ -54,16 +91,21 @@ class RequestQueue:
 
         self._running = True
         self._worker_task = asyncio.create_task(self._worker())
-        logger.info("Request queue worker started")
+        logger.info(
+            f"Request queue worker started (max_concurrency={self.max_concurrency})"
+        )
 
     async def stop(self) -> None:
-        """ワーカーを停止."""
+        """ワーカーを停止（処理中のリクエストの完了を待つ）."""
         if not self._running:
             return
 
         self._running = False
+        self._wakeup.set()
         if self._worker_task:
             await self._worker_task
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
         logger.info("Request queue worker stopped")
 
     async def enqueue(
@@ -71,6 +113,7 @@ class RequestQueue:
         priority: RequestPriority,
         func: Callable,
         *args,
+        order_key: str | None = None,
         **kwargs,
     ) -> asyncio.Future:
         """リクエストをキューに追加.
@@ -79,55 +122,126 @@ class RequestQueue:
             priority: リクエストの優先度
             func: 実行する関数
             *args: 関数の引数
+            order_key: 順序を保証する単位のキー（セッションキーなど、
+                None の場合は他のリクエストと順序を保証しない）
             **kwargs: 関数のキーワード引数
 
         Returns:
             リクエストの結果を取得する Future
+
+        Raises:
+            RuntimeError: キューが満杯の場合
         """
-        # キューのサイズをチェック（処理中のリクエストも含む）
-        # 注意: qsize()は概算値のため、正確ではない可能性がある
-        if self._queue.qsize() >= self.max_size:
+        if self._pending >= self.max_size:
             raise RuntimeError(f"Queue is full (max size: {self.max_size})")
 
-        future = asyncio.Future()
+        future = asyncio.get_running_loop().create_future()
         request = QueuedRequest(
             priority=priority,
             func=func,
             args=args,
             kwargs=kwargs,
             future=future,
+            order_key=order_key,
         )
+        self._pending += 1
+        request_queue_depth.labels(priority=priority.name).inc()
 
-        # 優先度は高いほど先に処理される（負の値でソート）
-        # 同じ優先度の場合は、作成時刻でソート（古い順）
-        # タプルの比較: (-priority.value, created_at, request)
-        # これにより、同じ優先度でも比較可能になる
-        await self._queue.put((-priority.value, request.created_at, request))
-        logger.debug(f"Enqueued request with priority {priority.name}")
+        if order_key is not None and order_key in self._active_keys:
+            # 同じキーの先行リクエストが終わるまで待機（到着順を保証）
+            self._waiting.setdefault(order_key, deque()).append(request)
+        else:
+            self._push_ready(request)
 
+        logger.debug(
+            f"Enqueued request with priority {priority.name} (key={order_key})"
+        )
         return future
 
+    def _push_ready(self, request: QueuedRequest) -> None:
+        """リクエストを実行可能キューに追加.
+
+        優先度は高いほど先に処理され、同じ優先度の場合は追加順に処理される。
+
+        Args:
+            request: リクエスト
+        """
+        if request.order_key is not None:
+            self._active_keys.add(request.order_key)
+        heapq.heappush(
+            self._ready, (-request.priority.value, next(self._sequence), request)
+        )
+        self._wakeup.set()
+
     async def _worker(self) -> None:
-        """ワーカーループ."""
+        """ワーカーループ（空きがある限り実行可能なリクエストを開始する）."""
         while self._running:
             try:
-                # キューからリクエストを取得（タイムアウト: 1秒）
-                try:
-                    _, _, request = await asyncio.wait_for(
-                        self._queue.get(), timeout=1.0
-                    )
-                except TimeoutError:
-                    continue
-
-                # リクエストを実行
-                try:
-                    result = await request.func(*request.args, **request.kwargs)
-                    if request.future and not request.future.done():
-                        request.future.set_result(result)
-                except Exception as e:
-                    logger.exception(f"Error executing queued request: {e}")
-                    if request.future and not request.future.done():
-                        request.future.set_exception(e)
+                await self._wakeup.wait()
+                self._wakeup.clear()
+
+                while (
+                    self._running
+                    and self._ready
+                    and len(self._tasks) < self.max_concurrency
+                ):
+                    _, _, request = heapq.heappop(self._ready)
+                    self._start(request)
 
             except Exception as e:
                 logger.exception(f"Error in request queue worker: {e}")
+
+    def _start(self, request: QueuedRequest) -> None:
+        """リクエストの実行を開始.
+
+        Args:
+            request: リクエスト
+        """
+        self._pending -= 1
+        priority = request.priority.name
+        request_queue_depth.labels(priority=priority).dec()
+        request_queue_wait_duration.labels(priority=priority).observe(
+            time.monotonic() - request.enqueued_at
+        )
+        request_queue_in_flight.inc()
+
+        task = asyncio.create_task(self._run(request))
+        self._tasks.add(task)
+        task.add_done_callback(lambda t: self._on_done(t, request))
+
+    async def _run(self, request: QueuedRequest) -> None:
+        """リクエストを実行し、結果を Future に設定.
+
+        Args:
+            request: リクエスト
+        """
+        try:
+            result = await request.func(*request.args, **request.kwargs)
+            if request.future and not request.future.done():
+                request.future.set_result(result)
+        except Exception as e:
+            logger.exception(f"Error executing queued request: {e}")
+            if request.future and not request.future.done():
+                request.future.set_exception(e)
+
+    def _on_done(self, task: asyncio.Task, request: QueuedRequest) -> None:
+        """リクエストの完了処理（同じキーの次のリクエストを実行可能にする）.
+
+        Args:
+            task: 完了したタスク
+            request: 完了したリクエスト
+        """
+        self._tasks.discard(task)
+        request_queue_in_flight.dec()
+
+        key = request.order_key
+        if key is not None:
+            waiting = self._waiting.get(key)
+            if waiting:
+                self._push_ready(waiting.popleft())
+                if not waiting:
+                    del self._waiting[key]
+            else:
+                self._active_keys.discard(key)
+
+        self._wakeup.set()
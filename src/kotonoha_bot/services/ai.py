@@ -5,7 +5,9 @@ Handler層が具体的なライブラリの例外を知らないように、独
 """
 
 import logging
+import time
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 
 import anthropic
@@ -25,6 +27,9 @@ from ..errors.ai import (
 )
 from ..rate_limit.monitor import RateLimitMonitor
 from ..rate_limit.token_bucket import TokenBucket
+from ..utils.prompts import DEFAULT_SYSTEM_PROMPT
+from .context_window import ContextWindowBuilder
+from .metrics import llm_cache_tokens_counter
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +44,9 @@ class TokenInfo:
         total_tokens: 合計トークン数
         model_used: 使用したモデル名
         latency_ms: レイテンシ（ミリ秒）
+        trimmed_tokens: トークン予算に収めるために削った会話履歴のトークン数（概算）
+        cache_read_input_tokens: プロンプトキャッシュから読み込んだ入力トークン数
+        cache_creation_input_tokens: プロンプトキャッシュに書き込んだ入力トークン数
 
     Note:
         将来的に services/types.py に移動する可能性があります。
@@ -51,16 +59,36 @@ class TokenInfo:
     total_tokens: int
     model_used: str
     latency_ms: int
+    trimmed_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
 
     def __str__(self) -> str:
         """ログ用の文字列表現."""
         return (
             f"TokenInfo(model={self.model_used}, "
             f"input={self.input_tokens}, output={self.output_tokens}, "
-            f"total={self.total_tokens}, latency={self.latency_ms}ms)"
+            f"total={self.total_tokens}, latency={self.latency_ms}ms, "
+            f"trimmed={self.trimmed_tokens}, "
+            f"cache_read={self.cache_read_input_tokens}, "
+            f"cache_write={self.cache_creation_input_tokens})"
         )
 
 
+def _usage_tokens(usage: object, name: str) -> int:
+    """レスポンスの usage からトークン数を取得（未対応・未設定の場合は 0）.
+
+    Args:
+        usage: Anthropic SDK のレスポンスの usage
+        name: 属性名
+
+    Returns:
+        トークン数
+    """
+    value = getattr(usage, name, None)
+    return value if isinstance(value, int) else 0
+
+
 class AIProvider(ABC):
     """AI Providerの抽象クラス."""
 
@@ -90,6 +118,38 @@ class AIProvider(ABC):
         """
         pass
 
+    async def stream_response(
+        self,
+        messages: list[Message],
+        system_prompt: str | None = None,
+        model: str | None = None,
+        max_tokens: int | None = None,
+    ) -> AsyncIterator[str | TokenInfo]:
+        """応答をストリーミングで生成.
+
+        ストリーミングに対応していないプロバイダーでは、
+        generate_response の応答をまとめて1回で返す。
+
+        Args:
+            messages: 会話履歴
+            system_prompt: システムプロンプト
+            model: 使用するモデル（オプション）
+            max_tokens: 最大トークン数（オプション）
+
+        Yields:
+            応答テキストの差分。最後にトークン使用情報(TokenInfo)を返す。
+
+        Raises:
+            AIAuthenticationError: APIキーが無効な場合
+            AIRateLimitError: リトライ上限を超えてレート制限にかかった場合
+            AIServiceError: AIサービスで予期しないエラーが発生した場合
+        """
+        text, token_info = await self.generate_response(
+            messages, system_prompt=system_prompt, model=model, max_tokens=max_tokens
+        )
+        yield text
+        yield token_info
+
     @abstractmethod
     def get_last_used_model(self) -> str:
         """最後に使用したモデル名を取得.
@@ -163,6 +223,11 @@ class AnthropicProvider(AIProvider):
             "claude-api", limit=50, window_seconds=60
         )
 
+        # 会話履歴のトークン予算（古い履歴から削って予算内に収める）
+        self.context_builder = ContextWindowBuilder(
+            max_tokens=self.config.LLM_CONTEXT_MAX_TOKENS
+        )
+
         # 最後に使用したモデル名を追跡
         self._last_used_model: str | None = None
 
@@ -214,10 +279,127 @@ class AnthropicProvider(AIProvider):
             メソッド内で例外をラッピングしてから raise することで、
             Tenacity が正しくリトライを実行します。
         """
-        import time
+        start_time = time.time()
+        request, trimmed_tokens = await self._prepare_request(
+            messages, system_prompt, model, max_tokens
+        )
+
+        try:
+            # APIリクエスト
+            response = await self.client.messages.create(**request)
+
+            # レスポンスからテキストを取得
+            if not response.content or len(response.content) == 0:
+                raise AIServiceError("No content in response")
 
+            # Anthropic SDK のレスポンス形式に合わせて処理
+            result_text = ""
+            for content_block in response.content:
+                if content_block.type == "text":
+                    result_text += content_block.text
+
+            if not result_text:
+                raise AIServiceError("Empty response content")
+
+            token_info = self._build_token_info(
+                response, start_time, trimmed_tokens, request["model"]
+            )
+            logger.info(
+                f"Generated response: {len(result_text)} chars, "
+                f"tokens: input={token_info.input_tokens}, "
+                f"output={token_info.output_tokens}, "
+                f"trimmed={token_info.trimmed_tokens}, "
+                f"cache_read={token_info.cache_read_input_tokens}, "
+                f"cache_write={token_info.cache_creation_input_tokens}, "
+                f"latency={token_info.latency_ms}ms"
+            )
+
+            return result_text, token_info
+
+        except Exception as e:
+            raise self._wrap_api_error(e) from e
+
+    async def stream_response(
+        self,
+        messages: list[Message],
+        system_prompt: str | None = None,
+        model: str | None = None,
+        max_tokens: int | None = None,
+    ) -> AsyncIterator[str | TokenInfo]:
+        """Anthropic SDK のストリーミング API で応答を生成する.
+
+        途中まで出力した応答を重複させないため、generate_response と異なり
+        自動リトライは行わない。
+
+        Args:
+            messages: 会話履歴
+            system_prompt: システムプロンプト（省略可）
+            model: 使用するモデル名（省略可、デフォルトモデルを使用）
+            max_tokens: 最大トークン数（省略可、デフォルト値を使用）
+
+        Yields:
+            応答テキストの差分。最後にトークン使用情報(TokenInfo)を返す。
+
+        Raises:
+            AIAuthenticationError: APIキーが無効な場合
+            AIRateLimitError: レート制限にかかった場合
+            AIServiceError: AIサービスで予期しないエラーが発生した場合
+        """
         start_time = time.time()
+        request, trimmed_tokens = await self._prepare_request(
+            messages, system_prompt, model, max_tokens
+        )
+
+        try:
+            output_chars = 0
+            async with self.client.messages.stream(**request) as stream:
+                async for text in stream.text_stream:
+                    if text:
+                        output_chars += len(text)
+                        yield text
+                response = await stream.get_final_message()
+
+            if output_chars == 0:
+                raise AIServiceError("Empty response content")
+
+            token_info = self._build_token_info(
+                response, start_time, trimmed_tokens, request["model"]
+            )
+            logger.info(
+                f"Streamed response: {output_chars} chars, "
+                f"tokens: input={token_info.input_tokens}, "
+                f"output={token_info.output_tokens}, "
+                f"trimmed={token_info.trimmed_tokens}, "
+                f"cache_read={token_info.cache_read_input_tokens}, "
+                f"cache_write={token_info.cache_creation_input_tokens}, "
+                f"latency={token_info.latency_ms}ms"
+            )
+            yield token_info
+
+        except Exception as e:
+            raise self._wrap_api_error(e) from e
+
+    async def _prepare_request(
+        self,
+        messages: list[Message],
+        system_prompt: str | None,
+        model: str | None,
+        max_tokens: int | None,
+    ) -> tuple[dict, int]:
+        """レート制限を確認し、Anthropic SDK へのリクエスト引数を組み立てる.
+
+        Args:
+            messages: 会話履歴
+            system_prompt: システムプロンプト
+            model: 使用するモデル名
+            max_tokens: 最大トークン数
 
+        Returns:
+            (リクエスト引数, 削った会話履歴のトークン数) のタプル
+
+        Raises:
+            AIRateLimitError: トークンバケットからトークンを取得できなかった場合
+        """
         # レート制限チェックとトークン取得
         endpoint = "claude-api"
         self.rate_limit_monitor.record_request(endpoint)
@@ -227,8 +409,16 @@ class AnthropicProvider(AIProvider):
         if not await self.token_bucket.wait_for_tokens(tokens=1, timeout=30.0):
             raise AIRateLimitError("Rate limit: Could not acquire token within timeout")
 
+        # 会話履歴をトークン予算内に収める（古い履歴から削る）
+        messages, trimmed_tokens = self.context_builder.fit(messages, system_prompt)
+
         # Anthropic SDK 用のメッセージ形式に変換
         anthropic_messages = self._convert_messages(messages, system_prompt)
+        system: str | list[dict] | None = system_prompt
+        if self.config.LLM_PROMPT_CACHING_ENABLED:
+            system, anthropic_messages = self._apply_cache_control(
+                system_prompt, anthropic_messages
+            )
 
         # 使用するモデルを決定（LiteLLM の形式から Anthropic SDK の形式に変換）
         use_model = self._convert_model_name(model or self.model)
@@ -237,72 +427,93 @@ class AnthropicProvider(AIProvider):
         # 最後に使用したモデル名を保存
         self._last_used_model = use_model
 
-        try:
-            # APIリクエスト
-            response = await self.client.messages.create(
-                model=use_model,
-                max_tokens=use_max_tokens,
-                temperature=self.config.LLM_TEMPERATURE,
-                system=system_prompt,
-                messages=anthropic_messages,
-            )
+        request = {
+            "model": use_model,
+            "max_tokens": use_max_tokens,
+            "temperature": self.config.LLM_TEMPERATURE,
+            "system": system,
+            "messages": anthropic_messages,
+        }
+        return request, trimmed_tokens
 
-            # レスポンスからテキストを取得
-            if not response.content or len(response.content) == 0:
-                raise AIServiceError("No content in response")
+    def _build_token_info(
+        self,
+        response: anthropic.types.Message,
+        start_time: float,
+        trimmed_tokens: int,
+        use_model: str,
+    ) -> TokenInfo:
+        """レスポンスからトークン使用情報を構築し、キャッシュのメトリクスを記録する.
 
-            # Anthropic SDK のレスポンス形式に合わせて処理
-            result_text = ""
-            for content_block in response.content:
-                if content_block.type == "text":
-                    result_text += content_block.text
+        Args:
+            response: Anthropic SDK のレスポンス
+            start_time: リクエスト開始時刻（time.time()）
+            trimmed_tokens: 削った会話履歴のトークン数
+            use_model: リクエストしたモデル名
 
-            if not result_text:
-                raise AIServiceError("Empty response content")
+        Returns:
+            トークン使用情報
+        """
+        # レイテンシを計算
+        latency_ms = int((time.time() - start_time) * 1000)
 
-            # レイテンシを計算
-            latency_ms = int((time.time() - start_time) * 1000)
+        # input_tokens にはキャッシュから読み書きしたトークン数は含まれない
+        cache_read_tokens = _usage_tokens(response.usage, "cache_read_input_tokens")
+        cache_creation_tokens = _usage_tokens(
+            response.usage, "cache_creation_input_tokens"
+        )
+        llm_cache_tokens_counter.labels(model=use_model, operation="read").inc(
+            cache_read_tokens
+        )
+        llm_cache_tokens_counter.labels(model=use_model, operation="write").inc(
+            cache_creation_tokens
+        )
 
-            # TokenInfo を構築
-            token_info = TokenInfo(
-                input_tokens=response.usage.input_tokens,
-                output_tokens=response.usage.output_tokens,
-                total_tokens=response.usage.input_tokens + response.usage.output_tokens,
-                model_used=response.model,
-                latency_ms=latency_ms,
-            )
+        return TokenInfo(
+            input_tokens=response.usage.input_tokens,
+            output_tokens=response.usage.output_tokens,
+            total_tokens=(
+                response.usage.input_tokens
+                + response.usage.output_tokens
+                + cache_read_tokens
+                + cache_creation_tokens
+            ),
+            model_used=response.model,
+            latency_ms=latency_ms,
+            trimmed_tokens=trimmed_tokens,
+            cache_read_input_tokens=cache_read_tokens,
+            cache_creation_input_tokens=cache_creation_tokens,
+        )
 
-            logger.info(
-                f"Generated response: {len(result_text)} chars, "
-                f"tokens: input={token_info.input_tokens}, "
-                f"output={token_info.output_tokens}, "
-                f"latency={token_info.latency_ms}ms"
-            )
+    def _wrap_api_error(self, e: Exception) -> Exception:
+        """Anthropic SDK の例外を独自例外にラッピング.
 
-            return result_text, token_info
+        Args:
+            e: 発生した例外
 
-        except anthropic.AuthenticationError as e:
+        Returns:
+            ラッピングした例外
+        """
+        if isinstance(e, anthropic.AuthenticationError):
             # 認証エラー: リトライ不可
             logger.error(f"API authentication error: {e}")
-            raise AIAuthenticationError(f"API認証に失敗しました: {e}") from e
-        except anthropic.RateLimitError as e:
+            return AIAuthenticationError(f"API認証に失敗しました: {e}")
+        if isinstance(e, anthropic.RateLimitError):
             # レート制限エラー: リトライ可能（tenacity が処理）
             logger.warning(f"API rate limit error: {e}")
-            raise AIRateLimitError(f"レート制限: {e}") from e
-        except anthropic.APIError as e:
+            return AIRateLimitError(f"レート制限: {e}")
+        if isinstance(e, anthropic.APIError):
             # API エラー: リトライ可能なエラーかどうかを判定
             if hasattr(e, "status_code") and e.status_code in [429, 500, 502, 503, 504]:
                 # 一時的なエラー: リトライ可能
                 logger.warning(f"API error (retryable): {e}")
-                raise AIRateLimitError(f"一時的なAPIエラー: {e}") from e
-            else:
-                # 認証エラーなど、リトライ不可なエラー
-                logger.error(f"API error (non-retryable): {e}")
-                raise AIServiceError(f"APIエラー: {e}") from e
-        except Exception as e:
-            # その他の予期しないエラー
-            logger.error(f"Unexpected Anthropic API error: {e}")
-            raise AIServiceError(f"予期しないエラー: {e}") from e
+                return AIRateLimitError(f"一時的なAPIエラー: {e}")
+            # 認証エラーなど、リトライ不可なエラー
+            logger.error(f"API error (non-retryable): {e}")
+            return AIServiceError(f"APIエラー: {e}")
+        # その他の予期しないエラー
+        logger.error(f"Unexpected Anthropic API error: {e}")
+        return AIServiceError(f"予期しないエラー: {e}")
 
     def get_last_used_model(self) -> str:
         """最後に使用したモデル名を取得.
@@ -360,3 +571,68 @@ class AnthropicProvider(AIProvider):
             anthropic_messages.append({"role": role, "content": message.content})
 
         return anthropic_messages
+
+    def _apply_cache_control(
+        self, system_prompt: str | None, anthropic_messages: list[dict]
+    ) -> tuple[str | list[dict] | None, list[dict]]:
+        """プロンプトキャッシュのブレークポイントを設定.
+
+        キャッシュはプロンプトの先頭からの完全一致でしか効かないため、
+        システムプロンプトのうち毎回変わる部分（日時・要約・知識ベースの検索結果など）は
+        最後のユーザーメッセージの先頭に移し、キャッシュ対象から外す。
+        ブレークポイントは固定部分のシステムプロンプトと、最後のユーザーメッセージより
+        前の会話履歴（次のターンでも変わらない部分）の末尾に設定する。
+
+        Args:
+            system_prompt: システムプロンプト
+            anthropic_messages: Anthropic SDK 形式のメッセージリスト
+
+        Returns:
+            (system パラメータ, メッセージリスト) のタプル
+        """
+        if not system_prompt:
+            return system_prompt, anthropic_messages
+
+        stable, volatile = system_prompt, ""
+        if system_prompt.startswith(DEFAULT_SYSTEM_PROMPT):
+            stable = DEFAULT_SYSTEM_PROMPT
+            volatile = system_prompt[len(DEFAULT_SYSTEM_PROMPT) :].strip()
+
+        system: list[dict] = [
+            {
+                "type": "text",
+                "text": stable,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        messages = list(anthropic_messages)
+        last_is_user = bool(messages) and messages[-1]["role"] == "user"
+
+        if volatile:
+            if last_is_user:
+                messages[-1] = {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": volatile},
+                        {"type": "text", "text": messages[-1]["content"]},
+                    ],
+                }
+            else:
+                system.append({"type": "text", "text": volatile})
+
+        # 最後のユーザーメッセージより前の会話履歴をキャッシュする
+        # （次のターンではこのブレークポイントまでの部分がキャッシュから読み込まれる）
+        prefix_end = len(messages) - 2 if last_is_user else len(messages) - 1
+        if prefix_end >= 0 and isinstance(messages[prefix_end]["content"], str):
+            messages[prefix_end] = {
+                "role": messages[prefix_end]["role"],
+                "content": [
+                    {
+                        "type": "text",
+                        "text": messages[prefix_end]["content"],
+                        "cache_control": {"type": "ephemeral"},
+                    }
+                ],
+            }
+
+        return system, messages
@@ -0,0 +1,132 @@
+"""会話履歴のトークン予算管理.
+
+LLM に送信する会話履歴を、設定されたトークン予算に収まるように古いものから削る。
+"""
+
+import logging
+from collections.abc import Callable
+from functools import cache
+
+from ..db.models import Message, MessageRole
+
+logger = logging.getLogger(__name__)
+
+# メッセージごとのオーバーヘッド（ロール・区切りなど）の概算トークン数
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+@cache
+def _load_encoding():
+    """トークン数の概算に使う tiktoken エンコーディングを読み込む.
+
+    Returns:
+        tiktoken エンコーディング（読み込めない場合は None）
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Failed to load tiktoken encoding, using char count: {e}")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """テキストのトークン数を概算する.
+
+    Claude のトークナイザーは公開されていないため、tiktoken（cl100k_base）で概算する。
+    エンコーディングを読み込めない場合は文字数で代用する
+    （日本語では1文字≒1トークン以上になるため、安全側の見積もりになる）。
+
+    Args:
+        text: テキスト
+
+    Returns:
+        概算トークン数
+    """
+    encoding = _load_encoding()
+    if encoding is None:
+        return len(text)
+    return len(encoding.encode(text))
+
+
+class ContextWindowBuilder:
+    """会話履歴をトークン予算内に収めるビルダー.
+
+    メッセージごとのトークン数は Message.token_count にキャッシュし、
+    ターンごとに履歴全体を再計算しない。
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        count_tokens: Callable[[str], int] | None = None,
+    ):
+        """ContextWindowBuilder を初期化.
+
+        Args:
+            max_tokens: 会話履歴とシステムプロンプトに使う入力トークンの上限
+            count_tokens: トークン数の計算関数（省略時は estimate_tokens）
+        """
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def count_message_tokens(self, message: Message) -> int:
+        """メッセージのトークン数を返す（キャッシュ付き）.
+
+        Args:
+            message: メッセージ
+
+        Returns:
+            トークン数
+        """
+        if message.token_count is None:
+            message.token_count = (
+                self.count_tokens(message.content) + MESSAGE_TOKEN_OVERHEAD
+            )
+        return message.token_count
+
+    def fit(
+        self, messages: list[Message], system_prompt: str | None = None
+    ) -> tuple[list[Message], int]:
+        """会話履歴をトークン予算内に収める.
+
+        新しいメッセージから順に予算内に収まる分だけ残し、古いメッセージを削る。
+        最新のメッセージ（今回の発言）は予算を超えても必ず残す。
+
+        Args:
+            messages: 会話履歴
+            system_prompt: システムプロンプト（予算から差し引く）
+
+        Returns:
+            (予算内の会話履歴, 削ったトークン数) のタプル
+        """
+        if not messages:
+            return messages, 0
+
+        budget = self.max_tokens
+        if system_prompt:
+            budget -= self.count_tokens(system_prompt)
+
+        used = 0
+        start = len(messages)
+        for index in range(len(messages) - 1, -1, -1):
+            tokens = self.count_message_tokens(messages[index])
+            if used + tokens > budget and start < len(messages):
+                break
+            used += tokens
+            start = index
+
+        if start == 0:
+            return messages, 0
+
+        # Anthropic API では最初のメッセージがユーザーの発言である必要がある
+        while start < len(messages) - 1 and messages[start].role != MessageRole.USER:
+            start += 1
+
+        trimmed_tokens = sum(self.count_message_tokens(m) for m in messages[:start])
+        logger.debug(
+            f"Trimmed {start} messages ({trimmed_tokens} tokens) "
+            f"to fit context budget {self.max_tokens}"
+        )
+        return messages[start:], trimmed_tokens
@@ -4,9 +4,11 @@
 会話ログバッファを管理する機能を提供します。
 """
 
-import hashlib
+import json
 import logging
+import re
 from collections import deque
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 import discord
@@ -14,6 +16,8 @@ import discord
 from ..config import Config
 from ..db.models import Message, MessageRole
 from ..services.ai import AIProvider
+from ..services.judge_cache import JudgementCache
+from ..services.metrics import eavesdrop_prefilter_score
 from ..services.session import SessionManager
 from ..utils.prompts import DEFAULT_SYSTEM_PROMPT, _load_prompt_from_markdown
 
@@ -32,6 +36,145 @@ CONVERSATION_STATE_PROMPT_TEMPLATE = _load_prompt_from_markdown(
 CONVERSATION_SITUATION_CHANGED_PROMPT_TEMPLATE = _load_prompt_from_markdown(
     "eavesdrop_conversation_situation_changed_prompt.md"
 )
+STRUCTURED_JUDGE_PROMPT_TEMPLATE = _load_prompt_from_markdown(
+    "eavesdrop_structured_judge_prompt.md"
+)
+
+# 会話の状態として有効な値
+CONVERSATION_STATES = ("active", "ending", "misunderstanding", "conflict")
+
+
+# 事前フィルタ: 直近の何件のメッセージをシグナルの対象にするか
+PREFILTER_RECENT_MESSAGES = 3
+# 事前フィルタ: 会話の勢いを数える時間幅（秒）と、活発とみなすメッセージ数
+PREFILTER_RATE_WINDOW_SECONDS = 60
+PREFILTER_RATE_MIN_MESSAGES = 5
+# 事前フィルタ: Bot の呼び名
+PREFILTER_BOT_NAMES = ("コトノハ", "ことのは", "kotonoha")
+# 事前フィルタ: 相談・困りごと・対立などを示すキーワード
+PREFILTER_SENTIMENT_KEYWORDS = (
+    "助けて",
+    "困",
+    "どうしたら",
+    "どうすれば",
+    "教えて",
+    "相談",
+    "不安",
+    "つらい",
+    "辛い",
+    "しんどい",
+    "怖い",
+    "悲しい",
+    "怒",
+    "ムカつく",
+    "ひどい",
+    "やめて",
+    "違う",
+    "誤解",
+    "なんで",
+)
+# 事前フィルタ: 会話の締めくくりを示すキーワード
+PREFILTER_ENDING_KEYWORDS = (
+    "以上です",
+    "以上になります",
+    "おやすみ",
+    "またね",
+    "お疲れ様",
+    "おつかれ",
+    "ありがとうございました",
+)
+
+
+def score_conversation(
+    recent_messages: list[discord.Message],
+    last_intervention_time: datetime | None = None,
+    min_interval_minutes: int = 10,
+) -> float:
+    """LLM で判定する価値があるかを表すスコアを計算（事前フィルタ）.
+
+    LLM を呼び出さずに、直近のメッセージのシグナルだけで計算する。
+    Bot の呼び名・疑問符・相談や対立を示すキーワード・会話の勢い・
+    前回の介入からの経過時間を加点または減点する。
+
+    Args:
+        recent_messages: 直近のメッセージリスト
+        last_intervention_time: 最後の介入時刻（介入履歴がない場合は None）
+        min_interval_minutes: 介入の最小間隔（分）
+
+    Returns:
+        スコア（高いほど発言が必要な可能性が高い）
+    """
+    if not recent_messages:
+        return 0.0
+
+    score = 0.0
+    tail = [
+        str(msg.content or "") for msg in recent_messages[-PREFILTER_RECENT_MESSAGES:]
+    ]
+    last_content = tail[-1]
+
+    # Bot の呼び名（呼ばれた場合はほぼ確実に判定する）
+    if any(name in content.lower() for content in tail for name in PREFILTER_BOT_NAMES):
+        score += 3.0
+
+    # 疑問符（最新のメッセージの質問を重視する）
+    if "?" in last_content or "？" in last_content:
+        score += 1.0
+    elif any("?" in content or "？" in content for content in tail):
+        score += 0.5
+
+    # 相談・困りごと・対立などのキーワード（メッセージごとに加点、最大 2 点）
+    keyword_hits = sum(
+        1
+        for content in tail
+        if any(keyword in content for keyword in PREFILTER_SENTIMENT_KEYWORDS)
+    )
+    score += min(keyword_hits, 2) * 1.0
+
+    # 会話の勢い（短時間にメッセージが集中している場合は場が荒れている可能性がある）
+    timestamps = [
+        msg.created_at
+        for msg in recent_messages
+        if isinstance(getattr(msg, "created_at", None), datetime)
+    ]
+    if timestamps:
+        window_start = timestamps[-1] - timedelta(seconds=PREFILTER_RATE_WINDOW_SECONDS)
+        if (
+            sum(1 for t in timestamps if t >= window_start)
+            >= PREFILTER_RATE_MIN_MESSAGES
+        ):
+            score += 0.5
+
+    # 会話の締めくくり（会話を妨げない）
+    if any(keyword in last_content for keyword in PREFILTER_ENDING_KEYWORDS):
+        score -= 1.0
+
+    # 前回の介入からの経過時間（最近介入したばかりの場合は減点）
+    if last_intervention_time is None:
+        score += 0.5
+    else:
+        minutes_since_last = (
+            datetime.now() - last_intervention_time
+        ).total_seconds() / 60
+        if minutes_since_last < min_interval_minutes * 3:
+            score -= 0.5
+
+    return score
+
+
+@dataclass(frozen=True)
+class Judgement:
+    """統合判定の結果.
+
+    Attributes:
+        state: 会話の状態（"active", "ending", "misunderstanding", "conflict"）
+        situation_changed: 前回の介入から状況が変わったか（介入履歴がない場合は None）
+        should_respond: 発言すべきか
+    """
+
+    state: str
+    situation_changed: bool | None
+    should_respond: bool
 
 
 class ConversationBuffer:
@@ -106,8 +249,7 @@ class LLMJudge:
         judge_model: 判定用の軽量モデル
         response_model: 応答生成用の通常モデル
         intervention_history: 介入履歴の追跡（チャンネルごと）
-        conversation_check_cache: 同じ会話判定のキャッシュ
-        cache_ttl_minutes: キャッシュの有効期限（分）
+        judgement_cache: 判定結果のキャッシュ（全ての判定で共有）
     """
 
     def __init__(
@@ -115,6 +257,7 @@ class LLMJudge:
         session_manager: SessionManager,
         ai_provider: AIProvider,
         config: Config | None = None,
+        judgement_cache: JudgementCache | None = None,
     ):
         """LLM判断機能を初期化.
 
@@ -122,6 +265,7 @@ class LLMJudge:
             session_manager: セッションマネージャー
             ai_provider: AIプロバイダー
             config: 設定インスタンス（依存性注入、必須）
+            judgement_cache: 判定結果のキャッシュ（省略時は設定値からメモリのみのキャッシュを作成）
 
         Raises:
             ValueError: config が None の場合
@@ -138,11 +282,13 @@ class LLMJudge:
         # 介入履歴の追跡（チャンネルごと）
         # キー: チャンネルID, 値: (介入時刻, 介入時の会話ログ)のリスト
         self.intervention_history: dict[int, list[tuple[datetime, str]]] = {}
-        # 同じ会話判定のキャッシュ（トークン消費を削減）
-        # キー: (チャンネルID, 会話ログのハッシュ), 値: (判定結果, キャッシュ時刻)
-        self.conversation_check_cache: dict[tuple[int, str], tuple[bool, datetime]] = {}
-        # キャッシュの有効期限（分）
-        self.cache_ttl_minutes = 5
+        # 判定結果のキャッシュ（同じ会話ログの再判定でトークンを消費しない）
+        if judgement_cache is None:
+            judgement_cache = JudgementCache(
+                max_entries=self.config.EAVESDROP_JUDGE_CACHE_SIZE,
+                ttl_seconds=self.config.EAVESDROP_JUDGE_CACHE_TTL_SECONDS,
+            )
+        self.judgement_cache = judgement_cache
 
     async def should_respond(
         self, channel_id: int, recent_messages: list[discord.Message]
@@ -159,6 +305,14 @@ class LLMJudge:
         if not recent_messages:
             return False
 
+        # 明らかに発言の必要がない会話では LLM を呼び出さない
+        if not self._passes_prefilter(channel_id, recent_messages):
+            return False
+
+        # 1回の LLM 呼び出しで状態・状況の変化・発言要否をまとめて判定する
+        if self.config.EAVESDROP_STRUCTURED_JUDGE:
+            return await self._should_respond_structured(channel_id, recent_messages)
+
         # 会話の状態を判定（終了しようとしている場合は介入しない）
         conversation_state = await self._analyze_conversation_state(recent_messages)
         if conversation_state == "ending":
@@ -206,11 +360,9 @@ class LLMJudge:
 
         try:
             # 判定用 AI に問い合わせ（軽量モデルを使用）
-            judge_message = Message(role=MessageRole.USER, content=judge_prompt)
-            response, token_info = await self.ai_provider.generate_response(
-                messages=[judge_message],
-                system_prompt="",
-                model=self.judge_model,
+            response = await self._ask_judge(
+                "should_respond",
+                judge_prompt,
                 max_tokens=50,  # 会話の雰囲気を理解するため、少し余裕を持たせる
             )
 
@@ -231,6 +383,170 @@ class LLMJudge:
             logger.error(f"Error in judge phase: {e}")
             return False
 
+    def _passes_prefilter(
+        self, channel_id: int, recent_messages: list[discord.Message]
+    ) -> bool:
+        """事前フィルタのスコアが閾値以上か判定.
+
+        Args:
+            channel_id: チャンネル ID
+            recent_messages: 直近のメッセージリスト
+
+        Returns:
+            LLM で判定すべき場合 True（閾値が 0 以下の場合は常に True）
+        """
+        threshold = self.config.EAVESDROP_PREFILTER_THRESHOLD
+        if threshold <= 0:
+            return True
+
+        last_intervention = self._get_last_intervention(channel_id)
+        score = score_conversation(
+            recent_messages,
+            last_intervention_time=last_intervention[0] if last_intervention else None,
+            min_interval_minutes=self.config.EAVESDROP_MIN_INTERVENTION_INTERVAL_MINUTES,
+        )
+        passed = score >= threshold
+        eavesdrop_prefilter_score.labels(
+            decision="judge" if passed else "skip"
+        ).observe(score)
+        if not passed:
+            logger.debug(
+                f"Eavesdrop judgement skipped for channel {channel_id} "
+                f"(prefilter score {score:.1f} < {threshold})"
+            )
+        return passed
+
+    async def _should_respond_structured(
+        self, channel_id: int, recent_messages: list[discord.Message]
+    ) -> bool:
+        """発言すべきか判定（統合判定）.
+
+        会話の状態分析・介入後の状況変化・発言要否の判定を1回の LLM 呼び出しで行う。
+        介入の最小間隔など LLM を使わないチェックは呼び出し前に行う。
+
+        Args:
+            channel_id: チャンネル ID
+            recent_messages: 直近のメッセージリスト
+
+        Returns:
+            発言すべき場合 True
+        """
+        last_intervention = self._get_last_intervention(channel_id)
+        if last_intervention is not None and not self._is_min_interval_elapsed(
+            last_intervention[0]
+        ):
+            return False
+
+        last_intervention_log = ""
+        if last_intervention is not None:
+            last_intervention_log = (
+                f"【前回の介入時の会話】\n{last_intervention[1]}\n\n"
+                f"【現在の会話（直近）】\n"
+                f"{self._format_conversation_log(recent_messages[-5:])}"
+            )
+
+        prompt = STRUCTURED_JUDGE_PROMPT_TEMPLATE.format(
+            conversation_log=self._format_conversation_log(recent_messages),
+            intervention_context=self._get_intervention_context(channel_id) or "",
+            last_intervention_log=last_intervention_log,
+        )
+
+        try:
+            # 判定用 AI に問い合わせ（軽量モデルを使用）
+            response = await self._ask_judge(
+                "structured",
+                prompt,
+                max_tokens=100,  # JSON オブジェクトのみなので短く
+            )
+        except Exception as e:
+            logger.error(f"Error in structured judge phase: {e}")
+            return False
+
+        judgement = self._parse_judgement(response)
+        if judgement is None:
+            logger.warning(f"Failed to parse structured judgement: {response[:100]}")
+            return False
+
+        logger.debug(f"Structured judgement for channel {channel_id}: {judgement}")
+
+        # 会話が終了しようとしている場合、介入後に状況が変わっていない場合は介入しない
+        should_respond = judgement.should_respond
+        if judgement.state == "ending" or (
+            last_intervention is not None and judgement.situation_changed is False
+        ):
+            should_respond = False
+
+        if should_respond:
+            self._record_intervention(channel_id, recent_messages)
+        return should_respond
+
+    async def _ask_judge(self, kind: str, prompt: str, max_tokens: int) -> str:
+        """判定用 AI に問い合わせ（キャッシュ済みの場合は LLM を呼び出さない）.
+
+        キャッシュキーは判定の種類・モデル・正規化したプロンプト（会話ログを含む）から作成する。
+
+        Args:
+            kind: 判定の種類
+            prompt: 判定用プロンプト
+            max_tokens: 最大トークン数
+
+        Returns:
+            判定用 AI の応答
+
+        Raises:
+            Exception: LLM の呼び出しに失敗した場合（失敗はキャッシュしない）
+        """
+        cache_key = JudgementCache.make_key(kind, self.judge_model, prompt)
+        cached = await self.judgement_cache.get(kind, cache_key)
+        if cached is not None:
+            logger.debug(f"Judgement cache hit ({kind})")
+            return cached
+
+        # 判定用 AI に問い合わせ（軽量モデルを使用）
+        judge_message = Message(role=MessageRole.USER, content=prompt)
+        response, _ = await self.ai_provider.generate_response(
+            messages=[judge_message],
+            system_prompt="",
+            model=self.judge_model,
+            max_tokens=max_tokens,
+        )
+        await self.judgement_cache.put(kind, cache_key, response)
+        return response
+
+    def _parse_judgement(self, response: str) -> Judgement | None:
+        """統合判定の応答（JSON）を解析.
+
+        Args:
+            response: LLM の応答
+
+        Returns:
+            判定結果（解析できない場合は None）
+        """
+        # コードブロックや前後の説明が付いていても JSON 部分だけを取り出す
+        match = re.search(r"\{.*\}", response, re.DOTALL)
+        if not match:
+            return None
+
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        state = str(data.get("state", "active")).lower()
+        if state not in CONVERSATION_STATES:
+            state = "active"
+        situation_changed = data.get("situation_changed")
+        if not isinstance(situation_changed, bool):
+            situation_changed = None
+
+        return Judgement(
+            state=state,
+            situation_changed=situation_changed,
+            should_respond=data.get("should_respond") is True,
+        )
+
     async def generate_response(
         self, channel_id: int, recent_messages: list[discord.Message]
     ) -> str | None:
@@ -318,14 +634,12 @@ class LLMJudge:
         self,
         previous_log: str,
         current_log: str,
-        cache_key: tuple[int, str] | None = None,
     ) -> bool:
         """LLMで「同じ会話かどうか」を判定.
 
         Args:
             previous_log: 前回の介入時の会話ログ
             current_log: 現在の会話ログ
-            cache_key: キャッシュキー（結果をキャッシュする場合）
 
         Returns:
             同じ会話の場合 True
@@ -341,11 +655,9 @@ class LLMJudge:
 
         try:
             # 判定用 AI に問い合わせ（軽量モデルを使用）
-            judge_message = Message(role=MessageRole.USER, content=prompt)
-            response, token_info = await self.ai_provider.generate_response(
-                messages=[judge_message],
-                system_prompt="",
-                model=self.judge_model,
+            response = await self._ask_judge(
+                "same_conversation",
+                prompt,
                 max_tokens=20,  # SAME/DIFFERENT のみなので短く
             )
 
@@ -357,13 +669,6 @@ class LLMJudge:
                 f"Same conversation check: {is_same} (response: {response_upper[:20]})"
             )
 
-            # 結果をキャッシュ（トークン消費を削減）
-            if cache_key:
-                now = datetime.now()
-                self.conversation_check_cache[cache_key] = (is_same, now)
-                # 古いキャッシュを削除
-                self._cleanup_cache(now)
-
             return is_same
 
         except Exception as e:
@@ -371,21 +676,6 @@ class LLMJudge:
             # エラー時は安全側に倒して、同じ会話として扱う（介入回数をチェック）
             return True
 
-    def _cleanup_cache(self, now: datetime) -> None:
-        """古いキャッシュを削除.
-
-        Args:
-            now: 現在時刻
-        """
-        cutoff_time = now - timedelta(minutes=self.cache_ttl_minutes * 2)
-        keys_to_delete = [
-            key
-            for key, (_, cached_time) in self.conversation_check_cache.items()
-            if cached_time < cutoff_time
-        ]
-        for key in keys_to_delete:
-            del self.conversation_check_cache[key]
-
     async def _has_conversation_changed_after_intervention(
         self, channel_id: int, recent_messages: list[discord.Message]
     ) -> bool:
@@ -399,28 +689,12 @@ class LLMJudge:
             会話状況が変わった場合 True
         """
         # 介入履歴がない場合は、変化があったとみなす（初回介入）
-        if channel_id not in self.intervention_history:
-            return True
-
-        history = self.intervention_history[channel_id]
-        if not history:
+        last_intervention = self._get_last_intervention(channel_id)
+        if last_intervention is None:
             return True
 
-        # 最後の介入を取得
-        last_intervention_time, last_intervention_log = max(history, key=lambda x: x[0])
-
-        # 最後の介入からの経過時間を計算
-        now = datetime.now()
-        time_since_last = now - last_intervention_time
-        minutes_since_last = int(time_since_last.total_seconds() / 60)
-
-        # 最小間隔（設定から読み込む）
-        min_interval_minutes = self.config.EAVESDROP_MIN_INTERVENTION_INTERVAL_MINUTES
-        if minutes_since_last < min_interval_minutes:
-            logger.debug(
-                f"Intervention blocked: minimum interval not met "
-                f"({minutes_since_last} < {min_interval_minutes} minutes)"
-            )
+        last_intervention_time, last_intervention_log = last_intervention
+        if not self._is_min_interval_elapsed(last_intervention_time):
             return False
 
         # 現在の会話ログを取得（最新の5メッセージ）
@@ -430,7 +704,6 @@ class LLMJudge:
         is_same = await self._is_same_conversation(
             previous_log=last_intervention_log,
             current_log=current_log,
-            cache_key=(channel_id, hashlib.md5(current_log.encode()).hexdigest()),
         )
 
         if is_same:
@@ -442,6 +715,43 @@ class LLMJudge:
         # 別の会話の場合は、変化があったとみなす
         return True
 
+    def _get_last_intervention(self, channel_id: int) -> tuple[datetime, str] | None:
+        """最後の介入を取得.
+
+        Args:
+            channel_id: チャンネル ID
+
+        Returns:
+            (介入時刻, 介入時の会話ログ) のタプル（介入履歴がない場合は None）
+        """
+        history = self.intervention_history.get(channel_id)
+        if not history:
+            return None
+        return max(history, key=lambda x: x[0])
+
+    def _is_min_interval_elapsed(self, last_intervention_time: datetime) -> bool:
+        """最後の介入から最小間隔が経過したか判定.
+
+        Args:
+            last_intervention_time: 最後の介入時刻
+
+        Returns:
+            最小間隔が経過した場合 True
+        """
+        # 最後の介入からの経過時間を計算
+        time_since_last = datetime.now() - last_intervention_time
+        minutes_since_last = int(time_since_last.total_seconds() / 60)
+
+        # 最小間隔（設定から読み込む）
+        min_interval_minutes = self.config.EAVESDROP_MIN_INTERVENTION_INTERVAL_MINUTES
+        if minutes_since_last < min_interval_minutes:
+            logger.debug(
+                f"Intervention blocked: minimum interval not met "
+                f"({minutes_since_last} < {min_interval_minutes} minutes)"
+            )
+            return False
+        return True
+
     async def _check_conversation_situation_changed(
         self, last_intervention_log: str, current_log: str
     ) -> bool:
@@ -462,11 +772,9 @@ class LLMJudge:
 
         try:
             # 判定用 AI に問い合わせ（軽量モデルを使用）
-            judge_message = Message(role=MessageRole.USER, content=prompt)
-            response, token_info = await self.ai_provider.generate_response(
-                messages=[judge_message],
-                system_prompt="",
-                model=self.judge_model,
+            response = await self._ask_judge(
+                "situation_changed",
+                prompt,
                 max_tokens=20,  # CHANGED/UNCHANGED のみなので短く
             )
 
@@ -513,11 +821,9 @@ class LLMJudge:
 
         try:
             # 判定用 AI に問い合わせ（軽量モデルを使用）
-            judge_message = Message(role=MessageRole.USER, content=state_prompt)
-            response, token_info = await self.ai_provider.generate_response(
-                messages=[judge_message],
-                system_prompt="",
-                model=self.judge_model,
+            response = await self._ask_judge(
+                "conversation_state",
+                state_prompt,
                 max_tokens=20,  # ENDING/MISUNDERSTANDING/CONFLICT/ACTIVE のみなので短く
             )
 
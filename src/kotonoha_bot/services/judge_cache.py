@@ -0,0 +1,159 @@
+"""聞き耳型の判定結果キャッシュ（LRU + TTL）."""
+
+import hashlib
+import logging
+import re
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from ..db.base import JudgementStoreProtocol
+from .metrics import (
+    judge_cache_evictions_counter,
+    judge_cache_requests_counter,
+    judge_cache_size,
+)
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_log(text: str) -> str:
+    """キャッシュキー用に会話ログを正規化.
+
+    各行の空白をまとめ、空行を削除する。
+    会話ログ（「発言者: 内容」の行）に日時は含まれないため、日時の除去は行わない
+    （発言内容の「12:30」などを取り除くと、異なる会話が同じキーになる）。
+
+    Args:
+        text: 会話ログ（またはそれを含むプロンプト）
+
+    Returns:
+        正規化した文字列
+    """
+    lines = (_WHITESPACE_PATTERN.sub(" ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class JudgementCache:
+    """LLM 判定結果のキャッシュ（LRU + TTL）.
+
+    dict の挿入順を LRU 順として使い、参照時に末尾へ付け直す。
+    期限切れのエントリは参照時に削除し、上限を超えた場合は最も長く使われていない
+    エントリから削除するため、いずれの操作も O(1) で済む。
+    store を渡した場合は書き込みを永続化し（write-through）、
+    メモリにない場合は store から読み込む（再起動後もキャッシュを再利用する）。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300,
+        store: JudgementStoreProtocol | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """JudgementCache を初期化.
+
+        Args:
+            max_entries: メモリに保持する最大件数
+            ttl_seconds: 有効期限（秒）
+            store: 永続化先（省略時はメモリのみ）
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.clock = clock
+        # キー: キャッシュキー, 値: (判定結果, 有効期限)
+        self._entries: dict[str, tuple[str, float]] = {}
+
+    def __len__(self) -> int:
+        """メモリに保持しているエントリ数."""
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(kind: str, model: str | None, text: str) -> str:
+        """キャッシュキーを作成.
+
+        Args:
+            kind: 判定の種類
+            model: 判定に使用するモデル
+            text: 判定対象（会話ログを含むプロンプト）
+
+        Returns:
+            キャッシュキー（正規化した内容の SHA-256）
+        """
+        payload = f"{kind}\x00{model or ''}\x00{normalize_log(text)}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, kind: str, key: str) -> str | None:
+        """判定結果を取得.
+
+        Args:
+            kind: 判定の種類（メトリクスのラベル）
+            key: キャッシュキー
+
+        Returns:
+            キャッシュされた判定結果（存在しないか期限切れの場合は None）
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            if entry[1] > self.clock():
+                # 最近使用したものとして末尾に付け直す
+                self._entries[key] = entry
+                judge_cache_requests_counter.labels(kind=kind, result="hit").inc()
+                return entry[0]
+            judge_cache_evictions_counter.labels(reason="expired").inc()
+            judge_cache_size.set(len(self._entries))
+
+        if self.store is not None:
+            try:
+                stored = await self.store.load_judgement(key)
+            except Exception as e:
+                logger.warning(f"Failed to load judgement from store: {e}")
+                stored = None
+            if stored is not None:
+                response, expires_at = stored
+                remaining = (expires_at - datetime.now(UTC)).total_seconds()
+                self._put(key, response, min(remaining, self.ttl_seconds))
+                judge_cache_requests_counter.labels(kind=kind, result="store_hit").inc()
+                return response
+
+        judge_cache_requests_counter.labels(kind=kind, result="miss").inc()
+        return None
+
+    async def put(self, kind: str, key: str, response: str) -> None:
+        """判定結果を保存.
+
+        Args:
+            kind: 判定の種類
+            key: キャッシュキー
+            response: 判定結果（LLM の応答）
+        """
+        self._put(key, response, self.ttl_seconds)
+
+        if self.store is not None:
+            expires_at = datetime.now(UTC) + timedelta(seconds=self.ttl_seconds)
+            try:
+                await self.store.save_judgement(key, kind, response, expires_at)
+            except Exception as e:
+                # 永続化に失敗してもメモリのキャッシュは有効
+                logger.warning(f"Failed to save judgement to store: {e}")
+
+    def _put(self, key: str, response: str, ttl_seconds: float) -> None:
+        """メモリにエントリを追加し、上限を超えた分を削除.
+
+        Args:
+            key: キャッシュキー
+            response: 判定結果
+            ttl_seconds: 有効期限（秒）
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = (response, self.clock() + ttl_seconds)
+
+        while len(self._entries) > self.max_entries:
+            # 先頭が最も長く使われていないエントリ
+            del self._entries[next(iter(self._entries))]
+            judge_cache_evictions_counter.labels(reason="capacity").inc()
+        judge_cache_size.set(len(self._entries))
@@ -0,0 +1,95 @@
+"""サービス層のメトリクス収集（Prometheus）."""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# セッションキャッシュのメトリクス
+session_cache_hits_counter = Counter(
+    "session_cache_hits_total",
+    "Total session lookups served from the in-memory cache",
+)
+
+session_cache_misses_counter = Counter(
+    "session_cache_misses_total",
+    "Total session lookups that missed the in-memory cache",
+)
+
+session_cache_evictions_counter = Counter(
+    "session_cache_evictions_total",
+    "Total sessions evicted from the in-memory cache",
+    ["reason"],  # 'capacity', 'messages', 'idle'でラベル付け
+)
+
+session_cache_size = Gauge(
+    "session_cache_size",
+    "Current size of the in-memory session cache",
+    ["unit"],  # 'sessions', 'messages'
+)
+
+# 知識ベース検索（RAG）のメトリクス
+retrieval_duration = Histogram(
+    "retrieval_seconds",
+    "Time spent retrieving knowledge base context",
+    ["outcome"],  # 'hit', 'empty', 'timeout', 'error'でラベル付け
+    buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0],  # バケット設定
+)
+
+# プロンプトキャッシュのメトリクス
+llm_cache_tokens_counter = Counter(
+    "llm_prompt_cache_tokens_total",
+    "Total input tokens read from or written to the LLM prompt cache",
+    ["model", "operation"],  # operation: 'read', 'write'
+)
+
+# 聞き耳型のメトリクス
+eavesdrop_evaluations_counter = Counter(
+    "eavesdrop_evaluations_total",
+    "Total scheduled eavesdrop evaluations by outcome",
+    ["outcome"],  # 'evaluated', 'superseded', 'duplicate'でラベル付け
+)
+
+eavesdrop_prefilter_score = Histogram(
+    "eavesdrop_prefilter_score",
+    "Eavesdrop prefilter scores by whether the LLM judge was called",
+    ["decision"],  # 'judge', 'skip'でラベル付け
+    buckets=[-1.0, 0.0, 0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 5.0],  # バケット設定
+)
+
+# 聞き耳型の判定結果キャッシュのメトリクス
+judge_cache_requests_counter = Counter(
+    "llm_judge_cache_requests_total",
+    "Total LLM judge cache lookups",
+    ["kind", "result"],  # result: 'hit', 'store_hit', 'miss'
+)
+
+judge_cache_evictions_counter = Counter(
+    "llm_judge_cache_evictions_total",
+    "Total entries evicted from the in-memory LLM judge cache",
+    ["reason"],  # 'capacity', 'expired'でラベル付け
+)
+
+judge_cache_size = Gauge(
+    "llm_judge_cache_size",
+    "Current number of entries in the in-memory LLM judge cache",
+)
+
+# 検索クエリの Embedding キャッシュのメトリクス
+query_embedding_cache_requests_counter = Counter(
+    "query_embedding_cache_requests_total",
+    "Total query embedding cache lookups",
+    ["result"],  # 'hit', 'coalesced', 'miss'でラベル付け
+)
+
+query_embedding_cache_hit_ratio = Gauge(
+    "query_embedding_cache_hit_ratio",
+    "Fraction of query embedding lookups served from the cache since startup",
+)
+
+query_embedding_cache_saved_seconds_counter = Counter(
+    "query_embedding_cache_saved_seconds_total",
+    "Estimated embedding API latency avoided by query embedding cache hits",
+)
+
+query_embedding_cache_size = Gauge(
+    "query_embedding_cache_size",
+    "Current number of entries in the query embedding cache",
+)
@@ -0,0 +1,208 @@
+"""検索クエリの Embedding キャッシュ（LRU + TTL）."""
+
+import asyncio
+import hashlib
+import logging
+import time
+import unicodedata
+from collections.abc import Callable
+
+from ..external.embedding import EmbeddingProvider
+from .metrics import (
+    query_embedding_cache_hit_ratio,
+    query_embedding_cache_requests_counter,
+    query_embedding_cache_saved_seconds_counter,
+    query_embedding_cache_size,
+)
+
+logger = logging.getLogger(__name__)
+
+# API のレイテンシの移動平均の平滑化係数（節約した時間の見積もりに使う）
+_LATENCY_SMOOTHING = 0.2
+
+
+def normalize_query(text: str) -> str:
+    """キャッシュキー用に検索クエリを正規化.
+
+    Unicode を NFKC に揃え（全角・半角の揺れを吸収）、連続する空白を1つにまとめて
+    前後の空白を取り除く。
+
+    Args:
+        text: 検索クエリ
+
+    Returns:
+        正規化した文字列
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """検索クエリのベクトル化結果をキャッシュする Embedding プロバイダー.
+
+    同じ質問が繰り返されることが多いため、正規化したクエリ・モデル・次元数を
+    キーにベクトルを再利用し、API の呼び出し（100〜300ms）を省く。
+    dict の挿入順を LRU 順として使い、期限切れのエントリは参照時に削除する。
+    同じクエリの同時リクエストは、実行中の 1 回の呼び出しの結果を共有する。
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """CachedEmbeddingProvider を初期化.
+
+        Args:
+            provider: ベクトル化を行う Embedding プロバイダー
+            max_entries: メモリに保持する最大件数
+            ttl_seconds: 有効期限（秒）
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self.provider = provider
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.model = getattr(provider, "model", type(provider).__name__)
+        # キー: キャッシュキー, 値: (ベクトル, 有効期限)
+        self._entries: dict[str, tuple[list[float], float]] = {}
+        # 実行中の API 呼び出し（同じキーの同時リクエストで共有する）
+        self._in_flight: dict[str, asyncio.Task[list[float]]] = {}
+        self._average_latency: float | None = None
+        self._requests = 0
+        self._hits = 0
+
+    def __len__(self) -> int:
+        """メモリに保持しているエントリ数."""
+        return len(self._entries)
+
+    def make_key(self, text: str) -> str:
+        """キャッシュキーを作成.
+
+        Args:
+            text: 検索クエリ
+
+        Returns:
+            キャッシュキー（正規化したクエリの SHA-256）
+        """
+        payload = f"{self.model}\x00{self.get_dimension()}\x00{normalize_query(text)}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_dimension(self) -> int:
+        """ベクトルの次元数を返す.
+
+        Returns:
+            ベクトルの次元数（ラップしているプロバイダーと同じ）
+        """
+        return self.provider.get_dimension()
+
+    async def generate_embedding(self, text: str) -> list[float]:
+        """テキストからベクトルを生成（キャッシュがあれば再利用）.
+
+        Args:
+            text: ベクトル化するテキスト
+
+        Returns:
+            ベクトル（1536次元のリスト）
+        """
+        key = self.make_key(text)
+        embedding = self._get(key)
+        if embedding is not None:
+            self._record("hit")
+            if self._average_latency is not None:
+                query_embedding_cache_saved_seconds_counter.inc(self._average_latency)
+            return embedding
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self._record("miss")
+            task = asyncio.create_task(self._fetch(key, text))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._on_fetch_done(key, done))
+        else:
+            self._record("coalesced")
+
+        # 呼び出し元がタイムアウトしても API 呼び出しは続け、結果をキャッシュする
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, text: str) -> list[float]:
+        """API でベクトル化し、結果をキャッシュに追加.
+
+        Args:
+            key: キャッシュキー
+            text: ベクトル化するテキスト
+
+        Returns:
+            ベクトル
+        """
+        start_time = time.perf_counter()
+        embedding = await self.provider.generate_embedding(text)
+        latency = time.perf_counter() - start_time
+        if self._average_latency is None:
+            self._average_latency = latency
+        else:
+            self._average_latency += _LATENCY_SMOOTHING * (
+                latency - self._average_latency
+            )
+        self._put(key, embedding)
+        return embedding
+
+    def _on_fetch_done(self, key: str, task: asyncio.Task[list[float]]) -> None:
+        """API 呼び出しの完了時に実行中の一覧から取り除く.
+
+        Args:
+            key: キャッシュキー
+            task: 完了したタスク
+        """
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            # 待っている呼び出し元がいない場合も例外を回収する（未回収の警告を防ぐ）
+            logger.debug(f"Query embedding failed: {task.exception()}")
+
+    def _record(self, result: str) -> None:
+        """参照結果をメトリクスに記録.
+
+        Args:
+            result: 'hit', 'coalesced', 'miss' のいずれか
+        """
+        self._requests += 1
+        if result == "hit":
+            self._hits += 1
+        query_embedding_cache_requests_counter.labels(result=result).inc()
+        query_embedding_cache_hit_ratio.set(self._hits / self._requests)
+
+    def _get(self, key: str) -> list[float] | None:
+        """メモリからベクトルを取得.
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            ベクトル（存在しないか期限切れの場合は None）
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        if entry[1] <= self.clock():
+            query_embedding_cache_size.set(len(self._entries))
+            return None
+        # 最近使用したものとして末尾に付け直す
+        self._entries[key] = entry
+        return entry[0]
+
+    def _put(self, key: str, embedding: list[float]) -> None:
+        """メモリにエントリを追加し、上限を超えた分を削除.
+
+        Args:
+            key: キャッシュキー
+            embedding: ベクトル
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = (embedding, self.clock() + self.ttl_seconds)
+
+        while len(self._entries) > self.max_entries:
+            # 先頭が最も長く使われていないエントリ
+            del self._entries[next(iter(self._entries))]
+        query_embedding_cache_size.set(len(self._entries))
@@ -0,0 +1,187 @@
+"""知識ベース検索（RAG）サービス.
+
+メンション・スレッド応答の前に知識ベースを検索し、関連するチャンクを
+プロンプトに注入するためのコンテキストを構築します。
+"""
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from ..config import Config
+from ..db.models import Message, MessageRole
+from .metrics import retrieval_duration
+
+if TYPE_CHECKING:
+    from ..db.base import KnowledgeBaseProtocol, SearchResult
+    from ..external.embedding import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_HEADER = (
+    "\n\n【参考情報（知識ベースから検索）】\n"
+    "以下はユーザーの発言に関連する可能性がある過去の会話や資料です。"
+    "関連する場合のみ参考にし、関係がなければ無視してください。\n"
+)
+
+
+class KnowledgeRetriever:
+    """知識ベース検索クラス.
+
+    ユーザーの発言をベクトル化して類似チャンクを取得する。
+    検索全体にハードタイムアウトを設け、超過・失敗時はコンテキストなしで
+    応答できるように空のリストを返す（応答を止めない）。
+    """
+
+    def __init__(
+        self,
+        db: KnowledgeBaseProtocol,
+        embedding_provider: EmbeddingProvider,
+        config: Config | None = None,
+    ):
+        """KnowledgeRetriever を初期化.
+
+        Args:
+            db: 知識ベースプロトコル（DIパターン）
+            embedding_provider: Embedding プロバイダー
+            config: 設定インスタンス（依存性注入、必須）
+
+        Raises:
+            ValueError: config が None の場合
+        """
+        if config is None:
+            raise ValueError("config parameter is required (DI pattern)")
+        self.db = db
+        self.embedding_provider = embedding_provider
+        self.config = config
+
+    async def retrieve(
+        self, query: str, channel_id: int | None = None
+    ) -> list[SearchResult]:
+        """発言に関連するチャンクを取得.
+
+        Args:
+            query: ユーザーの発言
+            channel_id: 検索対象を絞り込むチャンネルID（省略時は全体）
+
+        Returns:
+            検索結果のリスト（タイムアウト・エラー時は空のリスト）
+        """
+        if not query.strip():
+            return []
+
+        filters = {"channel_id": channel_id} if channel_id is not None else None
+        start_time = time.perf_counter()
+        outcome = "error"
+        try:
+            async with asyncio.timeout(self.config.RAG_TIMEOUT_SECONDS):
+                query_embedding = await self.embedding_provider.generate_embedding(
+                    query
+                )
+                results = await self.db.similarity_search(
+                    query_embedding=query_embedding,
+                    top_k=self.config.RAG_TOP_K,
+                    filters=filters,
+                )
+            outcome = "hit" if results else "empty"
+            return results
+        except TimeoutError:
+            outcome = "timeout"
+            logger.warning(
+                f"Knowledge base retrieval timed out "
+                f"({self.config.RAG_TIMEOUT_SECONDS}s), responding without context"
+            )
+            return []
+        except Exception as e:
+            logger.warning(
+                f"Knowledge base retrieval failed, responding without context: {e}"
+            )
+            return []
+        finally:
+            retrieval_duration.labels(outcome=outcome).observe(
+                time.perf_counter() - start_time
+            )
+
+    async def augment(
+        self,
+        query: str,
+        messages: list[Message],
+        system_prompt: str,
+        channel_id: int | None = None,
+    ) -> tuple[list[Message], str]:
+        """検索結果をプロンプトに注入する.
+
+        関連するチャンクが見つかった場合は、システムプロンプトにコンテキストを追加し、
+        会話履歴を直近の分だけに絞る（生の履歴全体の代わりに関連情報を送る）。
+        見つからない場合は会話履歴とシステムプロンプトをそのまま返す。
+
+        Args:
+            query: ユーザーの発言
+            messages: 会話履歴
+            system_prompt: システムプロンプト
+            channel_id: 検索対象を絞り込むチャンネルID（省略時は全体）
+
+        Returns:
+            (会話履歴, システムプロンプト) のタプル
+        """
+        results = await self.retrieve(query, channel_id=channel_id)
+        context = self.format_context(results)
+        if not context:
+            return messages, system_prompt
+
+        logger.debug(f"Injected {len(results)} knowledge base chunks into prompt")
+        return self.compact_history(messages), system_prompt + context
+
+    def format_context(self, results: list[SearchResult]) -> str:
+        """検索結果をシステムプロンプトに追加するテキストに整形.
+
+        Args:
+            results: 検索結果のリスト
+
+        Returns:
+            システムプロンプトに追加するテキスト（結果がない場合は空文字列）
+        """
+        if not results:
+            return ""
+
+        max_chars = self.config.RAG_MAX_CONTEXT_CHARS
+        sections: list[str] = []
+        used_chars = 0
+        for index, result in enumerate(results, start=1):
+            title = result.get("title") or "無題"
+            uri = result.get("uri")
+            heading = f"[{index}] {title}" + (f"（{uri}）" if uri else "")
+            content = result.get("content", "").strip()
+
+            # 上限を超える場合は残りの文字数分だけ含めて打ち切る
+            remaining = max_chars - used_chars - len(heading)
+            if remaining <= 0:
+                break
+            if len(content) > remaining:
+                content = content[:remaining] + "…"
+
+            sections.append(f"{heading}\n{content}")
+            used_chars += len(heading) + len(content)
+
+        if not sections:
+            return ""
+        return CONTEXT_HEADER + "\n\n".join(sections)
+
+    def compact_history(self, messages: list[Message]) -> list[Message]:
+        """コンテキスト注入時に送信する直近の会話履歴を返す.
+
+        Args:
+            messages: 会話履歴
+
+        Returns:
+            直近 RAG_HISTORY_MESSAGES 件の会話履歴（先頭はユーザーの発言）
+        """
+        # ⚠️ 改善（設定値の検証）: messages[-0:] は全件になるため、
+        # 1 未満の設定値でも最新のメッセージ（現在の質問）だけは送る
+        limit = max(1, self.config.RAG_HISTORY_MESSAGES)
+        history = messages[-limit:]
+        # Anthropic API では最初のメッセージがユーザーの発言である必要がある
+        while len(history) > 1 and history[0].role != MessageRole.USER:
+            history = history[1:]
+        return history
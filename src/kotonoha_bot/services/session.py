@@ -1,12 +1,21 @@
 """セッション管理."""
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING
 
 from ..config import Config
 from ..db.base import DatabaseProtocol
 from ..db.models import ChatSession, MessageRole, SessionType
+from .metrics import (
+    session_cache_evictions_counter,
+    session_cache_hits_counter,
+    session_cache_misses_counter,
+    session_cache_size,
+)
 
 if TYPE_CHECKING:
     pass
@@ -18,6 +27,11 @@ class SessionManager:
     """セッション管理クラス.
 
     メモリ内のセッションとPostgreSQLの同期を管理する。
+
+    メモリ内のセッションは LRU + アイドル TTL のキャッシュとして保持し、
+    セッション数（MAX_SESSIONS）とメッセージ総数（MAX_SESSION_MESSAGES）の
+    上限を超えた場合は最も長く使われていないセッションを DB に書き戻してから解放する。
+    処理中のリクエストが使用しているセッション（pinned）は解放しない。
     """
 
     def __init__(
@@ -38,7 +52,16 @@ class SessionManager:
             raise ValueError("config parameter is required (DI pattern)")
         self.db = db
         self.config = config
+        # LRU 順（先頭が最も長く使われていない）のセッションキャッシュ
+        # dict の挿入順を利用し、使用時に末尾へ付け直すことで O(1) で LRU を維持する
         self.sessions: dict[str, ChatSession] = {}
+        # セッションごとの計上済みメッセージ数と合計（O(1) で予算を判定するため）
+        self._message_counts: dict[str, int] = {}
+        self._message_total = 0
+        # 処理中のリクエストが使用しているセッションの参照カウント（解放の対象外）
+        self._pins: dict[str, int] = {}
+        # 実行中のPostgreSQLからの読み込み（同じキーの同時呼び出しで共有する）
+        self._loading: dict[str, asyncio.Task[ChatSession | None]] = {}
         self._initialized = False
 
     @property
@@ -63,29 +86,50 @@ class SessionManager:
     async def _load_active_sessions(self) -> None:
         """アクティブなセッションをPostgreSQLから読み込み."""
         try:
-            all_sessions = await self.db.load_all_sessions()
-            now = datetime.now(UTC)
+            # ⚠️ 改善（起動時間・メモリ）: タイムアウトの判定と件数の上限を SQL 側で行い、
+            # ヘッダーのみを読み込む。メッセージ本文は最初の get_session で読み込む
             timeout = timedelta(hours=self.config.SESSION_TIMEOUT_HOURS)
+            headers = await self.db.load_session_headers(
+                active_since=datetime.now(UTC) - timeout,
+                limit=self.config.MAX_SESSIONS,
+            )
 
-            for session in all_sessions:
-                # タイムアウトしていないセッションのみメモリに読み込む
-                # last_active_at がタイムゾーン付きの場合はそのまま比較
-                # タイムゾーンなしの場合は UTC として扱う
-                last_active = session.last_active_at
-                if last_active.tzinfo is None:
-                    last_active = last_active.replace(tzinfo=UTC)
-                if now - last_active < timeout:
-                    self.sessions[session.session_key] = session
-                    logger.info(f"Loaded session: {session.session_key}")
+            # LRU 順（古いものが先頭）でキャッシュに追加
+            for session in reversed(headers):
+                self._put(session)
+                logger.debug(f"Loaded session header: {session.session_key}")
 
             logger.info(f"Loaded {len(self.sessions)} active sessions")
         except Exception as e:
             logger.error(f"Failed to load sessions: {e}")
 
+    @asynccontextmanager
+    async def pinned(self, session_key: str) -> AsyncIterator[None]:
+        """リクエストの処理中、セッションをキャッシュから解放しないようにする.
+
+        リクエストは並行して処理されるため、処理中のセッションが他のリクエストによる
+        上限の適用で書き戻し・解放されると、ハンドラーが保持しているセッションが
+        キャッシュから切り離され、以降のメッセージが失われる。
+        ブロックの間は参照カウントを増やし、解放の対象から除外する。
+
+        Args:
+            session_key: セッションキー
+        """
+        self._pins[session_key] = self._pins.get(session_key, 0) + 1
+        try:
+            yield
+        finally:
+            remaining = self._pins[session_key] - 1
+            if remaining:
+                self._pins[session_key] = remaining
+            else:
+                del self._pins[session_key]
+
     async def get_session(self, session_key: str) -> ChatSession | None:
         """セッションを取得.
 
         メモリ内にあればそれを返し、なければPostgreSQLから復元を試みる。
+        起動時にヘッダーのみ読み込んだセッションは、ここでメッセージ本文を読み込む。
 
         Args:
             session_key: セッションキー
@@ -94,17 +138,21 @@ class SessionManager:
             セッション（見つからない場合は None）
         """
         # メモリ内を確認
-        if session_key in self.sessions:
-            return self.sessions[session_key]
-
-        # PostgreSQLから復元を試みる
-        session = await self.db.load_session(session_key)
-        if session:
-            self.sessions[session_key] = session
-            logger.info(f"Restored session from DB: {session_key}")
+        session = self.sessions.get(session_key)
+        if session is not None and session.messages_loaded:
+            self._touch(session_key)
+            session_cache_hits_counter.inc()
             return session
 
-        return None
+        # ⚠️ 改善（同時実行）: 同じキーの読み込みは1回にまとめ、全ての呼び出し元に
+        # 同じオブジェクトを返す（別々に読み込むと、片方に追加したメッセージが失われる）
+        task = self._loading.get(session_key)
+        if task is None:
+            session_cache_misses_counter.inc()
+            task = asyncio.create_task(self._load(session_key))
+            self._loading[session_key] = task
+            task.add_done_callback(lambda done: self._on_load_done(session_key, done))
+        return await asyncio.shield(task)
 
     async def create_session(
         self, session_key: str, session_type: SessionType, **kwargs
@@ -123,8 +171,9 @@ class SessionManager:
             session_key=session_key, session_type=session_type, **kwargs
         )
 
-        self.sessions[session_key] = session
+        self._put(session)
         await self.db.save_session(session)
+        await self._enforce_limits(protect_key=session_key)
         logger.info(f"Created session: {session_key}")
 
         return session
@@ -147,8 +196,12 @@ class SessionManager:
             raise KeyError(f"Session not found: {session_key}")
 
         session.add_message(role, content)
+        self._touch(session_key)
         logger.debug(f"Added message to session: {session_key}")
 
+        if self._message_total > self.config.MAX_SESSION_MESSAGES:
+            await self._enforce_limits(protect_key=session_key)
+
     async def save_session(self, session_key: str) -> None:
         """セッションをPostgreSQLに保存.
 
@@ -162,14 +215,14 @@ class SessionManager:
         if not session:
             raise KeyError(f"Session not found: {session_key}")
 
-        await self.db.save_session(session)
+        await self._write_back(session)
         logger.debug(f"Saved session to DB: {session_key}")
 
     async def save_all_sessions(self) -> None:
         """全セッションをPostgreSQLに保存."""
-        for session_key, session in self.sessions.items():
+        for session_key, session in list(self.sessions.items()):
             try:
-                await self.db.save_session(session)
+                await self._write_back(session)
                 logger.debug(f"Saved session: {session_key}")
             except Exception as e:
                 logger.error(f"Failed to save session {session_key}: {e}")
@@ -182,21 +235,200 @@ class SessionManager:
         timeout = timedelta(hours=self.config.SESSION_TIMEOUT_HOURS)
 
         to_remove = []
-        for session_key, session in self.sessions.items():
-            last_active = session.last_active_at
-            if last_active.tzinfo is None:
-                last_active = last_active.replace(tzinfo=UTC)
-            if now - last_active > timeout:
+        for session_key, session in list(self.sessions.items()):
+            if session_key in self._pins:
+                continue
+            if self._is_idle(session, now, timeout):
                 # PostgreSQLに保存してからメモリから削除
                 try:
-                    await self.db.save_session(session)
+                    await self._write_back(session)
                     to_remove.append(session_key)
                 except Exception as e:
                     logger.error(f"Failed to save session before removal: {e}")
 
         for session_key in to_remove:
-            del self.sessions[session_key]
+            # 書き戻し中に使用開始された場合は解放しない
+            if session_key in self._pins:
+                continue
+            self._remove(session_key)
+            session_cache_evictions_counter.labels(reason="idle").inc()
             logger.info(f"Removed old session: {session_key}")
 
         if to_remove:
             logger.info(f"Cleaned up {len(to_remove)} old sessions")
+
+    async def _enforce_limits(self, protect_key: str | None = None) -> None:
+        """キャッシュの上限を適用し、超過分を LRU 順に書き戻して解放する.
+
+        セッション数・メッセージ総数の上限を超えている間、またはアイドル TTL を
+        過ぎたセッションが LRU の先頭にある間、先頭から順に解放する。
+        処理中のリクエストが使用しているセッション（pinned）は解放しない。
+
+        Args:
+            protect_key: 解放対象から除外するセッションキー（直前に使用したもの）
+        """
+        now = datetime.now(UTC)
+        timeout = timedelta(hours=self.config.SESSION_TIMEOUT_HOURS)
+
+        for session_key in list(self.sessions):
+            if session_key == protect_key or session_key in self._pins:
+                continue
+            session = self.sessions[session_key]
+
+            if len(self.sessions) > self.config.MAX_SESSIONS:
+                reason = "capacity"
+            elif self._message_total > self.config.MAX_SESSION_MESSAGES:
+                reason = "messages"
+            elif self._is_idle(session, now, timeout):
+                reason = "idle"
+            else:
+                # LRU の先頭が上限内かつアイドルでなければ、以降も解放不要
+                break
+
+            # PostgreSQLに書き戻してからメモリから削除
+            try:
+                await self._write_back(session)
+            except Exception as e:
+                logger.error(f"Failed to save session before eviction: {e}")
+                continue
+
+            # 書き戻し中に置き換え・削除・使用開始された場合は何もしない
+            if (
+                self.sessions.get(session_key) is not session
+                or session_key in self._pins
+            ):
+                continue
+
+            self._remove(session_key)
+            session_cache_evictions_counter.labels(reason=reason).inc()
+            logger.info(f"Evicted session ({reason}): {session_key}")
+
+    async def _load(self, session_key: str) -> ChatSession | None:
+        """セッションをPostgreSQLから読み込み、キャッシュに追加する.
+
+        メモリ内にないセッションの復元と、ヘッダーのみのセッションのメッセージ本文の
+        読み込みの両方に使う。
+
+        Args:
+            session_key: セッションキー
+
+        Returns:
+            メッセージを読み込んだセッション（DBに存在しない場合は None）
+        """
+        loaded = await self.db.load_session(session_key)
+
+        # 読み込み中に作成されたセッションがあれば、そちらを優先する
+        current = self.sessions.get(session_key)
+        if current is not None and current.messages_loaded:
+            return current
+
+        if loaded is None:
+            if current is not None:
+                # DBから削除されていたヘッダーのみのセッション
+                self._remove(session_key)
+            return None
+
+        self._put(loaded)
+        await self._enforce_limits(protect_key=session_key)
+        if current is not None:
+            logger.info(f"Hydrated session from DB: {session_key}")
+        else:
+            logger.info(f"Restored session from DB: {session_key}")
+        return loaded
+
+    def _on_load_done(
+        self, session_key: str, task: asyncio.Task[ChatSession | None]
+    ) -> None:
+        """読み込みの完了時に実行中の一覧から取り除く.
+
+        Args:
+            session_key: セッションキー
+            task: 完了したタスク
+        """
+        if self._loading.get(session_key) is task:
+            del self._loading[session_key]
+        if not task.cancelled() and task.exception() is not None:
+            # 待っている呼び出し元がいない場合も例外を回収する（未回収の警告を防ぐ）
+            logger.debug(f"Failed to load session {session_key}: {task.exception()}")
+
+    async def _write_back(self, session: ChatSession) -> None:
+        """セッションをPostgreSQLに書き戻す.
+
+        ヘッダーのみのセッションは読み込み後に変更されていないため書き戻さない。
+
+        Args:
+            session: 書き戻すセッション
+        """
+        if not session.messages_loaded:
+            return
+        await self.db.save_session(session)
+
+    def _put(self, session: ChatSession) -> None:
+        """セッションをキャッシュに追加する（最近使用したものとして扱う）.
+
+        Args:
+            session: 追加するセッション
+        """
+        session_key = session.session_key
+        if session_key in self.sessions:
+            self._remove(session_key)
+        self.sessions[session_key] = session
+        self._message_counts[session_key] = len(session.messages)
+        self._message_total += len(session.messages)
+        self._update_size_metrics()
+
+    def _touch(self, session_key: str) -> None:
+        """セッションを最近使用したものとして扱い、メッセージ数を再計上する.
+
+        Args:
+            session_key: セッションキー
+        """
+        session = self.sessions.pop(session_key)
+        self.sessions[session_key] = session
+        count = len(session.messages)
+        self._message_total += count - self._message_counts.get(session_key, 0)
+        self._message_counts[session_key] = count
+        self._update_size_metrics()
+
+    def _remove(self, session_key: str) -> None:
+        """セッションをキャッシュから削除する.
+
+        Args:
+            session_key: セッションキー
+        """
+        del self.sessions[session_key]
+        self._message_total -= self._message_counts.pop(session_key, 0)
+        self._update_size_metrics()
+
+    def _update_size_metrics(self) -> None:
+        """キャッシュサイズのメトリクスを更新する."""
+        session_cache_size.labels(unit="sessions").set(len(self.sessions))
+        session_cache_size.labels(unit="messages").set(self._message_total)
+
+    @staticmethod
+    def _is_idle(session: ChatSession, now: datetime, timeout: timedelta) -> bool:
+        """セッションがアイドル TTL を過ぎているかを判定する.
+
+        Args:
+            session: 判定するセッション
+            now: 現在時刻（UTC）
+            timeout: アイドル TTL
+
+        Returns:
+            アイドル TTL を過ぎている場合は True
+        """
+        return now - SessionManager._as_utc(session.last_active_at) > timeout
+
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        """タイムゾーンなしの日時を UTC として扱う.
+
+        Args:
+            value: 日時
+
+        Returns:
+            タイムゾーン付きの日時
+        """
+        if value.tzinfo is None:
+            return value.replace(tzinfo=UTC)
+        return value
@@ -0,0 +1,188 @@
+"""会話のローリングサマリー.
+
+長い会話では古いターンを判定用の軽量モデルで要約し、
+プロンプトには「要約 + 直近のターン」を送ることでプロンプトサイズを抑える。
+要約はセッションと一緒に永続化されるため、再起動後も引き継がれる。
+"""
+
+import asyncio
+import logging
+
+from ..config import Config
+from ..db.models import ChatSession, Message, MessageRole
+from ..utils.prompts import _load_prompt_from_markdown
+from .ai import AIProvider
+from .session import SessionManager
+
+logger = logging.getLogger(__name__)
+
+# プロンプトテンプレート（Markdownファイルから読み込む）
+SUMMARY_PROMPT_TEMPLATE = _load_prompt_from_markdown("session_summary_prompt.md")
+
+SUMMARY_HEADER = "\n\n【これまでの会話の要約】\n"
+
+
+class ConversationSummarizer:
+    """会話のローリングサマリーを管理するクラス.
+
+    要約対象のメッセージが SUMMARY_UPDATE_INTERVAL_TURNS ターン分たまるたびに、
+    バックグラウンドで要約を更新する（応答の生成は待たせない）。
+    """
+
+    def __init__(
+        self,
+        session_manager: SessionManager,
+        ai_provider: AIProvider,
+        config: Config | None = None,
+    ):
+        """ConversationSummarizer を初期化.
+
+        Args:
+            session_manager: セッションマネージャー
+            ai_provider: AIプロバイダー
+            config: 設定インスタンス（依存性注入、必須）
+
+        Raises:
+            ValueError: config が None の場合
+        """
+        if config is None:
+            raise ValueError("config parameter is required (DI pattern)")
+        self.session_manager = session_manager
+        self.ai_provider = ai_provider
+        self.config = config
+        self.model = self.config.EAVESDROP_JUDGE_MODEL
+        # 実行中の要約タスク（セッションキーごとに1つまで）
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def apply(
+        self, session: ChatSession, system_prompt: str
+    ) -> tuple[list[Message], str]:
+        """要約をプロンプトに反映する.
+
+        要約がある場合は、要約済みのメッセージを会話履歴から除き、
+        要約をシステムプロンプトに追加する。
+
+        Args:
+            session: セッション
+            system_prompt: システムプロンプト
+
+        Returns:
+            (会話履歴, システムプロンプト) のタプル
+        """
+        messages = session.get_conversation_history()
+        if not session.summary or session.summary_message_index <= 0:
+            return messages, system_prompt
+
+        # /chat reset などで要約済みの位置が履歴を超えた場合は要約を使わない
+        if session.summary_message_index >= len(messages):
+            return messages, system_prompt
+
+        return (
+            messages[session.summary_message_index :],
+            system_prompt + SUMMARY_HEADER + session.summary,
+        )
+
+    def schedule_update(self, session: ChatSession) -> None:
+        """必要であれば要約の更新をバックグラウンドで開始する.
+
+        Args:
+            session: セッション
+        """
+        session_key = session.session_key
+        if session_key in self._tasks:
+            return
+
+        end = self._summary_end_index(session)
+        if end is None:
+            return
+
+        task = asyncio.create_task(self._update_summary(session, end))
+        self._tasks[session_key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_key, None))
+
+    async def close(self) -> None:
+        """実行中の要約タスクの完了を待つ（Graceful Shutdown 用）."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def _summary_end_index(self, session: ChatSession) -> int | None:
+        """要約に含めるメッセージの終端インデックスを求める.
+
+        直近 SUMMARY_KEEP_RECENT_MESSAGES 件は要約せずにそのまま送る。
+        要約後の会話履歴がユーザーの発言から始まるように終端を調整する。
+
+        Args:
+            session: セッション
+
+        Returns:
+            終端インデックス（更新不要の場合は None）
+        """
+        start = min(session.summary_message_index, len(session.messages))
+        end = len(session.messages) - self.config.SUMMARY_KEEP_RECENT_MESSAGES
+        # 1ターン = ユーザーの発言 + Bot の応答
+        if end - start < self.config.SUMMARY_UPDATE_INTERVAL_TURNS * 2:
+            return None
+
+        while end > start and session.messages[end].role != MessageRole.USER:
+            end -= 1
+        if end <= start:
+            return None
+        return end
+
+    async def _update_summary(self, session: ChatSession, end: int) -> None:
+        """要約を更新して保存する.
+
+        Args:
+            session: セッション
+            end: 要約に含めるメッセージの終端インデックス
+        """
+        start = min(session.summary_message_index, len(session.messages))
+        target_messages = session.messages[start:end]
+        last_message = target_messages[-1]
+
+        prompt = SUMMARY_PROMPT_TEMPLATE.format(
+            previous_summary=session.summary or "（なし）",
+            conversation_log=self._format_conversation_log(target_messages),
+        )
+
+        try:
+            summary, token_info = await self.ai_provider.generate_response(
+                messages=[Message(role=MessageRole.USER, content=prompt)],
+                system_prompt="",
+                model=self.model,
+                max_tokens=self.config.SUMMARY_MAX_TOKENS,
+            )
+        except Exception as e:
+            logger.error(f"Failed to update summary for {session.session_key}: {e}")
+            return
+
+        # 要約中に履歴がリセット・アーカイブされた場合は反映しない
+        if len(session.messages) < end or session.messages[end - 1] is not last_message:
+            logger.debug(f"Session changed during summary: {session.session_key}")
+            return
+
+        session.summary = summary.strip()
+        session.summary_message_index = end
+        logger.info(
+            f"Updated summary for {session.session_key}: {end} messages, {token_info}"
+        )
+
+        try:
+            await self.session_manager.save_session(session.session_key)
+        except Exception as e:
+            logger.error(f"Failed to save summary for {session.session_key}: {e}")
+
+    def _format_conversation_log(self, messages: list[Message]) -> str:
+        """要約用に会話ログを整形.
+
+        Args:
+            messages: メッセージのリスト
+
+        Returns:
+            整形された会話ログ
+        """
+        lines = []
+        for message in messages:
+            speaker = "ユーザー" if message.role == MessageRole.USER else "Bot"
+            lines.append(f"{speaker}: {message.content}")
+        return "\n".join(lines)
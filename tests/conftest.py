@@ -87,6 +87,8 @@ async def _cleanup_test_data(db: PostgreSQLDatabase):
             await conn.execute("TRUNCATE knowledge_chunks CASCADE")
             await conn.execute("TRUNCATE knowledge_sources CASCADE")
             await conn.execute("TRUNCATE sessions CASCADE")
+            await conn.execute("TRUNCATE eavesdrop_judgement_cache")
+            await conn.execute("TRUNCATE knowledge_embedding_cache")
     except Exception:
         # プールが閉じられている場合など、エラーを無視
         pass
@@ -103,7 +103,14 @@ async def test_anthropic_provider_api_call_with_mock(
     assert call_args is not None
     assert call_args.kwargs["model"] == "claude-haiku-4-5"
     assert call_args.kwargs["max_tokens"] == 100
-    assert call_args.kwargs["system"] == "システムプロンプト"
+    # プロンプトキャッシュ有効時はキャッシュ指定付きのブロックとして渡される
+    assert call_args.kwargs["system"] == [
+        {
+            "type": "text",
+            "text": "システムプロンプト",
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
 
 
 @pytest.mark.asyncio
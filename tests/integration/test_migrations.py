@@ -328,7 +328,7 @@ async def test_migration_upgrade(
     # Alembicバージョンが記録されているか確認
     version = await get_alembic_version(test_db_url)
     assert version is not None, "Alembic version should be recorded"
-    assert version == "202601201940", f"Expected version 202601201940, got {version}"
+    assert version == "202610171500", f"Expected version 202610171500, got {version}"
 
 
 @pytest.mark.asyncio
@@ -487,10 +487,10 @@ async def test_migration_stamp(
 
     # 現在のバージョンを確認
     version_before = await get_alembic_version(test_db_url)
-    assert version_before == "202601201940"
+    assert version_before == "202610171500"
 
     # stampでバージョンを設定（同じバージョン）
-    await run_migration_stamp(alembic_cfg, "202601201940")
+    await run_migration_stamp(alembic_cfg, "202610171500")
 
     # バージョンが変わっていないことを確認
     version_after = await get_alembic_version(test_db_url)
@@ -512,7 +512,7 @@ async def test_migration_current(
 
     # マイグレーション適用後はバージョンが存在する
     version_after = await get_alembic_version(test_db_url)
-    assert version_after == "202601201940"
+    assert version_after == "202610171500"
 
 
 async def get_enum_types(test_db_url: str) -> list[str]:
@@ -735,6 +735,9 @@ async def test_migration_indexes(
     assert "idx_sources_metadata" in sources_indexes
     assert "idx_sources_status" in sources_indexes
     assert "idx_sources_type" in sources_indexes
+    assert "idx_sources_channel_id" in sources_indexes
+    assert "idx_sources_guild_id" in sources_indexes
+    assert "idx_sources_author_id" in sources_indexes
 
     # knowledge_chunksテーブルのインデックスを確認
     chunks_indexes = await get_indexes(test_db_url, "knowledge_chunks")
@@ -1003,7 +1006,7 @@ async def test_migration_revision_chain():
     assert head is not None, "Should have a head revision"
 
     # 現在のheadが期待されるrevision IDであることを確認
-    assert head == "202601201940", f"Expected head revision 202601201940, got {head}"
+    assert head == "202610171500", f"Expected head revision 202610171500, got {head}"
 
     # すべてのrevisionが到達可能であることを確認
     revisions = list(script_dir.walk_revisions())
@@ -1253,6 +1256,9 @@ async def test_migration_table_columns_complete(
             "last_archived_message_index",
             "created_at",
             "last_active_at",
+            "message_count",
+            "summary",
+            "summary_message_index",
         }
         assert sessions_column_names == expected_sessions_columns, (
             f"Sessions columns mismatch: {sessions_column_names} vs {expected_sessions_columns}"
@@ -1280,6 +1286,9 @@ async def test_migration_table_columns_complete(
             "metadata",
             "created_at",
             "updated_at",
+            "channel_id",
+            "guild_id",
+            "author_id",
         }
         assert sources_column_names == expected_sources_columns, (
             f"Sources columns mismatch: {sources_column_names} vs {expected_sources_columns}"
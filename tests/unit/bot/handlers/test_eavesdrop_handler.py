@@ -1,6 +1,7 @@
 """聞き耳型ハンドラーの詳細テスト."""
 
 import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock
 
 import discord
@@ -87,7 +88,7 @@ def mock_request_queue():
     """モックRequestQueue."""
     queue = MagicMock(spec=RequestQueue)
 
-    async def enqueue_side_effect(_priority, func, *args, **kwargs):
+    async def enqueue_side_effect(_priority, func, *args, order_key=None, **kwargs):  # noqa: ARG001
         result = await func(*args, **kwargs)
         future = asyncio.Future()
         future.set_result(result)
@@ -103,6 +104,9 @@ def mock_config():
     config = MagicMock()
     config.EAVESDROP_BUFFER_SIZE = 20
     config.EAVESDROP_MIN_MESSAGES = 3
+    # メッセージごとに判定する（待機しない）
+    config.EAVESDROP_DEBOUNCE_SECONDS = 0
+    config.EAVESDROP_DEBOUNCE_MAX_DELAY_SECONDS = 0
     return config
 
 
@@ -317,6 +321,8 @@ class TestEavesdropHandlerHandle:
         eavesdrop_handler.request_queue.enqueue.assert_called_once()
         call_args = eavesdrop_handler.request_queue.enqueue.call_args
         assert call_args[0][0] == RequestPriority.EAVESDROP
+        # 同じチャンネルのリクエストは到着順に処理される
+        assert call_args.kwargs["order_key"] == "eavesdrop:777888999"
 
     @pytest.mark.asyncio
     async def test_handle_queue_error_fallback(self, eavesdrop_handler):
@@ -339,3 +345,98 @@ class TestEavesdropHandlerHandle:
 
         # フォールバック処理が実行されたことを確認
         eavesdrop_handler._process.assert_called_once_with(mock_message)
+
+
+class TestEavesdropHandlerDebounce:
+    """判定の待機（連続したメッセージのまとめ）のテスト."""
+
+    @staticmethod
+    def _create_message() -> MagicMock:
+        mock_message = MagicMock(spec=discord.Message)
+        mock_message.author = MagicMock()
+        mock_message.author.bot = False
+        mock_message.channel = MagicMock()
+        mock_message.channel.id = 777888999
+        mock_message.channel.send = AsyncMock()
+        return mock_message
+
+    @pytest.mark.asyncio
+    async def test_burst_is_evaluated_once(
+        self, eavesdrop_handler, mock_config, mock_buffer, mock_llm_judge
+    ):
+        """連続したメッセージは最新の会話ログで1回だけ判定される."""
+        mock_config.EAVESDROP_DEBOUNCE_SECONDS = 0.05
+        mock_config.EAVESDROP_DEBOUNCE_MAX_DELAY_SECONDS = 10.0
+        mock_buffer.get_recent_messages = MagicMock(
+            return_value=[MagicMock(), MagicMock(), MagicMock()]
+        )
+        mock_llm_judge.generate_response = AsyncMock(return_value=None)
+        messages = [self._create_message() for _ in range(5)]
+
+        for message in messages:
+            await eavesdrop_handler.handle(message)
+
+        # 全てのメッセージは即座に会話ログに追加される
+        assert mock_buffer.add_message.call_count == 5
+        # 待機中は判定しない
+        eavesdrop_handler.request_queue.enqueue.assert_not_called()
+
+        await asyncio.sleep(0.2)
+
+        # 最新のメッセージで1回だけ判定される
+        eavesdrop_handler.request_queue.enqueue.assert_called_once()
+        call_args = eavesdrop_handler.request_queue.enqueue.call_args
+        assert call_args[0][2] is messages[-1]
+        mock_llm_judge.generate_response.assert_called_once()
+        assert not eavesdrop_handler._debounce_tasks
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_pending_evaluations(
+        self, eavesdrop_handler, mock_config
+    ):
+        """close は待機中の判定を取り消し、終了するまで待つ."""
+        mock_config.EAVESDROP_DEBOUNCE_SECONDS = 60.0
+        mock_config.EAVESDROP_DEBOUNCE_MAX_DELAY_SECONDS = 60.0
+
+        await eavesdrop_handler.handle(self._create_message())
+        pending = eavesdrop_handler._debounce_tasks[777888999]
+
+        await eavesdrop_handler.close()
+
+        assert pending.cancelled()
+        assert not eavesdrop_handler._debounce_tasks
+        assert not eavesdrop_handler._debounce_started_at
+        assert not eavesdrop_handler._tasks
+        eavesdrop_handler.request_queue.enqueue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_max_delay_limits_wait(
+        self, eavesdrop_handler, mock_config, mock_buffer
+    ):
+        """最大待機時間を過ぎている場合は待たずに判定する."""
+        mock_config.EAVESDROP_DEBOUNCE_SECONDS = 60.0
+        mock_config.EAVESDROP_DEBOUNCE_MAX_DELAY_SECONDS = 1.0
+        mock_buffer.get_recent_messages = MagicMock(return_value=[])
+        # 最初のメッセージから最大待機時間が経過している
+        eavesdrop_handler._debounce_started_at[777888999] = time.monotonic() - 5
+
+        await eavesdrop_handler.handle(self._create_message())
+        await asyncio.sleep(0.05)
+
+        eavesdrop_handler.request_queue.enqueue.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_same_snapshot_is_not_evaluated_twice(
+        self, eavesdrop_handler, mock_buffer, mock_llm_judge
+    ):
+        """同じ会話ログのスナップショットは2回判定しない."""
+        mock_buffer.get_recent_messages = MagicMock(
+            return_value=[MagicMock(), MagicMock(), MagicMock()]
+        )
+        mock_llm_judge.generate_response = AsyncMock(return_value=None)
+        message = self._create_message()
+
+        await eavesdrop_handler._evaluate(message)
+        await eavesdrop_handler._evaluate(message)
+
+        mock_llm_judge.generate_response.assert_called_once()
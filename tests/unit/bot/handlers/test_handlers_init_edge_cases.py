@@ -35,6 +35,7 @@ def mock_db():
     """モックデータベース."""
     db = MagicMock()
     db.load_all_sessions = AsyncMock(return_value=[])
+    db.load_session_headers = AsyncMock(return_value=[])
     db.save_session = AsyncMock()
     return db
 
@@ -47,6 +48,11 @@ def mock_config():
     config.EAVESDROP_BUFFER_SIZE = 20
     config.SESSION_TIMEOUT_HOURS = 24
     config.MAX_SESSIONS = 100
+    config.MAX_SESSION_MESSAGES = 5000
+    config.REQUEST_QUEUE_MAX_CONCURRENCY = 4
+    config.EAVESDROP_JUDGE_CACHE_SIZE = 1024
+    config.EAVESDROP_JUDGE_CACHE_TTL_SECONDS = 300
+    config.EAVESDROP_JUDGE_CACHE_PERSISTENT = False
     return config
 
 
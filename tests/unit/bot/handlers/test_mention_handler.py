@@ -61,7 +61,7 @@ def mock_request_queue():
     """モックRequestQueue."""
     queue = MagicMock(spec=RequestQueue)
 
-    async def enqueue_side_effect(_priority, func, *args, **kwargs):
+    async def enqueue_side_effect(_priority, func, *args, order_key=None, **kwargs):  # noqa: ARG001
         result = await func(*args, **kwargs)
         future = asyncio.Future()
         future.set_result(result)
@@ -340,6 +340,43 @@ class TestMentionHandlerProcess:
             or error_message == ErrorMessages.GENERIC
         )
 
+    @pytest.mark.asyncio
+    async def test_process_with_retriever(self, mention_handler, mock_session_manager):
+        """知識ベース検索がある場合は検索結果をプロンプトに注入する."""
+        mock_message = MagicMock(spec=discord.Message)
+        mock_message.author = MagicMock()
+        mock_message.author.id = 987654321
+        mock_message.content = "<@123456789> 前に話したこと覚えてる？"
+        mock_message.mentions = [mention_handler.bot.user]
+        mock_message.guild = MagicMock()
+        mock_message.guild.id = 111222333
+        mock_message.channel = MagicMock()
+        mock_message.channel.id = 999888777
+        typing_context = AsyncMock()
+        typing_context.__aenter__ = AsyncMock(return_value=None)
+        typing_context.__aexit__ = AsyncMock(return_value=None)
+        mock_message.channel.typing = MagicMock(return_value=typing_context)
+        mock_message.reply = AsyncMock()
+        mock_message.channel.send = AsyncMock()
+
+        session = MagicMock(spec=ChatSession)
+        session.get_conversation_history = MagicMock(return_value=["full"])
+        mock_session_manager.get_session = AsyncMock(return_value=session)
+
+        retriever = MagicMock()
+        retriever.augment = AsyncMock(return_value=(["recent"], "SYSTEM+CONTEXT"))
+        mention_handler.retriever = retriever
+
+        await mention_handler._process(mock_message)
+
+        retriever.augment.assert_called_once()
+        args = retriever.augment.call_args
+        assert args.args[0] == "前に話したこと覚えてる？"
+        assert args.kwargs["channel_id"] == 999888777
+        mention_handler.ai_provider.generate_response.assert_called_once_with(
+            messages=["recent"], system_prompt="SYSTEM+CONTEXT"
+        )
+
 
 class TestMentionHandlerHandle:
     """handle メソッドのテスト."""
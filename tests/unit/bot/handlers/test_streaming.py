@@ -0,0 +1,141 @@
+"""ストリーミング応答の Discord 送信のテスト."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from kotonoha_bot.bot.handlers.streaming import StreamingReply, stream_reply
+from kotonoha_bot.db.models import Message, MessageRole
+from kotonoha_bot.services.ai import TokenInfo
+
+
+class FakeClock:
+    """テスト用の時計."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _recorder():
+    """送信・編集の呼び出しを記録する関数を作成."""
+    calls: list[tuple[str, int, str]] = []
+
+    async def send(index: int, text: str):
+        calls.append(("send", index, text))
+        return MagicMock(name=f"message{index}")
+
+    async def edit(index: int, _message, text: str):
+        calls.append(("edit", index, text))
+
+    return calls, send, edit
+
+
+@pytest.mark.asyncio
+async def test_first_delta_is_sent_immediately():
+    """最初のテキストが届いた時点で1通目を送信する."""
+    calls, send, edit = _recorder()
+    reply = StreamingReply(send, edit, edit_interval=1.0, clock=FakeClock())
+
+    await reply.append("こんにちは")
+
+    assert calls == [("send", 0, "こんにちは")]
+
+
+@pytest.mark.asyncio
+async def test_edits_are_rate_limited():
+    """編集は edit_interval ごとにまとめて行い、最後に残りを反映する."""
+    calls, send, edit = _recorder()
+    clock = FakeClock()
+    reply = StreamingReply(send, edit, edit_interval=1.0, clock=clock)
+
+    await reply.append("a")
+    clock.now = 0.5
+    await reply.append("b")
+    await reply.append("c")
+    clock.now = 1.2
+    await reply.append("d")
+    clock.now = 1.3
+    await reply.append("e")
+    await reply.finish()
+
+    assert calls == [
+        ("send", 0, "a"),
+        ("edit", 0, "abcd"),
+        ("edit", 0, "abcde"),
+    ]
+    assert reply.text == "abcde"
+
+
+@pytest.mark.asyncio
+async def test_rolls_over_at_max_length():
+    """最大文字数を超えた分は区切りの良い位置で新しいメッセージに送る."""
+    calls, send, edit = _recorder()
+    reply = StreamingReply(send, edit, max_length=10, clock=FakeClock())
+
+    await reply.append("12345。")
+    await reply.append("6789012345")
+    await reply.finish()
+
+    assert calls == [
+        ("send", 0, "12345。"),
+        ("send", 1, "6789012345"),
+    ]
+    assert reply.text == "12345。6789012345"
+    assert len(reply.messages) == 2
+
+
+@pytest.mark.asyncio
+async def test_whitespace_only_delta_is_not_sent():
+    """空白だけのテキストは送信しない."""
+    calls, send, edit = _recorder()
+    reply = StreamingReply(send, edit, clock=FakeClock())
+
+    await reply.append("\n")
+    await reply.finish()
+
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_stream_reply_posts_embed_and_returns_text():
+    """1通目を Embed で返信し、応答テキストとトークン使用情報を返す."""
+    token_info = TokenInfo(
+        input_tokens=10,
+        output_tokens=5,
+        total_tokens=15,
+        model_used="claude-haiku-4-5",
+        latency_ms=100,
+    )
+
+    async def stream_response(**_kwargs):
+        yield "テスト"
+        yield "応答"
+        yield token_info
+
+    provider = MagicMock()
+    provider.stream_response = stream_response
+    provider.get_last_used_model = MagicMock(return_value="claude-haiku-4-5")
+    provider.get_rate_limit_usage = MagicMock(return_value=0.5)
+    sent = MagicMock()
+    sent.edit = AsyncMock()
+    reply = AsyncMock(return_value=sent)
+    channel = MagicMock()
+    channel.send = AsyncMock()
+
+    text, result = await stream_reply(
+        provider,
+        [Message(role=MessageRole.USER, content="質問")],
+        "SYSTEM",
+        reply=reply,
+        channel=channel,
+        edit_interval=0.0,
+    )
+
+    assert text == "テスト応答"
+    assert result is token_info
+    assert reply.call_args.kwargs["embed"].description == "テスト"
+    assert sent.edit.call_args.kwargs["embed"].description == "テスト応答"
+    channel.send.assert_not_called()
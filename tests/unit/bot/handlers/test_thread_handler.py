@@ -77,7 +77,7 @@ def mock_request_queue():
     """モックRequestQueue."""
     queue = MagicMock(spec=RequestQueue)
 
-    async def enqueue_side_effect(_priority, func, *args, **kwargs):
+    async def enqueue_side_effect(_priority, func, *args, order_key=None, **kwargs):  # noqa: ARG001
         result = await func(*args, **kwargs)
         future = asyncio.Future()
         future.set_result(result)
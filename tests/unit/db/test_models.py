@@ -196,6 +196,8 @@ class TestChatSession:
         original.add_message(MessageRole.USER, "テストメッセージ")
         original.version = 5
         original.last_archived_message_index = 2
+        original.summary = "これまでの要約"
+        original.summary_message_index = 1
 
         dict_repr = original.to_dict()
         restored = ChatSession.from_dict(dict_repr)
@@ -209,6 +211,8 @@ class TestChatSession:
         assert (
             restored.last_archived_message_index == original.last_archived_message_index
         )
+        assert restored.summary == "これまでの要約"
+        assert restored.summary_message_index == 1
 
     def test_chat_session_default_values(self):
         """デフォルト値が正しく設定される."""
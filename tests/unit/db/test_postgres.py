@@ -137,6 +137,59 @@ async def test_postgres_db_similarity_search(postgres_db):
     assert results[0]["similarity"] > 0.0
 
 
+@pytest.mark.asyncio
+async def test_postgres_db_similarity_search_many(postgres_db):
+    """複数クエリの一括検索がクエリごとの検索と同じ結果を返すこと"""
+    source_id = await postgres_db.save_source(
+        source_type="discord_session",
+        title="テストソース",
+        uri=None,
+        metadata={},
+    )
+
+    def unit_vector(*indexes: int) -> list[float]:
+        vector = [0.0] * 1536
+        for index in indexes:
+            vector[index] = 1.0
+        return vector
+
+    embeddings = {
+        "first": unit_vector(0),
+        "second": unit_vector(1),
+        "shared": unit_vector(0, 1),
+    }
+    chunk_ids = {}
+    async with postgres_db.pool.acquire() as conn:
+        for name, embedding in embeddings.items():
+            chunk_ids[name] = await postgres_db.save_chunk(
+                source_id=source_id,
+                content=f"{name} のチャンク",
+                location={},
+                token_count=5,
+            )
+            await conn.execute(
+                "UPDATE knowledge_chunks SET embedding = $2::halfvec(1536) WHERE id = $1",
+                chunk_ids[name],
+                embedding,
+            )
+
+    queries = [unit_vector(0), unit_vector(1)]
+    results = await postgres_db.similarity_search_many(
+        queries, top_k=2, apply_threshold=False
+    )
+
+    assert [[r["chunk_id"] for r in result] for result in results] == [
+        [chunk_ids["first"], chunk_ids["shared"]],
+        [chunk_ids["second"], chunk_ids["shared"]],
+    ]
+    for query, result in zip(queries, results, strict=True):
+        single = await postgres_db.similarity_search(
+            query, top_k=2, apply_threshold=False
+        )
+        assert result == single
+    assert await postgres_db.similarity_search_many([]) == []
+
+
 @pytest.mark.asyncio
 async def test_similarity_search_compatibility(postgres_db):
     """similarity_searchメソッドの互換性確認テスト
@@ -242,6 +295,144 @@ async def test_postgres_db_similarity_search_with_filters(postgres_db):
     assert len(results_empty) == 0
 
 
+@pytest.mark.asyncio
+async def test_postgres_db_save_source_filter_columns(postgres_db):
+    """ソースの保存時に metadata からフィルタ用のカラムが埋められること"""
+    source_id = await postgres_db.save_source(
+        source_type="discord_session",
+        title="フィルタ用カラムのテスト",
+        uri=None,
+        metadata={"channel_id": "123", "guild_id": 456, "user_id": 789},
+    )
+    other_id = await postgres_db.save_source(
+        source_type="document_file",
+        title="IDなし",
+        uri=None,
+        metadata={"channel_id": "not-a-number"},
+    )
+
+    async with postgres_db.pool.acquire() as conn:
+        row = await conn.fetchrow(
+            "SELECT channel_id, guild_id, author_id FROM knowledge_sources WHERE id = $1",
+            source_id,
+        )
+        other = await conn.fetchrow(
+            "SELECT channel_id, guild_id, author_id FROM knowledge_sources WHERE id = $1",
+            other_id,
+        )
+
+    assert dict(row) == {"channel_id": 123, "guild_id": 456, "author_id": 789}
+    assert dict(other) == {"channel_id": None, "guild_id": None, "author_id": None}
+
+
+def _explain_rows(rows: int) -> str:
+    """EXPLAIN (FORMAT JSON) の結果"""
+    return f'[{{"Plan": {{"Plan Rows": {rows}}}}}]'
+
+
+def test_postgres_db_build_filter_clause():
+    """フィルタ条件が指定した番号から始まるパラメータの条件句になること"""
+    db = PostgreSQLDatabase(connection_string="postgresql://user:pw@localhost/db")
+
+    clause, params = db._build_filter_clause(
+        {"source_type": "discord_session", "channel_id": "123"}, 2
+    )
+
+    assert clause == " AND s.type = $2 AND s.channel_id = $3"
+    assert params == ["discord_session", 123]
+    # user_id は投稿者（author_id カラム）で絞り込む
+    assert db._build_filter_clause({"guild_id": 1, "user_id": 2}, 4) == (
+        " AND s.guild_id = $4 AND s.author_id = $5",
+        [1, 2],
+    )
+    assert db._build_filter_clause(None, 2) == ("", [])
+    with pytest.raises(ValueError, match="Invalid filter keys"):
+        db._build_filter_clause({"guild": 1}, 2)
+    with pytest.raises(ValueError, match="Invalid channel_id"):
+        db._build_filter_clause({"channel_id": "abc"}, 2)
+
+
+@pytest.mark.asyncio
+async def test_postgres_db_configure_filtered_scan():
+    """フィルタの選択率に応じて ef_search を引き上げ、反復スキャンを有効にすること"""
+    from unittest.mock import AsyncMock
+
+    db = PostgreSQLDatabase(connection_string="postgresql://user:pw@localhost/db")
+    conn = AsyncMock()
+    # 全体 100,000 行のうち 100 行（0.1%）に絞り込まれるフィルタ
+    conn.fetchval = AsyncMock(side_effect=[100_000.0, _explain_rows(100), "0.8.0"])
+
+    mode = await db._configure_filtered_scan(conn, {"channel_id": 123}, 10)
+
+    assert mode == "iterative"
+    # ef_search と反復スキャンは 1 回のクエリでまとめて設定する
+    conn.execute.assert_awaited_once()
+    query, ef_search = conn.execute.await_args.args
+    assert "hnsw.ef_search" in query
+    assert "iterative_scan" in query
+    # top_k / 選択率 = 10,000 だが上限の 1000 に抑えられる
+    assert ef_search == "1000"
+
+    # フィルタがない場合は何も設定しない
+    conn.reset_mock()
+    assert await db._configure_filtered_scan(conn, None, 10) == "default"
+    conn.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_postgres_db_configure_filtered_scan_caches_total_rows():
+    """2回目以降の検索ではフィルタ付きの EXPLAIN だけを実行すること"""
+    from unittest.mock import AsyncMock
+
+    db = PostgreSQLDatabase(connection_string="postgresql://user:pw@localhost/db")
+    conn = AsyncMock()
+    conn.fetchval = AsyncMock(side_effect=[100_000.0, _explain_rows(100), "0.8.0"])
+    await db._configure_filtered_scan(conn, {"channel_id": 123}, 10)
+
+    conn.reset_mock()
+    conn.fetchval = AsyncMock(side_effect=[_explain_rows(50_000)])
+    mode = await db._configure_filtered_scan(conn, {"channel_id": 456}, 10)
+
+    assert mode == "iterative"
+    conn.fetchval.assert_awaited_once()
+    assert "EXPLAIN" in conn.fetchval.await_args.args[0]
+    assert conn.execute.await_args.args[1] == "40"
+
+
+@pytest.mark.asyncio
+async def test_postgres_db_configure_filtered_scan_without_statistics():
+    """統計情報がない（ANALYZE 前）場合は EXPLAIN の推定行数を総数に使うこと"""
+    from unittest.mock import AsyncMock
+
+    db = PostgreSQLDatabase(connection_string="postgresql://user:pw@localhost/db")
+    conn = AsyncMock()
+    conn.fetchval = AsyncMock(
+        side_effect=[-1.0, _explain_rows(10_000), _explain_rows(10), "0.8.0"]
+    )
+
+    await db._configure_filtered_scan(conn, {"channel_id": 123}, 10)
+
+    assert conn.execute.await_args.args[1] == "1000"
+
+
+@pytest.mark.asyncio
+async def test_postgres_db_configure_filtered_scan_without_iterative_scan():
+    """反復スキャンに対応していない pgvector では ef_search だけを設定すること"""
+    from unittest.mock import AsyncMock
+
+    db = PostgreSQLDatabase(connection_string="postgresql://user:pw@localhost/db")
+    conn = AsyncMock()
+    # 半分に絞り込まれるフィルタ（ef_search は最小値のまま）
+    conn.fetchval = AsyncMock(side_effect=[1000.0, _explain_rows(500), "0.7.4"])
+
+    mode = await db._configure_filtered_scan(conn, {"source_type": "web_page"}, 10)
+
+    assert mode == "ef_search"
+    conn.execute.assert_awaited_once()
+    assert "iterative_scan" not in conn.execute.await_args.args[0]
+    assert conn.execute.await_args.args[1] == "40"
+
+
 @pytest.mark.asyncio
 async def test_postgres_db_similarity_search_without_threshold(postgres_db):
     """閾値フィルタリングなしのベクトル検索テスト"""
@@ -424,6 +615,91 @@ async def test_postgres_db_load_all_sessions(postgres_db):
     assert "test:session:load_all:002" in session_keys
 
 
+@pytest.mark.asyncio
+async def test_postgres_db_load_session_headers(postgres_db):
+    """最近アクティブなセッションのヘッダーのみ読み込むテスト"""
+    from datetime import UTC, datetime, timedelta
+
+    from kotonoha_bot.db.models import ChatSession, MessageRole
+
+    now = datetime.now(UTC)
+    for i, hours_ago in enumerate([1, 2, 100]):
+        session = ChatSession(
+            session_key=f"test:session:headers:{i:03d}",
+            session_type="mention",
+            channel_id=987654321,
+            user_id=111222333,
+            last_active_at=now - timedelta(hours=hours_ago),
+        )
+        session.add_message(MessageRole.USER, f"テストメッセージ{i}")
+        session.last_active_at = now - timedelta(hours=hours_ago)
+        await postgres_db.save_session(session)
+
+    headers = await postgres_db.load_session_headers(
+        active_since=now - timedelta(hours=24), limit=1
+    )
+
+    # タイムアウトと件数の上限が適用され、最新のものだけが返る
+    assert [h.session_key for h in headers] == ["test:session:headers:000"]
+    header = headers[0]
+    assert header.messages == []
+    assert header.messages_loaded is False
+    assert header.persisted_message_count == 1
+
+    # ヘッダーのみのセッションは保存できない
+    with pytest.raises(ValueError, match="not loaded"):
+        await postgres_db.save_session(header)
+
+
+@pytest.mark.asyncio
+async def test_postgres_db_judgement_cache(postgres_db):
+    """判定結果キャッシュの保存・読み込み・期限切れ削除のテスト"""
+    from datetime import timedelta
+
+    now = datetime.now(UTC)
+    await postgres_db.save_judgement(
+        "key:valid", "conversation_state", "ACTIVE", now + timedelta(minutes=5)
+    )
+    await postgres_db.save_judgement(
+        "key:expired", "conversation_state", "ENDING", now - timedelta(minutes=5)
+    )
+
+    loaded = await postgres_db.load_judgement("key:valid")
+    assert loaded is not None
+    assert loaded[0] == "ACTIVE"
+    # 期限切れのものは読み込まれない
+    assert await postgres_db.load_judgement("key:expired") is None
+
+    # 同じキーは上書きされる
+    await postgres_db.save_judgement(
+        "key:valid", "conversation_state", "CONFLICT", now + timedelta(minutes=5)
+    )
+    loaded = await postgres_db.load_judgement("key:valid")
+    assert loaded is not None
+    assert loaded[0] == "CONFLICT"
+
+    assert await postgres_db.delete_expired_judgements() == 1
+
+
+@pytest.mark.asyncio
+async def test_postgres_db_embedding_cache(postgres_db):
+    """Embedding キャッシュの保存・読み込みのテスト"""
+    await postgres_db.save_embeddings(
+        "text-embedding-3-small", 1536, {"key:a": [0.5] * 1536, "key:b": [0.25] * 1536}
+    )
+    # 同じキーは上書きしない
+    await postgres_db.save_embeddings(
+        "text-embedding-3-small", 1536, {"key:a": [1.0] * 1536}
+    )
+
+    loaded = await postgres_db.load_embeddings(["key:a", "key:b", "key:missing"])
+
+    assert set(loaded) == {"key:a", "key:b"}
+    assert loaded["key:a"] == [0.5] * 1536
+    assert loaded["key:b"] == [0.25] * 1536
+    assert await postgres_db.load_embeddings([]) == {}
+
+
 @pytest.mark.asyncio
 async def test_postgres_db_similarity_search_source_types_filter(postgres_db):
     """source_typesフィルタリング付きベクトル検索のテスト"""
@@ -935,6 +1211,85 @@ async def test_postgres_db_save_session_status_update(postgres_db):
     assert loaded.status == "active"
 
 
+@pytest.mark.asyncio
+async def test_postgres_db_save_session_appends_new_messages(postgres_db):
+    """2回目以降の保存では新しいメッセージのみ追記されることのテスト"""
+    session = ChatSession(
+        session_key="test:session:append:001",
+        session_type="thread",
+        messages=[
+            Message(
+                role=MessageRole.USER,
+                content="最初の質問",
+                timestamp=datetime.now(UTC),
+            )
+        ],
+        channel_id=987654321,
+    )
+    await postgres_db.save_session(session)
+    assert session.persisted_message_count == 1
+
+    session.add_message(MessageRole.ASSISTANT, "最初の回答")
+    session.add_message(MessageRole.USER, "次の質問")
+    await postgres_db.save_session(session)
+    assert session.persisted_message_count == 3
+
+    async with postgres_db.pool.acquire() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT jsonb_array_length(messages) AS base_count, message_count
+            FROM sessions WHERE session_key = $1
+            """,
+            "test:session:append:001",
+        )
+        appended_count = await conn.fetchval(
+            "SELECT COUNT(*) FROM session_messages WHERE session_key = $1",
+            "test:session:append:001",
+        )
+
+    # sessions.messages は書き換えず、差分だけが session_messages に追記される
+    assert row["base_count"] == 1
+    assert row["message_count"] == 3
+    assert appended_count == 2
+
+    loaded = await postgres_db.load_session("test:session:append:001")
+    assert loaded is not None
+    assert [m.content for m in loaded.messages] == [
+        "最初の質問",
+        "最初の回答",
+        "次の質問",
+    ]
+    assert loaded.persisted_message_count == 3
+
+
+@pytest.mark.asyncio
+async def test_postgres_db_save_session_rewrites_after_reset(postgres_db):
+    """履歴をリセットした場合は全体を書き直し、追記ログを破棄することのテスト"""
+    session = ChatSession(
+        session_key="test:session:append:reset:001",
+        session_type="mention",
+        messages=[Message(role=MessageRole.USER, content="古い質問")],
+        user_id=111222333,
+    )
+    await postgres_db.save_session(session)
+    session.add_message(MessageRole.ASSISTANT, "古い回答")
+    await postgres_db.save_session(session)
+
+    session.messages.clear()
+    await postgres_db.save_session(session)
+
+    loaded = await postgres_db.load_session("test:session:append:reset:001")
+    assert loaded is not None
+    assert loaded.messages == []
+
+    async with postgres_db.pool.acquire() as conn:
+        appended_count = await conn.fetchval(
+            "SELECT COUNT(*) FROM session_messages WHERE session_key = $1",
+            "test:session:append:reset:001",
+        )
+    assert appended_count == 0
+
+
 @pytest.mark.asyncio
 async def test_postgres_db_load_nonexistent_session(postgres_db):
     """存在しないセッションの読み込みテスト"""
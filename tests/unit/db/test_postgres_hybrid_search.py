@@ -2,6 +2,8 @@
 
 import pytest
 
+from kotonoha_bot.db.postgres import _keyword_terms, _like_pattern
+
 
 @pytest.mark.asyncio
 async def test_hybrid_search_basic(postgres_db):
@@ -248,3 +250,119 @@ async def test_hybrid_search_source_type_filter(postgres_db):
         all(result["source_type"] != "discord_session" for result in results_empty)
         or len(results_empty) == 0
     )
+
+
+def test_keyword_terms():
+    """クエリからキーワード検索の語が切り出されることをテスト."""
+    assert _keyword_terms("スコアリングのテスト手順について", 8) == [
+        "スコアリング",
+        "テスト",
+        "手順",
+    ]
+    assert _keyword_terms("pgvector と pgvector の違い", 8) == ["pgvector", "違"]
+    # 語が見つからない場合はクエリ全体を使う
+    assert _keyword_terms(" こんにちは ", 8) == ["こんにちは"]
+    assert _keyword_terms("", 8) == []
+    assert _keyword_terms("A B C", 2) == ["A", "B"]
+
+
+def test_like_pattern_escapes_wildcards():
+    """LIKE のワイルドカードがエスケープされることをテスト."""
+    assert _like_pattern("100%_達成") == "%100\\%\\_達成%"
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_keyword_terms_fused(postgres_db):
+    """クエリ全体が一致しなくても、語が一致するチャンクが上位になることをテスト."""
+    source_id = await postgres_db.save_source(
+        source_type="discord_session",
+        title="テストソース",
+        uri=None,
+        metadata={},
+    )
+    other_chunk_id = await postgres_db.save_chunk(
+        source_id=source_id,
+        content="今日は天気が良いので散歩に出かけました。",
+        location={},
+        token_count=10,
+    )
+    matched_chunk_id = await postgres_db.save_chunk(
+        source_id=source_id,
+        content="スコアリングの前にテストを実行します。",
+        location={},
+        token_count=10,
+    )
+
+    # ベクトル類似度は同じにして、キーワード検索の順位だけが差になるようにする
+    async with postgres_db.pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE knowledge_chunks
+            SET embedding = (SELECT array_agg(0.1::real) FROM generate_series(1, 1536))::halfvec(1536)
+            WHERE id = ANY($1::bigint[])
+        """,
+            [other_chunk_id, matched_chunk_id],
+        )
+
+    results = await postgres_db.hybrid_search(
+        query_embedding=[0.1] * 1536,
+        query_text="スコアリングのテスト手順",
+        limit=10,
+    )
+
+    assert [result["chunk_id"] for result in results] == [
+        matched_chunk_id,
+        other_chunk_id,
+    ]
+    assert 0.0 < results[1]["similarity"] < results[0]["similarity"] <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_keyword_rank_ignores_chunk_length(postgres_db):
+    """長いチャンクでも、より多くの語が一致するチャンクが上位になることをテスト."""
+    source_id = await postgres_db.save_source(
+        source_type="discord_session",
+        title="テストソース",
+        uri=None,
+        metadata={},
+    )
+    # 1語だけ一致する短いチャンク（bigm_similarity は高くなりやすい）
+    short_chunk_id = await postgres_db.save_chunk(
+        source_id=source_id,
+        content="スコアリング",
+        location={},
+        token_count=5,
+    )
+    # 全ての語が一致する長いチャンク
+    long_chunk_id = await postgres_db.save_chunk(
+        source_id=source_id,
+        content="今日の定例では、スコアリングのテスト手順を確認しました。"
+        + "議事録の詳細は共有フォルダにまとめてあります。" * 20,
+        location={},
+        token_count=300,
+    )
+
+    # ベクトル類似度は同じにする（同順位は ID 順のため、短いチャンクが 1 位）
+    async with postgres_db.pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE knowledge_chunks
+            SET embedding = (SELECT array_agg(0.1::real) FROM generate_series(1, 1536))::halfvec(1536)
+            WHERE id = ANY($1::bigint[])
+        """,
+            [short_chunk_id, long_chunk_id],
+        )
+
+    # キーワード検索の順位が結果の順位を決めるよう、キーワード検索を重くする
+    results = await postgres_db.hybrid_search(
+        query_embedding=[0.1] * 1536,
+        query_text="スコアリングのテスト手順",
+        limit=10,
+        vector_weight=0.3,
+        keyword_weight=0.7,
+    )
+
+    assert [result["chunk_id"] for result in results] == [
+        long_chunk_id,
+        short_chunk_id,
+    ]
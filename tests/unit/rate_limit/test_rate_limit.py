@@ -357,3 +357,134 @@ class TestRequestQueue:
         assert results == [1, 2, 3]
 
         await queue.stop()
+
+
+class TestRequestQueueConcurrency:
+    """リクエストキューの並行処理のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_concurrently(self):
+        """異なる order_key のリクエストは並行して処理される"""
+        queue = RequestQueue(max_size=10, max_concurrency=2)
+        await queue.start()
+
+        release = asyncio.Event()
+        started: list[str] = []
+
+        async def test_func(name: str) -> str:
+            started.append(name)
+            await release.wait()
+            return name
+
+        future1 = await queue.enqueue(
+            RequestPriority.MENTION, test_func, "a", order_key="s1"
+        )
+        future2 = await queue.enqueue(
+            RequestPriority.MENTION, test_func, "b", order_key="s2"
+        )
+
+        await asyncio.sleep(0.05)
+        assert sorted(started) == ["a", "b"]
+        assert queue.in_flight_count == 2
+
+        release.set()
+        assert await future1 == "a"
+        assert await future2 == "b"
+
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_same_key_is_fifo(self):
+        """同じ order_key のリクエストは優先度に関係なく到着順に1件ずつ処理される"""
+        queue = RequestQueue(max_size=10, max_concurrency=4)
+        await queue.start()
+
+        running = 0
+        max_running = 0
+        results: list[int] = []
+
+        async def test_func(value: int) -> int:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            results.append(value)
+            running -= 1
+            return value
+
+        futures = [
+            await queue.enqueue(RequestPriority.THREAD, test_func, 1, order_key="s1"),
+            await queue.enqueue(
+                RequestPriority.EAVESDROP, test_func, 2, order_key="s1"
+            ),
+            await queue.enqueue(RequestPriority.MENTION, test_func, 3, order_key="s1"),
+        ]
+        await asyncio.gather(*futures)
+
+        assert results == [1, 2, 3]
+        assert max_running == 1
+
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_limit(self):
+        """同時に処理されるリクエストは max_concurrency 件まで"""
+        queue = RequestQueue(max_size=10, max_concurrency=2)
+        await queue.start()
+
+        running = 0
+        max_running = 0
+
+        async def test_func() -> None:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        futures = [
+            await queue.enqueue(RequestPriority.MENTION, test_func, order_key=f"s{i}")
+            for i in range(5)
+        ]
+        await asyncio.gather(*futures)
+
+        assert max_running == 2
+        assert queue.pending_count == 0
+
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_blocked_key_does_not_block_others(self):
+        """処理中のセッションの後続リクエストは、他のセッションのリクエストを待たせない"""
+        queue = RequestQueue(max_size=10, max_concurrency=2)
+        await queue.start()
+
+        release = asyncio.Event()
+        results: list[str] = []
+
+        async def slow(name: str) -> None:
+            await release.wait()
+            results.append(name)
+
+        async def fast(name: str) -> None:
+            results.append(name)
+
+        slow_future = await queue.enqueue(
+            RequestPriority.MENTION, slow, "s1-1", order_key="s1"
+        )
+        queued_future = await queue.enqueue(
+            RequestPriority.MENTION, fast, "s1-2", order_key="s1"
+        )
+        other_future = await queue.enqueue(
+            RequestPriority.THREAD, fast, "s2-1", order_key="s2"
+        )
+
+        await other_future
+        assert results == ["s2-1"]
+
+        release.set()
+        await slow_future
+        await queued_future
+        assert results == ["s2-1", "s1-1", "s1-2"]
+
+        await queue.stop()
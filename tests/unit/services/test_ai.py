@@ -74,6 +74,37 @@ async def test_generate_response_success(anthropic_provider, sample_messages):
     anthropic_provider.client.messages.create.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_generate_response_trims_history_to_budget(anthropic_provider):
+    """会話履歴がトークン予算を超える場合は古い履歴を削り、TokenInfo に記録する."""
+    from kotonoha_bot.services.context_window import (
+        MESSAGE_TOKEN_OVERHEAD,
+        ContextWindowBuilder,
+    )
+
+    per_message = 10 + MESSAGE_TOKEN_OVERHEAD
+    anthropic_provider.context_builder = ContextWindowBuilder(
+        max_tokens=per_message, count_tokens=len
+    )
+    messages = [
+        Message(role=MessageRole.USER, content="a" * 10),
+        Message(role=MessageRole.ASSISTANT, content="b" * 10),
+        Message(role=MessageRole.USER, content="c" * 10),
+    ]
+
+    mock_response = MagicMock()
+    mock_response.content = [MagicMock(type="text", text="テスト応答")]
+    mock_response.usage = MagicMock(input_tokens=10, output_tokens=5)
+    mock_response.model = "claude-haiku-4-5"
+    anthropic_provider.client.messages.create = AsyncMock(return_value=mock_response)
+
+    _, token_info = await anthropic_provider.generate_response(messages=messages)
+
+    sent = anthropic_provider.client.messages.create.call_args.kwargs["messages"]
+    assert sent == [{"role": "user", "content": "c" * 10}]
+    assert token_info.trimmed_tokens == per_message * 2
+
+
 @pytest.mark.asyncio
 async def test_generate_response_empty_content(anthropic_provider, sample_messages):
     """空のコンテンツの場合のテスト"""
@@ -229,3 +260,141 @@ def test_initialization_without_api_key():
             AnthropicProvider(config=config)
     finally:
         config.anthropic_api_key = original_key
+
+
+@pytest.mark.asyncio
+async def test_generate_response_sets_cache_breakpoints(anthropic_provider):
+    """システムプロンプトと会話履歴の先頭部分にキャッシュのブレークポイントを設定する."""
+    from kotonoha_bot.utils.prompts import DEFAULT_SYSTEM_PROMPT
+
+    messages = [
+        Message(role=MessageRole.USER, content="質問1"),
+        Message(role=MessageRole.ASSISTANT, content="回答1"),
+        Message(role=MessageRole.USER, content="質問2"),
+    ]
+    mock_response = MagicMock()
+    mock_response.content = [MagicMock(type="text", text="テスト応答")]
+    mock_response.usage = MagicMock(
+        input_tokens=10,
+        output_tokens=5,
+        cache_read_input_tokens=1200,
+        cache_creation_input_tokens=30,
+    )
+    mock_response.model = "claude-haiku-4-5"
+    anthropic_provider.client.messages.create = AsyncMock(return_value=mock_response)
+
+    _, token_info = await anthropic_provider.generate_response(
+        messages=messages,
+        system_prompt=DEFAULT_SYSTEM_PROMPT + "\n\n【現在の日付情報】\n今日",
+    )
+
+    kwargs = anthropic_provider.client.messages.create.call_args.kwargs
+    # 固定部分のシステムプロンプトだけをキャッシュする
+    assert kwargs["system"] == [
+        {
+            "type": "text",
+            "text": DEFAULT_SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+    sent = kwargs["messages"]
+    assert sent[0] == {"role": "user", "content": "質問1"}
+    # 最後のユーザーメッセージより前の履歴の末尾がブレークポイント
+    assert sent[1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+    # 毎回変わる部分は最後のユーザーメッセージの先頭に付ける
+    assert sent[2]["content"] == [
+        {"type": "text", "text": "【現在の日付情報】\n今日"},
+        {"type": "text", "text": "質問2"},
+    ]
+
+    assert token_info.cache_read_input_tokens == 1200
+    assert token_info.cache_creation_input_tokens == 30
+    assert token_info.total_tokens == 1245
+
+
+@pytest.mark.asyncio
+async def test_generate_response_without_prompt_caching(
+    anthropic_provider, sample_messages
+):
+    """プロンプトキャッシュが無効の場合はそのまま送信する."""
+    anthropic_provider.config.llm_prompt_caching_enabled = False
+    mock_response = MagicMock()
+    mock_response.content = [MagicMock(type="text", text="テスト応答")]
+    mock_response.usage = MagicMock(input_tokens=10, output_tokens=5)
+    mock_response.model = "claude-haiku-4-5"
+    anthropic_provider.client.messages.create = AsyncMock(return_value=mock_response)
+
+    _, token_info = await anthropic_provider.generate_response(
+        messages=sample_messages, system_prompt="SYSTEM"
+    )
+
+    kwargs = anthropic_provider.client.messages.create.call_args.kwargs
+    assert kwargs["system"] == "SYSTEM"
+    assert all(isinstance(m["content"], str) for m in kwargs["messages"])
+    assert token_info.cache_read_input_tokens == 0
+
+
+class _StubStream:
+    """messages.stream() のスタブ."""
+
+    def __init__(self, texts: list[str], final_message):
+        self.texts = texts
+        self.final_message = final_message
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_args):
+        return False
+
+    @property
+    def text_stream(self):
+        async def iterate():
+            for text in self.texts:
+                yield text
+
+        return iterate()
+
+    async def get_final_message(self):
+        return self.final_message
+
+
+@pytest.mark.asyncio
+async def test_stream_response_yields_deltas_and_token_info(
+    anthropic_provider, sample_messages
+):
+    """ストリーミングではテキストの差分を返し、最後に TokenInfo を返す."""
+    from kotonoha_bot.services.ai import TokenInfo
+
+    final_message = MagicMock()
+    final_message.usage = MagicMock(input_tokens=10, output_tokens=5)
+    final_message.model = "claude-haiku-4-5"
+    anthropic_provider.client.messages.stream = MagicMock(
+        return_value=_StubStream(["テスト", "応答"], final_message)
+    )
+
+    items = [
+        item
+        async for item in anthropic_provider.stream_response(
+            messages=sample_messages, system_prompt="SYSTEM"
+        )
+    ]
+
+    assert items[:2] == ["テスト", "応答"]
+    assert isinstance(items[2], TokenInfo)
+    assert items[2].output_tokens == 5
+
+
+@pytest.mark.asyncio
+async def test_stream_response_empty_raises(anthropic_provider, sample_messages):
+    """応答が空の場合は AIServiceError."""
+    from kotonoha_bot.errors.ai import AIServiceError
+
+    final_message = MagicMock()
+    anthropic_provider.client.messages.stream = MagicMock(
+        return_value=_StubStream([], final_message)
+    )
+
+    with pytest.raises(AIServiceError):
+        async for _ in anthropic_provider.stream_response(messages=sample_messages):
+            pass
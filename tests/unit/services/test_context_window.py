@@ -0,0 +1,80 @@
+"""会話履歴のトークン予算管理のテスト."""
+
+from kotonoha_bot.db.models import Message, MessageRole
+from kotonoha_bot.services.context_window import (
+    MESSAGE_TOKEN_OVERHEAD,
+    ContextWindowBuilder,
+)
+
+
+def _messages(*contents: str) -> list[Message]:
+    """ユーザーとアシスタントが交互に発言する会話履歴を作成."""
+    roles = [MessageRole.USER, MessageRole.ASSISTANT]
+    return [
+        Message(role=roles[i % 2], content=content)
+        for i, content in enumerate(contents)
+    ]
+
+
+def test_fit_keeps_all_messages_within_budget():
+    """予算内であれば会話履歴をそのまま返す."""
+    builder = ContextWindowBuilder(max_tokens=1000, count_tokens=len)
+    messages = _messages("a" * 10, "b" * 10, "c" * 10)
+
+    result, trimmed = builder.fit(messages)
+
+    assert result is messages
+    assert trimmed == 0
+
+
+def test_fit_drops_oldest_messages():
+    """予算を超える場合は古いメッセージから削り、ユーザーの発言から始める."""
+    per_message = 10 + MESSAGE_TOKEN_OVERHEAD
+    builder = ContextWindowBuilder(max_tokens=per_message * 2, count_tokens=len)
+    messages = _messages("a" * 10, "b" * 10, "c" * 10, "d" * 10, "e" * 10)
+
+    result, trimmed = builder.fit(messages)
+
+    # 直近2件（d, e）のうち d はアシスタントのため、e のみ残る
+    assert [m.content for m in result] == ["e" * 10]
+    assert trimmed == per_message * 4
+
+
+def test_fit_subtracts_system_prompt():
+    """システムプロンプトのトークン数は予算から差し引かれる."""
+    per_message = 10 + MESSAGE_TOKEN_OVERHEAD
+    builder = ContextWindowBuilder(max_tokens=per_message * 3, count_tokens=len)
+    messages = _messages("a" * 10, "b" * 10, "c" * 10)
+
+    result, trimmed = builder.fit(messages, system_prompt="s" * per_message)
+
+    assert [m.content for m in result] == ["c" * 10]
+    assert trimmed == per_message * 2
+
+
+def test_fit_always_keeps_latest_message():
+    """最新のメッセージは予算を超えても残す."""
+    builder = ContextWindowBuilder(max_tokens=5, count_tokens=len)
+    messages = _messages("a" * 10, "b" * 10, "c" * 100)
+
+    result, _ = builder.fit(messages)
+
+    assert [m.content for m in result] == ["c" * 100]
+
+
+def test_token_counts_are_cached_per_message():
+    """メッセージごとのトークン数はキャッシュされる."""
+    calls: list[str] = []
+
+    def count(text: str) -> int:
+        calls.append(text)
+        return len(text)
+
+    builder = ContextWindowBuilder(max_tokens=1000, count_tokens=count)
+    messages = _messages("a", "b")
+
+    builder.fit(messages)
+    builder.fit(messages)
+
+    assert sorted(calls) == ["a", "b"]
+    assert messages[0].token_count == 1 + MESSAGE_TOKEN_OVERHEAD
@@ -7,7 +7,11 @@ import pytest
 
 from kotonoha_bot.config import get_config
 from kotonoha_bot.services.ai import TokenInfo
-from kotonoha_bot.services.eavesdrop import ConversationBuffer, LLMJudge
+from kotonoha_bot.services.eavesdrop import (
+    ConversationBuffer,
+    LLMJudge,
+    score_conversation,
+)
 
 # ============================================
 # ConversationBuffer のテスト
@@ -135,8 +139,8 @@ def mock_ai_provider():
 
 @pytest.fixture
 def llm_judge(mock_session_manager, mock_ai_provider):
-    """LLMJudgeのフィクスチャ."""
-    config = get_config()
+    """LLMJudgeのフィクスチャ（事前フィルタは無効）."""
+    config = get_config().model_copy(update={"eavesdrop_prefilter_threshold": 0})
     return LLMJudge(mock_session_manager, mock_ai_provider, config=config)
 
 
@@ -621,3 +625,206 @@ async def test_check_conversation_situation_changed_error(llm_judge):
     )
 
     assert result is True  # 安全側に倒す
+
+
+# ============================================
+# 統合判定（1回の LLM 呼び出し）
+# ============================================
+
+
+@pytest.fixture
+def structured_llm_judge(mock_session_manager, mock_ai_provider):
+    """統合判定を有効にした LLMJudge のフィクスチャ."""
+    config = get_config().model_copy(
+        update={"eavesdrop_structured_judge": True, "eavesdrop_prefilter_threshold": 0}
+    )
+    return LLMJudge(mock_session_manager, mock_ai_provider, config=config)
+
+
+def _set_judge_response(judge: LLMJudge, response: str) -> None:
+    token_info = TokenInfo(
+        input_tokens=10,
+        output_tokens=5,
+        total_tokens=15,
+        model_used="claude-haiku-4-5",
+        latency_ms=100,
+    )
+    judge.ai_provider.generate_response = AsyncMock(return_value=(response, token_info))
+
+
+@pytest.mark.asyncio
+async def test_structured_judge_should_respond(structured_llm_judge, recent_messages):
+    """1回の LLM 呼び出しで発言すべきと判定され、介入が記録される."""
+    _set_judge_response(
+        structured_llm_judge,
+        '{"state": "conflict", "situation_changed": null, "should_respond": true}',
+    )
+
+    result = await structured_llm_judge.should_respond(123456789, recent_messages)
+
+    assert result is True
+    assert structured_llm_judge.ai_provider.generate_response.await_count == 1
+    assert 123456789 in structured_llm_judge.intervention_history
+
+
+@pytest.mark.asyncio
+async def test_structured_judge_conversation_ending(
+    structured_llm_judge, recent_messages
+):
+    """会話が終了しようとしている場合、should_respond に関係なく False を返す."""
+    _set_judge_response(
+        structured_llm_judge,
+        '```json\n{"state": "ending", "situation_changed": null, '
+        '"should_respond": true}\n```',
+    )
+
+    result = await structured_llm_judge.should_respond(123456789, recent_messages)
+
+    assert result is False
+    assert 123456789 not in structured_llm_judge.intervention_history
+
+
+@pytest.mark.asyncio
+async def test_structured_judge_situation_unchanged(
+    structured_llm_judge, recent_messages
+):
+    """介入後に状況が変わっていない場合は False を返す."""
+    structured_llm_judge.intervention_history[123456789] = [
+        (datetime.now() - timedelta(minutes=30), "前回の会話")
+    ]
+    _set_judge_response(
+        structured_llm_judge,
+        '{"state": "active", "situation_changed": false, "should_respond": true}',
+    )
+
+    result = await structured_llm_judge.should_respond(123456789, recent_messages)
+
+    assert result is False
+    # 前回の介入時の会話がプロンプトに含まれる
+    call_kwargs = structured_llm_judge.ai_provider.generate_response.call_args.kwargs
+    assert "前回の会話" in call_kwargs["messages"][0].content
+
+
+@pytest.mark.asyncio
+async def test_structured_judge_min_interval(structured_llm_judge, recent_messages):
+    """最小間隔が経過していない場合は LLM を呼び出さずに False を返す."""
+    structured_llm_judge.intervention_history[123456789] = [
+        (datetime.now(), "前回の会話")
+    ]
+    _set_judge_response(
+        structured_llm_judge,
+        '{"state": "active", "situation_changed": true, "should_respond": true}',
+    )
+
+    result = await structured_llm_judge.should_respond(123456789, recent_messages)
+
+    assert result is False
+    structured_llm_judge.ai_provider.generate_response.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_structured_judge_invalid_response(structured_llm_judge, recent_messages):
+    """JSON として解析できない応答の場合は False を返す."""
+    _set_judge_response(structured_llm_judge, "YES")
+
+    result = await structured_llm_judge.should_respond(123456789, recent_messages)
+
+    assert result is False
+
+
+# ============================================
+# 事前フィルタ
+# ============================================
+
+
+def _create_messages(*contents: str) -> list[MagicMock]:
+    messages = []
+    for i, content in enumerate(contents):
+        msg = MagicMock()
+        msg.author.display_name = f"ユーザー{i}"
+        msg.content = content
+        msg.created_at = datetime(2026, 1, 1, 12, 0, 0) + timedelta(minutes=i * 5)
+        messages.append(msg)
+    return messages
+
+
+def test_score_conversation_chatter():
+    """雑談のみの場合はスコアが低い."""
+    messages = _create_messages("おはよう", "いい天気だね", "そうだね")
+
+    assert score_conversation(messages) < 1.0
+
+
+def test_score_conversation_signals():
+    """呼び名・疑問符・相談キーワードはスコアを上げる."""
+    assert score_conversation(_create_messages("ねえ", "コトノハ聞いてる")) >= 3.0
+    assert score_conversation(_create_messages("雑談", "どう思う？")) >= 1.0
+    assert score_conversation(_create_messages("雑談", "ちょっと不安で")) >= 1.0
+
+
+def test_score_conversation_ending_and_recent_intervention():
+    """会話の締めくくりと直近の介入はスコアを下げる."""
+    question = _create_messages("雑談", "どう思う？")
+    base = score_conversation(question)
+
+    ending = _create_messages("どう思う？", "今日は以上です")
+    assert score_conversation(ending) < base
+    assert score_conversation(question, last_intervention_time=datetime.now()) < base
+
+
+def test_score_conversation_message_rate():
+    """短時間にメッセージが集中している場合はスコアを上げる."""
+    slow = _create_messages(*["雑談"] * 5)
+    fast = _create_messages(*["雑談"] * 5)
+    for i, msg in enumerate(fast):
+        msg.created_at = datetime(2026, 1, 1, 12, 0, 0) + timedelta(seconds=i * 5)
+
+    assert score_conversation(fast) > score_conversation(slow)
+
+
+@pytest.mark.asyncio
+async def test_should_respond_prefilter_skips_llm(
+    mock_session_manager, mock_ai_provider
+):
+    """事前フィルタのスコアが閾値未満の場合、LLM を呼び出さない."""
+    config = get_config().model_copy(update={"eavesdrop_prefilter_threshold": 1.0})
+    judge = LLMJudge(mock_session_manager, mock_ai_provider, config=config)
+
+    result = await judge.should_respond(
+        123456789, _create_messages("おはよう", "いい天気だね", "そうだね")
+    )
+
+    assert result is False
+    mock_ai_provider.generate_response.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_judgement_cache_reuses_llm_result(llm_judge, recent_messages):
+    """同じ会話ログの判定はキャッシュを使い、LLM を再度呼び出さない."""
+    token_info = TokenInfo(
+        input_tokens=10,
+        output_tokens=5,
+        total_tokens=15,
+        model_used="claude-haiku-4-5",
+        latency_ms=100,
+    )
+    llm_judge.ai_provider.generate_response = AsyncMock(
+        return_value=("CONFLICT", token_info)
+    )
+
+    first = await llm_judge._analyze_conversation_state(recent_messages)
+    second = await llm_judge._analyze_conversation_state(recent_messages)
+
+    assert first == second == "conflict"
+    llm_judge.ai_provider.generate_response.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_judgement_cache_skips_errors(llm_judge, recent_messages):
+    """LLM の呼び出しに失敗した結果はキャッシュしない."""
+    llm_judge.ai_provider.generate_response = AsyncMock(
+        side_effect=Exception("テストエラー")
+    )
+
+    assert await llm_judge._analyze_conversation_state(recent_messages) == "active"
+    assert len(llm_judge.judgement_cache) == 0
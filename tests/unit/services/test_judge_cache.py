@@ -0,0 +1,123 @@
+"""聞き耳型の判定結果キャッシュのテスト."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from kotonoha_bot.db.base import JudgementStoreProtocol
+from kotonoha_bot.services.judge_cache import JudgementCache, normalize_log
+
+
+class FakeClock:
+    """テスト用の時計."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class InMemoryStore(JudgementStoreProtocol):
+    """テスト用のメモリ上の永続化先."""
+
+    def __init__(self) -> None:
+        self.rows: dict[str, tuple[str, str, datetime]] = {}
+
+    async def load_judgement(self, cache_key: str) -> tuple[str, datetime] | None:
+        row = self.rows.get(cache_key)
+        if row is None or row[2] <= datetime.now(UTC):
+            return None
+        return row[1], row[2]
+
+    async def save_judgement(
+        self, cache_key: str, kind: str, response: str, expires_at: datetime
+    ) -> None:
+        self.rows[cache_key] = (kind, response, expires_at)
+
+    async def delete_expired_judgements(self) -> int:
+        return 0
+
+
+def test_normalize_log_collapses_whitespace():
+    """余分な空白と空行は正規化で取り除かれる."""
+    a = "ユーザー1:  こんにちは\n\n ユーザー2: やあ  "
+    b = "ユーザー1: こんにちは\nユーザー2: やあ"
+
+    assert normalize_log(a) == normalize_log(b)
+
+
+def test_make_key_keeps_times_in_content():
+    """発言内容の日時が異なれば別のキーになる."""
+    key = JudgementCache.make_key("state", "haiku", "ユーザー1: 集合は12:30")
+
+    assert key != JudgementCache.make_key("state", "haiku", "ユーザー1: 集合は13:00")
+    assert key != JudgementCache.make_key(
+        "state", "haiku", "ユーザー1: 2026-10-17 集合は12:30"
+    )
+
+
+def test_make_key():
+    """正規化後に同じ内容は同じキーになり、種類やモデルが違えば別のキーになる."""
+    key = JudgementCache.make_key("state", "haiku", "ユーザー1:  こんにちは")
+
+    assert key == JudgementCache.make_key("state", "haiku", "ユーザー1: こんにちは")
+    assert key != JudgementCache.make_key("changed", "haiku", "ユーザー1: こんにちは")
+    assert key != JudgementCache.make_key("state", "sonnet", "ユーザー1: こんにちは")
+
+
+@pytest.mark.asyncio
+async def test_get_and_put():
+    """保存した判定結果を取得できる."""
+    cache = JudgementCache(max_entries=10, ttl_seconds=60)
+
+    assert await cache.get("state", "key") is None
+    await cache.put("state", "key", "ACTIVE")
+
+    assert await cache.get("state", "key") == "ACTIVE"
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry():
+    """有効期限を過ぎた判定結果は取得できず、削除される."""
+    clock = FakeClock()
+    cache = JudgementCache(max_entries=10, ttl_seconds=60, clock=clock)
+    await cache.put("state", "key", "ACTIVE")
+
+    clock.now += 61
+
+    assert await cache.get("state", "key") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    """上限を超えた場合は最も長く使われていないものから削除される."""
+    cache = JudgementCache(max_entries=2, ttl_seconds=60)
+    await cache.put("state", "a", "A")
+    await cache.put("state", "b", "B")
+    # a を使用して最近使用したものにする
+    assert await cache.get("state", "a") == "A"
+
+    await cache.put("state", "c", "C")
+
+    assert len(cache) == 2
+    assert await cache.get("state", "b") is None
+    assert await cache.get("state", "a") == "A"
+    assert await cache.get("state", "c") == "C"
+
+
+@pytest.mark.asyncio
+async def test_store_write_through_and_reload():
+    """永続化先に書き込まれ、メモリにない場合は永続化先から読み込まれる."""
+    store = InMemoryStore()
+    cache = JudgementCache(max_entries=10, ttl_seconds=60, store=store)
+    await cache.put("state", "key", "ACTIVE")
+
+    assert store.rows["key"][:2] == ("state", "ACTIVE")
+    assert store.rows["key"][2] > datetime.now(UTC) + timedelta(seconds=30)
+
+    # 再起動後（メモリが空）でも再利用できる
+    restarted = JudgementCache(max_entries=10, ttl_seconds=60, store=store)
+    assert await restarted.get("state", "key") == "ACTIVE"
+    assert len(restarted) == 1
@@ -0,0 +1,149 @@
+"""検索クエリの Embedding キャッシュのテスト."""
+
+import asyncio
+
+import pytest
+
+from kotonoha_bot.external.embedding import EmbeddingProvider
+from kotonoha_bot.services.query_embedding_cache import (
+    CachedEmbeddingProvider,
+    normalize_query,
+)
+
+
+class FakeClock:
+    """テスト用の時計."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingProvider(EmbeddingProvider):
+    """呼び出し回数を数えるテスト用のプロバイダー."""
+
+    model = "test-embedding"
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.release = asyncio.Event()
+        self.release.set()
+        self.error: Exception | None = None
+
+    async def generate_embedding(self, text: str) -> list[float]:
+        self.calls.append(text)
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return [float(len(self.calls))] * 3
+
+    def get_dimension(self) -> int:
+        return 3
+
+
+def test_normalize_query():
+    """全角・半角の揺れと余分な空白は正規化で吸収される."""
+    assert normalize_query("  ＡＰＩ の   使い方\n") == "API の 使い方"
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_hit():
+    """正規化後に同じクエリは API を呼び出さずに再利用する."""
+    provider = CountingProvider()
+    cache = CachedEmbeddingProvider(provider)
+
+    first = await cache.generate_embedding("使い方を 教えて")
+    second = await cache.generate_embedding("  使い方を   教えて\n")
+
+    assert first == second
+    assert provider.calls == ["使い方を 教えて"]
+    assert cache.get_dimension() == 3
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_expired():
+    """有効期限を過ぎたエントリは API を呼び出し直す."""
+    provider = CountingProvider()
+    clock = FakeClock()
+    cache = CachedEmbeddingProvider(provider, ttl_seconds=60, clock=clock)
+
+    await cache.generate_embedding("質問")
+    clock.now += 61
+    await cache.generate_embedding("質問")
+
+    assert len(provider.calls) == 2
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_evicts_least_recently_used():
+    """上限を超えた場合は最も長く使われていないエントリから削除する."""
+    provider = CountingProvider()
+    cache = CachedEmbeddingProvider(provider, max_entries=2)
+
+    await cache.generate_embedding("a")
+    await cache.generate_embedding("b")
+    await cache.generate_embedding("a")  # a を最近使用したものにする
+    await cache.generate_embedding("c")  # b が削除される
+    await cache.generate_embedding("a")
+    await cache.generate_embedding("b")
+
+    assert provider.calls == ["a", "b", "c", "b"]
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_coalesces_concurrent_requests():
+    """同じクエリの同時リクエストは 1 回の API 呼び出しを共有する."""
+    provider = CountingProvider()
+    provider.release.clear()
+    cache = CachedEmbeddingProvider(provider)
+
+    pending = [
+        asyncio.create_task(cache.generate_embedding("同じ質問")) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    provider.release.set()
+    results = await asyncio.gather(*pending)
+
+    assert provider.calls == ["同じ質問"]
+    assert results == [[1.0, 1.0, 1.0]] * 3
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_caches_after_caller_timeout():
+    """呼び出し元がタイムアウトしても API 呼び出しは続き、結果をキャッシュする."""
+    provider = CountingProvider()
+    provider.release.clear()
+    cache = CachedEmbeddingProvider(provider)
+
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.01):
+            await cache.generate_embedding("遅い質問")
+    provider.release.set()
+    await asyncio.sleep(0)
+
+    assert await cache.generate_embedding("遅い質問") == [1.0, 1.0, 1.0]
+    assert provider.calls == ["遅い質問"]
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_error_is_not_cached():
+    """API の失敗は全ての待機中の呼び出し元に伝わり、キャッシュされない."""
+    provider = CountingProvider()
+    provider.release.clear()
+    provider.error = RuntimeError("API error")
+    cache = CachedEmbeddingProvider(provider)
+
+    pending = [asyncio.create_task(cache.generate_embedding("質問")) for _ in range(2)]
+    await asyncio.sleep(0)
+    provider.release.set()
+    results = await asyncio.gather(*pending, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(cache) == 0
+
+    provider.error = None
+    assert await cache.generate_embedding("質問") == [2.0, 2.0, 2.0]
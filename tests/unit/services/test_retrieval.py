@@ -0,0 +1,161 @@
+"""知識ベース検索（RAG）サービスのテスト."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from kotonoha_bot.db.base import SearchResult
+from kotonoha_bot.db.models import Message, MessageRole
+from kotonoha_bot.services.retrieval import CONTEXT_HEADER, KnowledgeRetriever
+
+
+@pytest.fixture
+def mock_config():
+    """モックConfig."""
+    config = MagicMock()
+    config.RAG_TOP_K = 3
+    config.RAG_TIMEOUT_SECONDS = 0.5
+    config.RAG_HISTORY_MESSAGES = 2
+    config.RAG_MAX_CONTEXT_CHARS = 1000
+    return config
+
+
+@pytest.fixture
+def mock_db():
+    """モック知識ベース."""
+    db = MagicMock()
+    db.similarity_search = AsyncMock(
+        return_value=[
+            SearchResult(
+                {
+                    "chunk_id": 1,
+                    "source_id": 1,
+                    "content": "以前の会話の内容",
+                    "similarity": 0.9,
+                    "source_type": "discord_session",
+                    "title": "過去の会話",
+                    "uri": "https://discord.com/channels/1/2",
+                    "source_metadata": {},
+                }
+            )
+        ]
+    )
+    return db
+
+
+@pytest.fixture
+def mock_embedding_provider():
+    """モックEmbeddingProvider."""
+    provider = MagicMock()
+    provider.generate_embedding = AsyncMock(return_value=[0.1] * 1536)
+    return provider
+
+
+@pytest.fixture
+def retriever(mock_db, mock_embedding_provider, mock_config):
+    """KnowledgeRetriever インスタンス."""
+    return KnowledgeRetriever(mock_db, mock_embedding_provider, config=mock_config)
+
+
+def _history() -> list[Message]:
+    return [
+        Message(role=MessageRole.USER, content="1"),
+        Message(role=MessageRole.ASSISTANT, content="2"),
+        Message(role=MessageRole.USER, content="3"),
+    ]
+
+
+def test_retriever_requires_config(mock_db, mock_embedding_provider):
+    """config が None の場合はエラー."""
+    with pytest.raises(ValueError, match="config parameter is required"):
+        KnowledgeRetriever(mock_db, mock_embedding_provider)
+
+
+@pytest.mark.asyncio
+async def test_retrieve_passes_top_k_and_channel_filter(retriever, mock_db):
+    """top_k とチャンネルフィルタが検索に渡される."""
+    results = await retriever.retrieve("質問", channel_id=123)
+
+    assert len(results) == 1
+    kwargs = mock_db.similarity_search.call_args.kwargs
+    assert kwargs["top_k"] == 3
+    assert kwargs["filters"] == {"channel_id": 123}
+
+
+@pytest.mark.asyncio
+async def test_retrieve_empty_query_skips_search(retriever, mock_embedding_provider):
+    """空の発言は検索しない."""
+    assert await retriever.retrieve("   ") == []
+    mock_embedding_provider.generate_embedding.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_retrieve_timeout_falls_through(retriever, mock_embedding_provider):
+    """タイムアウト時は空のリストを返す."""
+
+    async def slow_embedding(_text):
+        await asyncio.sleep(5)
+        return [0.1] * 1536
+
+    mock_embedding_provider.generate_embedding = AsyncMock(side_effect=slow_embedding)
+
+    assert await retriever.retrieve("質問") == []
+
+
+@pytest.mark.asyncio
+async def test_retrieve_error_falls_through(retriever, mock_db):
+    """検索エラー時は空のリストを返す."""
+    mock_db.similarity_search = AsyncMock(side_effect=RuntimeError("DB error"))
+
+    assert await retriever.retrieve("質問") == []
+
+
+@pytest.mark.asyncio
+async def test_augment_injects_context_and_compacts_history(retriever):
+    """検索結果がある場合はコンテキストを注入し、履歴を直近だけに絞る."""
+    history, system_prompt = await retriever.augment("質問", _history(), "SYSTEM")
+
+    assert system_prompt.startswith("SYSTEM" + CONTEXT_HEADER)
+    assert "以前の会話の内容" in system_prompt
+    # 直近2件のうち先頭がアシスタントのため、ユーザーの発言から始まるように詰める
+    assert [m.content for m in history] == ["3"]
+
+
+@pytest.mark.parametrize("history_messages", [0, -1])
+def test_compact_history_keeps_latest_message_when_limit_not_positive(
+    retriever, mock_config, history_messages
+):
+    """履歴数が 1 未満の設定でも全件ではなく最新のメッセージだけを送る."""
+    mock_config.RAG_HISTORY_MESSAGES = history_messages
+
+    history = retriever.compact_history(_history())
+
+    assert [m.content for m in history] == ["3"]
+
+
+@pytest.mark.asyncio
+async def test_augment_without_results_keeps_prompt(retriever, mock_db):
+    """検索結果がない場合は履歴とプロンプトをそのまま返す."""
+    mock_db.similarity_search = AsyncMock(return_value=[])
+    messages = _history()
+
+    history, system_prompt = await retriever.augment("質問", messages, "SYSTEM")
+
+    assert history is messages
+    assert system_prompt == "SYSTEM"
+
+
+def test_format_context_respects_max_chars(retriever, mock_config):
+    """注入するコンテキストは最大文字数で打ち切られる."""
+    mock_config.RAG_MAX_CONTEXT_CHARS = 30
+    results = [
+        SearchResult({"title": "A", "uri": None, "content": "あ" * 100}),
+        SearchResult({"title": "B", "uri": None, "content": "い" * 100}),
+    ]
+
+    context = retriever.format_context(results)
+
+    assert "[1] A" in context
+    assert "[2] B" not in context
+    assert len(context) - len(CONTEXT_HEADER) <= 40
@@ -1,5 +1,6 @@
 """セッションマネージャーの詳細テスト."""
 
+import asyncio
 from datetime import UTC, datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock
 
@@ -14,6 +15,7 @@ def mock_db():
     """モックデータベース."""
     db = MagicMock()
     db.load_all_sessions = AsyncMock(return_value=[])
+    db.load_session_headers = AsyncMock(return_value=[])
     db.load_session = AsyncMock(return_value=None)
     db.save_session = AsyncMock()
     return db
@@ -25,6 +27,7 @@ def mock_config():
     config = MagicMock()
     config.SESSION_TIMEOUT_HOURS = 24
     config.MAX_SESSIONS = 100
+    config.MAX_SESSION_MESSAGES = 5000
     return config
 
 
@@ -38,54 +41,45 @@ class TestSessionManagerLoadActiveSessions:
     """_load_active_sessions メソッドのテスト."""
 
     @pytest.mark.asyncio
-    async def test_load_active_sessions_loads_active_only(
-        self, session_manager, mock_db
-    ):
-        """アクティブなセッションのみが読み込まれる."""
-        now = datetime.now(UTC)
-        active_session = ChatSession(
-            session_key="active:1",
-            session_type="mention",
-            last_active_at=now - timedelta(hours=1),  # 1時間前（アクティブ）
-        )
-        old_session = ChatSession(
-            session_key="old:1",
-            session_type="mention",
-            last_active_at=now - timedelta(hours=25),  # 25時間前（タイムアウト）
-        )
-
-        mock_db.load_all_sessions = AsyncMock(
-            return_value=[active_session, old_session]
-        )
+    async def test_load_active_sessions_filters_in_sql(self, session_manager, mock_db):
+        """タイムアウトの判定と件数の上限が DB 側に渡される."""
+        before = datetime.now(UTC)
 
         await session_manager._load_active_sessions()
 
-        # アクティブなセッションのみが読み込まれることを確認
-        assert "active:1" in session_manager.sessions
-        assert "old:1" not in session_manager.sessions
+        kwargs = mock_db.load_session_headers.call_args.kwargs
+        assert kwargs["limit"] == 100
+        expected_since = before - timedelta(hours=24)
+        assert abs(kwargs["active_since"] - expected_since) < timedelta(seconds=5)
+        # 全件読み込みは行わない
+        mock_db.load_all_sessions.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_load_active_sessions_handles_timezone_naive(
+    async def test_load_active_sessions_loads_headers_only(
         self, session_manager, mock_db
     ):
-        """タイムゾーンなしの last_active_at を処理できる."""
-        session = ChatSession(
-            session_key="test:1",
-            session_type="mention",
-            last_active_at=datetime.now(),  # タイムゾーンなし
-        )
-
-        mock_db.load_all_sessions = AsyncMock(return_value=[session])
+        """ヘッダーのみが LRU 順（古いものが先頭）で読み込まれる."""
+        now = datetime.now(UTC)
+        headers = [
+            ChatSession(
+                session_key=f"test:{i}",
+                session_type="mention",
+                last_active_at=now - timedelta(minutes=i),
+                messages_loaded=False,
+            )
+            for i in range(2)
+        ]
+        mock_db.load_session_headers = AsyncMock(return_value=headers)
 
         await session_manager._load_active_sessions()
 
-        # セッションが読み込まれることを確認（タイムゾーンなしでも処理される）
-        assert "test:1" in session_manager.sessions
+        assert list(session_manager.sessions) == ["test:1", "test:0"]
+        mock_db.load_session.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_load_active_sessions_handles_error(self, session_manager, mock_db):
         """エラーが発生した場合."""
-        mock_db.load_all_sessions = AsyncMock(side_effect=Exception("DB Error"))
+        mock_db.load_session_headers = AsyncMock(side_effect=Exception("DB Error"))
 
         # エラーが発生しても例外が伝播しないことを確認
         await session_manager._load_active_sessions()
@@ -93,6 +87,116 @@ class TestSessionManagerLoadActiveSessions:
         # セッションは読み込まれない
         assert len(session_manager.sessions) == 0
 
+    @pytest.mark.asyncio
+    async def test_get_session_hydrates_header(self, session_manager, mock_db):
+        """ヘッダーのみのセッションは最初の get_session でメッセージが読み込まれる."""
+        header = ChatSession(
+            session_key="test:1", session_type="mention", messages_loaded=False
+        )
+        full = ChatSession(session_key="test:1", session_type="mention")
+        full.add_message(MessageRole.USER, "こんにちは")
+        session_manager.sessions = {"test:1": header}
+        mock_db.load_session = AsyncMock(return_value=full)
+
+        result = await session_manager.get_session("test:1")
+
+        assert result is full
+        assert session_manager.sessions["test:1"] is full
+        mock_db.load_session.assert_called_once_with("test:1")
+
+    @pytest.mark.asyncio
+    async def test_concurrent_get_session_shares_hydrated_session(
+        self, session_manager, mock_db
+    ):
+        """同時の get_session は1回だけ読み込み、同じセッションを返す."""
+        header = ChatSession(
+            session_key="mention:1", session_type="mention", messages_loaded=False
+        )
+        session_manager.sessions = {"mention:1": header}
+        release = asyncio.Event()
+
+        async def load_session(session_key: str) -> ChatSession:
+            await release.wait()
+            return ChatSession(session_key=session_key, session_type="mention")
+
+        mock_db.load_session = AsyncMock(side_effect=load_session)
+
+        pending = asyncio.gather(
+            session_manager.get_session("mention:1"),
+            session_manager.get_session("mention:1"),
+        )
+        await asyncio.sleep(0)
+        release.set()
+        first, second = await pending
+
+        assert first is second
+        assert session_manager.sessions["mention:1"] is first
+        mock_db.load_session.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_get_session_for_deleted_header(
+        self, session_manager, mock_db
+    ):
+        """DBから削除されていたヘッダーは同時に呼び出されてもエラーにならない."""
+        header = ChatSession(
+            session_key="mention:1", session_type="mention", messages_loaded=False
+        )
+        session_manager.sessions = {"mention:1": header}
+        release = asyncio.Event()
+
+        async def load_session(_session_key: str) -> None:
+            await release.wait()
+
+        mock_db.load_session = AsyncMock(side_effect=load_session)
+
+        pending = asyncio.gather(
+            session_manager.get_session("mention:1"),
+            session_manager.get_session("mention:1"),
+        )
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await pending == [None, None]
+        assert "mention:1" not in session_manager.sessions
+
+    @pytest.mark.asyncio
+    async def test_get_session_prefers_session_created_while_loading(
+        self, session_manager, mock_db
+    ):
+        """読み込み中に作成されたセッションは、読み込んだ結果で置き換えない."""
+        release = asyncio.Event()
+
+        async def load_session(session_key: str) -> ChatSession:
+            await release.wait()
+            return ChatSession(session_key=session_key, session_type="mention")
+
+        mock_db.load_session = AsyncMock(side_effect=load_session)
+
+        pending = asyncio.create_task(session_manager.get_session("mention:1"))
+        await asyncio.sleep(0)
+        created = await session_manager.create_session("mention:1", "mention")
+        release.set()
+
+        assert await pending is created
+        assert session_manager.sessions["mention:1"] is created
+
+    @pytest.mark.asyncio
+    async def test_header_session_is_not_written_back(self, session_manager, mock_db):
+        """ヘッダーのみのセッションは保存・解放時に書き戻されない."""
+        header = ChatSession(
+            session_key="test:1",
+            session_type="mention",
+            last_active_at=datetime.now(UTC) - timedelta(hours=25),
+            messages_loaded=False,
+        )
+        session_manager.sessions = {"test:1": header}
+
+        await session_manager.save_all_sessions()
+        await session_manager.cleanup_old_sessions()
+
+        mock_db.save_session.assert_not_called()
+        assert "test:1" not in session_manager.sessions
+
 
 class TestSessionManagerCleanupOldSessions:
     """cleanup_old_sessions メソッドのテスト."""
@@ -246,7 +350,7 @@ class TestSessionManagerInitialize:
             session_type="mention",
             last_active_at=datetime.now(UTC),
         )
-        mock_db.load_all_sessions = AsyncMock(return_value=[session])
+        mock_db.load_session_headers = AsyncMock(return_value=[session])
 
         await session_manager.initialize()
 
@@ -263,7 +367,7 @@ class TestSessionManagerInitialize:
             session_type="mention",
             last_active_at=datetime.now(UTC),
         )
-        mock_db.load_all_sessions = AsyncMock(return_value=[session])
+        mock_db.load_session_headers = AsyncMock(return_value=[session])
 
         # 2回呼び出しても問題ない
         await session_manager.initialize()
@@ -272,7 +376,7 @@ class TestSessionManagerInitialize:
         await session_manager.initialize()
 
         # セッションが2回読み込まれることを確認（_initialized をリセットしたため）
-        assert mock_db.load_all_sessions.call_count == 2
+        assert mock_db.load_session_headers.call_count == 2
 
 
 class TestSessionManagerGetSession:
@@ -343,3 +447,99 @@ class TestSessionManagerAddMessage:
         # add_message は session.add_message を呼び出すが、
         # ChatSession.add_message は last_active_at を更新する
         assert session.last_active_at >= original_active_at
+
+
+class TestSessionManagerCacheLimits:
+    """セッションキャッシュの上限（LRU + アイドル TTL）のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_create_session_evicts_least_recently_used(
+        self, session_manager, mock_db, mock_config
+    ):
+        """セッション数の上限を超えると最も長く使われていないセッションが解放される."""
+        mock_config.MAX_SESSIONS = 2
+        await session_manager.create_session("test:1", "mention")
+        await session_manager.create_session("test:2", "mention")
+
+        # test:1 を使用して test:2 を最も長く使われていないセッションにする
+        await session_manager.get_session("test:1")
+        mock_db.save_session.reset_mock()
+
+        await session_manager.create_session("test:3", "mention")
+
+        assert list(session_manager.sessions) == ["test:1", "test:3"]
+        # 解放前に DB に書き戻されたことを確認
+        saved_keys = [
+            c.args[0].session_key for c in mock_db.save_session.call_args_list
+        ]
+        assert "test:2" in saved_keys
+
+    @pytest.mark.asyncio
+    async def test_add_message_evicts_when_message_budget_exceeded(
+        self, session_manager, mock_config
+    ):
+        """メッセージ総数の上限を超えると他のセッションが解放される."""
+        mock_config.MAX_SESSION_MESSAGES = 2
+        await session_manager.create_session("test:1", "mention")
+        await session_manager.create_session("test:2", "mention")
+        await session_manager.add_message("test:1", MessageRole.USER, "1")
+        await session_manager.add_message("test:1", MessageRole.ASSISTANT, "2")
+
+        await session_manager.add_message("test:2", MessageRole.USER, "3")
+
+        # 直前に使用した test:2 は保持され、test:1 が解放される
+        assert list(session_manager.sessions) == ["test:2"]
+        assert session_manager._message_total == 1
+
+    @pytest.mark.asyncio
+    async def test_eviction_keeps_session_when_write_back_fails(
+        self, session_manager, mock_db, mock_config
+    ):
+        """書き戻しに失敗したセッションはメモリに残る."""
+        mock_config.MAX_SESSIONS = 1
+        await session_manager.create_session("test:1", "mention")
+        mock_db.save_session = AsyncMock(side_effect=[None, Exception("DB error")])
+
+        await session_manager.create_session("test:2", "mention")
+
+        assert "test:1" in session_manager.sessions
+        assert "test:2" in session_manager.sessions
+
+    @pytest.mark.asyncio
+    async def test_pinned_session_is_not_evicted_by_concurrent_request(
+        self, session_manager, mock_config
+    ):
+        """処理中のリクエストが使用しているセッションは他のリクエストで解放されない."""
+        mock_config.MAX_SESSIONS = 1
+        generating = asyncio.Event()
+        release = asyncio.Event()
+
+        async def handle_request() -> ChatSession:
+            async with session_manager.pinned("test:1"):
+                session = await session_manager.create_session("test:1", "mention")
+                await session_manager.add_message("test:1", MessageRole.USER, "質問")
+                # LLM の応答を待つ間に他のリクエストが処理される
+                generating.set()
+                await release.wait()
+                await session_manager.add_message(
+                    "test:1", MessageRole.ASSISTANT, "応答"
+                )
+                await session_manager.save_session("test:1")
+                return session
+
+        request = asyncio.create_task(handle_request())
+        await generating.wait()
+        await session_manager.create_session("test:2", "mention")
+
+        # 上限を超えていても、処理中の test:1 は解放されない
+        assert set(session_manager.sessions) == {"test:1", "test:2"}
+
+        release.set()
+        session = await request
+        assert session_manager.sessions["test:1"] is session
+        assert [m.content for m in session.messages] == ["質問", "応答"]
+        assert session_manager._pins == {}
+
+        # 処理が終われば通常どおり解放の対象になる
+        await session_manager.create_session("test:3", "mention")
+        assert "test:1" not in session_manager.sessions
@@ -0,0 +1,179 @@
+"""会話のローリングサマリーのテスト."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from kotonoha_bot.db.models import ChatSession, MessageRole
+from kotonoha_bot.services.ai import TokenInfo
+from kotonoha_bot.services.summary import SUMMARY_HEADER, ConversationSummarizer
+
+
+@pytest.fixture
+def mock_config():
+    """モックConfig."""
+    config = MagicMock()
+    config.EAVESDROP_JUDGE_MODEL = "claude-haiku-4-5"
+    config.SUMMARY_UPDATE_INTERVAL_TURNS = 2
+    config.SUMMARY_KEEP_RECENT_MESSAGES = 2
+    config.SUMMARY_MAX_TOKENS = 256
+    return config
+
+
+@pytest.fixture
+def mock_ai_provider():
+    """モックAIProvider."""
+    provider = MagicMock()
+    provider.generate_response = AsyncMock(
+        return_value=(
+            " 要約テキスト ",
+            TokenInfo(
+                input_tokens=10,
+                output_tokens=5,
+                total_tokens=15,
+                model_used="claude-haiku-4-5",
+                latency_ms=100,
+            ),
+        )
+    )
+    return provider
+
+
+@pytest.fixture
+def mock_session_manager():
+    """モックSessionManager."""
+    manager = MagicMock()
+    manager.save_session = AsyncMock()
+    return manager
+
+
+@pytest.fixture
+def summarizer(mock_session_manager, mock_ai_provider, mock_config):
+    """ConversationSummarizer インスタンス."""
+    return ConversationSummarizer(
+        mock_session_manager, mock_ai_provider, config=mock_config
+    )
+
+
+def _session(turns: int) -> ChatSession:
+    """指定ターン数の会話を持つセッションを作成."""
+    session = ChatSession(session_key="mention:1", session_type="mention")
+    for i in range(turns):
+        session.add_message(MessageRole.USER, f"質問{i}")
+        session.add_message(MessageRole.ASSISTANT, f"回答{i}")
+    return session
+
+
+def test_summarizer_requires_config(mock_session_manager, mock_ai_provider):
+    """config が None の場合はエラー."""
+    with pytest.raises(ValueError, match="config parameter is required"):
+        ConversationSummarizer(mock_session_manager, mock_ai_provider)
+
+
+def test_apply_without_summary_returns_full_history(summarizer):
+    """要約がない場合は会話履歴とプロンプトをそのまま返す."""
+    session = _session(3)
+
+    history, system_prompt = summarizer.apply(session, "SYSTEM")
+
+    assert history == session.messages
+    assert system_prompt == "SYSTEM"
+
+
+def test_apply_replaces_summarized_turns(summarizer):
+    """要約済みのメッセージは要約に置き換えられる."""
+    session = _session(3)
+    session.summary = "要約"
+    session.summary_message_index = 4
+
+    history, system_prompt = summarizer.apply(session, "SYSTEM")
+
+    assert [m.content for m in history] == ["質問2", "回答2"]
+    assert system_prompt == "SYSTEM" + SUMMARY_HEADER + "要約"
+
+
+@pytest.mark.asyncio
+async def test_schedule_update_skips_short_sessions(summarizer, mock_ai_provider):
+    """要約対象のターン数が間隔に満たない場合は要約しない."""
+    summarizer.schedule_update(_session(2))
+    await summarizer.close()
+
+    mock_ai_provider.generate_response.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_schedule_update_summarizes_in_background(
+    summarizer, mock_ai_provider, mock_session_manager
+):
+    """要約を判定用モデルで生成し、セッションに保存する."""
+    session = _session(4)
+
+    summarizer.schedule_update(session)
+    await summarizer.close()
+
+    kwargs = mock_ai_provider.generate_response.call_args.kwargs
+    assert kwargs["model"] == "claude-haiku-4-5"
+    assert kwargs["max_tokens"] == 256
+    assert "質問0" in kwargs["messages"][0].content
+    # 直近2件は要約に含めない
+    assert "質問3" not in kwargs["messages"][0].content
+    assert session.summary == "要約テキスト"
+    assert session.summary_message_index == 6
+    mock_session_manager.save_session.assert_awaited_once_with("mention:1")
+
+
+@pytest.mark.asyncio
+async def test_schedule_update_runs_once_per_session(summarizer, mock_ai_provider):
+    """同じセッションの要約は同時に1つしか実行しない."""
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_response(**_kwargs):
+        started.set()
+        await release.wait()
+        return "要約", MagicMock()
+
+    mock_ai_provider.generate_response = AsyncMock(side_effect=slow_response)
+    session = _session(4)
+
+    summarizer.schedule_update(session)
+    summarizer.schedule_update(session)
+    await started.wait()
+    release.set()
+    await summarizer.close()
+
+    assert mock_ai_provider.generate_response.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_summary_discarded_when_session_reset(summarizer, mock_ai_provider):
+    """要約中に会話履歴がリセットされた場合は要約を反映しない."""
+    session = _session(4)
+
+    async def reset_during_summary(**_kwargs):
+        session.messages.clear()
+        return "要約", MagicMock()
+
+    mock_ai_provider.generate_response = AsyncMock(side_effect=reset_during_summary)
+
+    summarizer.schedule_update(session)
+    await summarizer.close()
+
+    assert session.summary is None
+    assert session.summary_message_index == 0
+
+
+@pytest.mark.asyncio
+async def test_summary_failure_keeps_previous_summary(summarizer, mock_ai_provider):
+    """要約の生成に失敗しても既存の要約は保持される."""
+    session = _session(6)
+    session.summary = "以前の要約"
+    session.summary_message_index = 2
+    mock_ai_provider.generate_response = AsyncMock(side_effect=RuntimeError("API"))
+
+    summarizer.schedule_update(session)
+    await summarizer.close()
+
+    assert session.summary == "以前の要約"
+    assert session.summary_message_index == 2
@@ -7,7 +7,12 @@ from datetime import UTC, datetime
 
 import pytest
 
-from kotonoha_bot.db.base import DatabaseProtocol, KnowledgeBaseProtocol
+from kotonoha_bot.db.base import (
+    DatabaseProtocol,
+    EmbeddingStoreProtocol,
+    JudgementStoreProtocol,
+    KnowledgeBaseProtocol,
+)
 from kotonoha_bot.db.models import ChatSession, Message, MessageRole
 from kotonoha_bot.db.postgres import PostgreSQLDatabase
 
@@ -22,6 +27,16 @@ def test_postgres_database_implements_knowledge_base_protocol():
     assert issubclass(PostgreSQLDatabase, KnowledgeBaseProtocol)
 
 
+def test_postgres_database_implements_judgement_store_protocol():
+    """PostgreSQLDatabaseがJudgementStoreProtocolを実装していることを確認"""
+    assert issubclass(PostgreSQLDatabase, JudgementStoreProtocol)
+
+
+def test_postgres_database_implements_embedding_store_protocol():
+    """PostgreSQLDatabaseがEmbeddingStoreProtocolを実装していることを確認"""
+    assert issubclass(PostgreSQLDatabase, EmbeddingStoreProtocol)
+
+
 @pytest.mark.asyncio
 async def test_database_protocol_methods_implemented(postgres_db):
     """DatabaseProtocolのすべてのメソッドが実装されていることを確認"""
@@ -32,6 +47,7 @@ async def test_database_protocol_methods_implemented(postgres_db):
     assert hasattr(postgres_db, "load_session")
     assert hasattr(postgres_db, "delete_session")
     assert hasattr(postgres_db, "load_all_sessions")
+    assert hasattr(postgres_db, "load_session_headers")
 
     # メソッドがコーラブルであることを確認
     assert callable(postgres_db.initialize)
@@ -40,6 +56,7 @@ async def test_database_protocol_methods_implemented(postgres_db):
     assert callable(postgres_db.load_session)
     assert callable(postgres_db.delete_session)
     assert callable(postgres_db.load_all_sessions)
+    assert callable(postgres_db.load_session_headers)
 
 
 @pytest.mark.asyncio
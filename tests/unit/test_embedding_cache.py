@@ -0,0 +1,127 @@
+"""Embedding のキャッシュのテスト."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from kotonoha_bot.db.base import EmbeddingStoreProtocol
+from kotonoha_bot.features.knowledge_base.embedding_cache import (
+    EmbeddingCache,
+    normalize_text,
+)
+from kotonoha_bot.features.knowledge_base.embedding_processor import (
+    EmbeddingProcessor,
+)
+
+
+class InMemoryStore(EmbeddingStoreProtocol):
+    """テスト用のメモリ上の永続化先."""
+
+    def __init__(self) -> None:
+        self.rows: dict[str, list[float]] = {}
+        self.loaded: list[list[str]] = []
+
+    async def load_embeddings(self, cache_keys: list[str]) -> dict[str, list[float]]:
+        self.loaded.append(cache_keys)
+        return {key: self.rows[key] for key in cache_keys if key in self.rows}
+
+    async def save_embeddings(
+        self,
+        model: str,  # noqa: ARG002
+        dimension: int,  # noqa: ARG002
+        embeddings: dict[str, list[float]],
+    ) -> None:
+        for key, embedding in embeddings.items():
+            self.rows.setdefault(key, embedding)
+
+
+def test_normalize_text():
+    """空白の違いや Unicode の合成・分解の違いは正規化で吸収される."""
+    assert normalize_text("  ユーザー1:  こんにちは\n\nユーザー2: やあ ") == (
+        "ユーザー1: こんにちは ユーザー2: やあ"
+    )
+    # 「が」（合成済み）と「か」+ 濁点（分解）
+    assert normalize_text("が") == normalize_text("が")
+
+
+def test_make_key():
+    """正規化後に同じ内容は同じキーになり、モデルや次元数が違えば別のキーになる."""
+    key = EmbeddingCache.make_key("small", 1536, "こんにちは  世界")
+
+    assert key == EmbeddingCache.make_key("small", 1536, "こんにちは 世界")
+    assert key != EmbeddingCache.make_key("large", 1536, "こんにちは 世界")
+    assert key != EmbeddingCache.make_key("small", 512, "こんにちは 世界")
+
+
+@pytest.mark.asyncio
+async def test_get_many_reads_store_for_memory_misses():
+    """メモリにないキーだけを store から読み込み、メモリに保持する."""
+    store = InMemoryStore()
+    store.rows["stored"] = [0.2]
+    cache = EmbeddingCache(max_entries=8, store=store)
+    await cache.put_many("small", 1, {"memory": [0.1]})
+
+    found = await cache.get_many(["memory", "stored", "missing", "memory"])
+
+    assert found == {"memory": [0.1], "stored": [0.2]}
+    assert store.loaded == [["stored", "missing"]]
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_memory_disabled():
+    """上限を超えると最も長く使われていないものから削除し、0 ならメモリに保持しない."""
+    cache = EmbeddingCache(max_entries=2)
+    await cache.put_many("small", 1, {"a": [1.0], "b": [2.0]})
+    await cache.get_many(["a"])  # a を最近使用したものにする
+    await cache.put_many("small", 1, {"c": [3.0]})
+
+    assert await cache.get_many(["a", "b", "c"]) == {"a": [1.0], "c": [3.0]}
+
+    store = InMemoryStore()
+    no_memory = EmbeddingCache(max_entries=0, store=store)
+    await no_memory.put_many("small", 1, {"a": [1.0]})
+
+    assert len(no_memory) == 0
+    assert await no_memory.get_many(["a"]) == {"a": [1.0]}
+
+
+@pytest.mark.asyncio
+async def test_store_failure_is_treated_as_miss():
+    """store の読み書きに失敗してもエラーにせず、キャッシュなしとして扱う."""
+    store = MagicMock(spec=EmbeddingStoreProtocol)
+    store.load_embeddings = AsyncMock(side_effect=Exception("connection lost"))
+    store.save_embeddings = AsyncMock(side_effect=Exception("connection lost"))
+    cache = EmbeddingCache(max_entries=8, store=store)
+
+    assert await cache.get_many(["a"]) == {}
+    await cache.put_many("small", 1, {"a": [1.0]})
+    assert await cache.get_many(["a"]) == {"a": [1.0]}
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_uses_cache():
+    """キャッシュにあるテキストと、バッチ内で重複するテキストはベクトル化しない."""
+    provider = MagicMock()
+    provider.model = "text-embedding-3-small"
+    provider.get_dimension = lambda: 3
+    provider.generate_embeddings_batch = AsyncMock(
+        side_effect=lambda texts: [[float(len(text))] * 3 for text in texts]
+    )
+    cache = EmbeddingCache(max_entries=8, store=InMemoryStore())
+    processor = EmbeddingProcessor(
+        db=MagicMock(),
+        embedding_provider=provider,
+        batch_size=10,
+        max_concurrent=1,
+        embedding_cache=cache,
+    )
+
+    first = await processor._generate_embeddings_cached(["あい", "あい ", "う"])
+    second = await processor._generate_embeddings_cached(["う", "えおか"])
+
+    assert first == [[2.0] * 3, [2.0] * 3, [1.0] * 3]
+    assert second == [[1.0] * 3, [3.0] * 3]
+    assert [
+        call.args[0] for call in provider.generate_embeddings_batch.await_args_list
+    ] == [["あい", "う"], ["えおか"]]
@@ -1,8 +1,10 @@
 """EmbeddingProcessor のテスト"""
 
 import asyncio
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
+import httpx
+import openai
 import pytest
 
 from kotonoha_bot.external.embedding.openai_embedding import (
@@ -629,8 +631,8 @@ async def test_embedding_processor_start_method(postgres_db, mock_embedding_prov
     # タスクが開始されていることを確認
     assert processor.process_pending_embeddings.is_running()
 
-    # クリーンアップ
-    processor.process_pending_embeddings.cancel()
+    # クリーンアップ（通知の待ち受けも停止する）
+    await processor.graceful_shutdown()
 
 
 @pytest.mark.asyncio
@@ -947,3 +949,576 @@ async def test_embedding_processor_update_source_status_partial(postgres_db):
         )
         assert result is not None
         assert result["status"] == "partial"
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_record_failures_set_based(postgres_db):
+    """複数ソースのチャンクの失敗がまとめて記録され、上限に達したものはDLQに移動されるテスト"""
+    from kotonoha_bot.config import settings
+
+    error_provider = AsyncMock(spec=OpenAIEmbeddingProvider)
+    error_provider.generate_embeddings_batch = AsyncMock(
+        side_effect=Exception("API Error")
+    )
+    error_provider.get_dimension = lambda: 1536
+
+    chunk_ids = []
+    source_ids = []
+    for i in range(2):
+        source_id = await postgres_db.save_source(
+            source_type="discord_session",
+            title=f"一括失敗テスト{i}",
+            uri=None,
+            metadata={"test": True},
+            status="pending",
+        )
+        source_ids.append(source_id)
+        for j in range(3):
+            chunk_ids.append(
+                await postgres_db.save_chunk(
+                    source_id=source_id,
+                    content=f"一括失敗テスト用チャンク{i}-{j}",
+                    token_count=10,
+                )
+            )
+
+    processor = EmbeddingProcessor(
+        db=postgres_db,
+        embedding_provider=error_provider,
+        batch_size=10,
+        max_concurrent=2,
+    )
+
+    # 1回目: すべてのチャンクの retry_count が増える
+    await processor._process_pending_embeddings_impl()
+    async with postgres_db.pool.acquire() as conn:
+        retry_counts = await conn.fetch(
+            "SELECT retry_count FROM knowledge_chunks WHERE id = ANY($1::bigint[])",
+            chunk_ids,
+        )
+    assert [row["retry_count"] for row in retry_counts] == [1] * len(chunk_ids)
+
+    # 上限まで: すべてのチャンクがソース情報付きでDLQに移動される
+    for _ in range(settings.kb_embedding_max_retry - 1):
+        await processor._process_pending_embeddings_impl()
+
+    async with postgres_db.pool.acquire() as conn:
+        remaining = await conn.fetchval(
+            "SELECT COUNT(*) FROM knowledge_chunks WHERE id = ANY($1::bigint[])",
+            chunk_ids,
+        )
+        dlq_rows = await conn.fetch(
+            """
+            SELECT original_chunk_id, source_title, retry_count
+            FROM knowledge_chunks_dlq
+            WHERE original_chunk_id = ANY($1::bigint[])
+            """,
+            chunk_ids,
+        )
+
+    assert remaining == 0
+    assert sorted(row["original_chunk_id"] for row in dlq_rows) == chunk_ids
+    assert {row["source_title"] for row in dlq_rows} == {
+        "一括失敗テスト0",
+        "一括失敗テスト1",
+    }
+    assert all(
+        row["retry_count"] == settings.kb_embedding_max_retry for row in dlq_rows
+    )
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_update_source_status_multiple_sources(
+    postgres_db, mock_embedding_provider
+):
+    """複数ソースのステータスがまとめて更新されるテスト"""
+    source_ids = {}
+    for name in ("completed", "partial", "pending"):
+        source_ids[name] = await postgres_db.save_source(
+            source_type="discord_session",
+            title=f"一括ステータス更新テスト（{name}）",
+            uri=None,
+            metadata={"test": True},
+            status="pending",
+        )
+
+    # pending のソースだけ未処理のチャンクを持つ
+    await postgres_db.save_chunk(
+        source_id=source_ids["pending"],
+        content="未処理のチャンク",
+        token_count=10,
+    )
+    async with postgres_db.pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO knowledge_chunks_dlq
+            (original_chunk_id, source_id, content, error_code, retry_count)
+            VALUES (NULL, $1, 'DLQのチャンク', 'TEST_ERROR', 3)
+            """,
+            source_ids["partial"],
+        )
+
+    processor = EmbeddingProcessor(
+        db=postgres_db,
+        embedding_provider=mock_embedding_provider,
+        batch_size=10,
+        max_concurrent=2,
+    )
+
+    await processor._update_source_status(
+        [{"source_id": source_id} for source_id in source_ids.values()]
+    )
+
+    async with postgres_db.pool.acquire() as conn:
+        rows = await conn.fetch(
+            "SELECT id, status FROM knowledge_sources WHERE id = ANY($1::bigint[])",
+            list(source_ids.values()),
+        )
+    statuses = {row["id"]: row["status"] for row in rows}
+    assert statuses[source_ids["completed"]] == "completed"
+    assert statuses[source_ids["partial"]] == "partial"
+    assert statuses[source_ids["pending"]] == "pending"
+
+
+def _make_drain_processor() -> EmbeddingProcessor:
+    """DB を使わずに _drain をテストするための EmbeddingProcessor."""
+    provider = AsyncMock(spec=OpenAIEmbeddingProvider)
+    provider.get_dimension = lambda: 1536
+    return EmbeddingProcessor(
+        db=MagicMock(),
+        embedding_provider=provider,
+        batch_size=10,
+        max_concurrent=4,
+    )
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_drain_until_backlog_empty():
+    """バックログがなくなるまで連続で処理されること"""
+    processor = _make_drain_processor()
+    processor._process_pending_embeddings_impl = AsyncMock(side_effect=[40, 40, 7, 0])
+
+    total = await processor._drain()
+
+    assert total == 87
+    assert processor._process_pending_embeddings_impl.await_count == 4
+    assert not processor._draining
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_drain_stops_on_failure():
+    """API障害時はリトライ回数を使い切らないよう、次のポーリングまで中断すること"""
+    processor = _make_drain_processor()
+
+    async def failing_impl() -> int:
+        processor._last_failed = True
+        return 10
+
+    processor._process_pending_embeddings_impl = AsyncMock(side_effect=failing_impl)
+
+    await processor._drain()
+
+    assert processor._process_pending_embeddings_impl.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_drain_backs_off_on_rate_limit(monkeypatch):
+    """レート制限時は指数バックオフしてから処理を再開すること"""
+    from kotonoha_bot.features.knowledge_base import embedding_processor
+
+    processor = _make_drain_processor()
+    rate_limited_rounds = iter([True, True, False])
+
+    async def impl() -> int:
+        processor._rate_limited = next(rate_limited_rounds, False)
+        return 0 if not processor._rate_limited else 10
+
+    processor._process_pending_embeddings_impl = AsyncMock(side_effect=impl)
+    sleep = AsyncMock()
+    monkeypatch.setattr(embedding_processor.asyncio, "sleep", sleep)
+
+    await processor._drain()
+
+    assert [call.args[0] for call in sleep.await_args_list] == [1.0, 2.0]
+    assert processor._process_pending_embeddings_impl.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_notify_during_drain_rechecks():
+    """処理中に届いた通知で、バックログを再確認すること"""
+    processor = _make_drain_processor()
+    calls = 0
+
+    async def impl() -> int:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            # 処理中にチャンクが登録された
+            processor._on_chunks_inserted(None, 0, "knowledge_chunks_pending", "")
+        return 0
+
+    processor._process_pending_embeddings_impl = AsyncMock(side_effect=impl)
+
+    await processor._drain()
+
+    assert calls == 2
+    assert not processor._tasks
+
+
+class _FakeListenConnection:
+    """通知の待ち受けのテスト用の接続."""
+
+    def __init__(self) -> None:
+        self.channels: list[str] = []
+        self.termination_listeners: list = []
+        self.closed = False
+
+    def add_termination_listener(self, callback) -> None:
+        self.termination_listeners.append(callback)
+
+    def remove_termination_listener(self, callback) -> None:
+        self.termination_listeners.remove(callback)
+
+    async def add_listener(self, channel: str, _callback) -> None:
+        self.channels.append(channel)
+
+    async def remove_listener(self, channel: str, _callback) -> None:
+        self.channels.remove(channel)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def terminate(self) -> None:
+        self.closed = True
+        for callback in list(self.termination_listeners):
+            callback(self)
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_listener_reconnects(monkeypatch):
+    """待ち受けの接続が切れたら再接続し、切断中のチャンクを処理すること"""
+    import contextlib
+
+    from kotonoha_bot.features.knowledge_base import embedding_processor
+
+    processor = _make_drain_processor()
+    processor._on_chunks_inserted = MagicMock()
+    first, second = _FakeListenConnection(), _FakeListenConnection()
+    # 1回目は接続に失敗し、2回目の接続が切れ、3回目で再び待ち受ける
+    attempts = iter([OSError("connection refused"), first, second])
+
+    @contextlib.asynccontextmanager
+    async def acquire():
+        conn = next(attempts)
+        if isinstance(conn, Exception):
+            raise conn
+        yield conn
+
+    processor.db.pool.acquire = acquire
+    real_sleep = asyncio.sleep
+    delays = []
+
+    async def fake_sleep(delay: float) -> None:
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(embedding_processor.asyncio, "sleep", fake_sleep)
+
+    async def wait_until(condition) -> None:
+        for _ in range(100):
+            if condition():
+                return
+            await real_sleep(0)
+        raise AssertionError("condition not met")
+
+    listener = asyncio.create_task(processor._listen_for_chunks())
+    try:
+        await wait_until(lambda: first.channels)
+        first.terminate()
+        await wait_until(lambda: second.channels)
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+    # 接続に成功すると待機時間は1秒に戻る
+    assert delays == [1.0, 1.0]
+    # 再接続のたびに切断中に登録されたチャンクを処理する
+    assert processor._on_chunks_inserted.call_count == 2
+    assert not first.termination_listeners
+    assert not second.channels
+    assert not second.termination_listeners
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_concurrent_batches(
+    postgres_db, mock_embedding_provider
+):
+    """並行数ぶんのバッチを1回でまとめて処理すること"""
+    source_id = await postgres_db.save_source(
+        source_type="discord_session",
+        title="並行バッチテスト",
+        uri="https://example.com/concurrent",
+        metadata={"test": True},
+        status="pending",
+    )
+    chunk_ids = [
+        await postgres_db.save_chunk(
+            source_id=source_id,
+            content=f"並行バッチ用のチャンク{i}",
+            location={"url": "https://example.com/concurrent", "label": str(i)},
+            token_count=10,
+        )
+        for i in range(5)
+    ]
+
+    processor = EmbeddingProcessor(
+        db=postgres_db,
+        embedding_provider=mock_embedding_provider,
+        batch_size=2,
+        max_concurrent=3,
+    )
+
+    claimed = await processor._process_pending_embeddings_impl()
+
+    assert claimed == 5
+    assert mock_embedding_provider.generate_embeddings_batch.await_count == 3
+    async with postgres_db.pool.acquire() as conn:
+        processed = await conn.fetchval(
+            """
+            SELECT COUNT(*) FROM knowledge_chunks
+            WHERE id = ANY($1::bigint[]) AND embedding IS NOT NULL
+        """,
+            chunk_ids,
+        )
+        status = await conn.fetchval(
+            "SELECT status FROM knowledge_sources WHERE id = $1", source_id
+        )
+    assert processed == 5
+    assert status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_rate_limit_keeps_retry_count(postgres_db):
+    """レート制限時は retry_count を増やさず、並行数を減らすこと"""
+    source_id = await postgres_db.save_source(
+        source_type="discord_session",
+        title="レート制限テスト",
+        uri="https://example.com/rate_limit",
+        metadata={"test": True},
+        status="pending",
+    )
+    chunk_id = await postgres_db.save_chunk(
+        source_id=source_id,
+        content="レート制限テスト用のチャンク",
+        location={"url": "https://example.com/rate_limit", "label": "テスト"},
+        token_count=10,
+    )
+
+    provider = AsyncMock(spec=OpenAIEmbeddingProvider)
+    provider.generate_embeddings_batch = AsyncMock(
+        side_effect=Exception("Error code: 429 - rate limit exceeded")
+    )
+    provider.get_dimension = lambda: 1536
+    processor = EmbeddingProcessor(
+        db=postgres_db,
+        embedding_provider=provider,
+        batch_size=10,
+        max_concurrent=4,
+    )
+
+    await processor._process_pending_embeddings_impl()
+
+    assert processor._rate_limited
+    assert processor._concurrency == 2
+    async with postgres_db.pool.acquire() as conn:
+        retry_count = await conn.fetchval(
+            "SELECT retry_count FROM knowledge_chunks WHERE id = $1", chunk_id
+        )
+    assert retry_count == 0
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_bisects_to_isolate_poison_chunk():
+    """入力が原因の失敗はバッチを二分し、原因のチャンクだけを失敗として記録すること"""
+    processor = _make_drain_processor()
+    chunks = [{"id": i, "content": f"チャンク{i}"} for i in range(8)]
+    chunks[5]["content"] = "POISON"
+    requested: list[list[str]] = []
+
+    async def generate(texts: list[str]) -> list[list[float]]:
+        requested.append(texts)
+        if "POISON" in texts:
+            raise Exception("Error code: 400 - invalid input")
+        return [[0.1] * 3 for _ in texts]
+
+    processor._generate_embeddings_cached = AsyncMock(side_effect=generate)
+    processor._save_embeddings = AsyncMock()
+    processor._record_failures = AsyncMock()
+
+    processed = await processor._process_batch(chunks)
+
+    assert processed == 7
+    saved_ids = sorted(
+        chunk["id"]
+        for call in processor._save_embeddings.await_args_list
+        for chunk in call.args[0]
+    )
+    assert saved_ids == [0, 1, 2, 3, 4, 6, 7]
+    processor._record_failures.assert_awaited_once()
+    assert processor._record_failures.await_args.args[0] == [5]
+    # 8 → 4 → 2 → 1 と二分するため、API 呼び出しは 1 + 2 + 2 + 2 回
+    assert len(requested) == 7
+    assert not processor._last_failed
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_does_not_bisect_api_outage():
+    """サーバーエラーなど全チャンクで失敗するエラーは二分せず、処理を中断すること"""
+    processor = _make_drain_processor()
+    chunks = [{"id": i, "content": f"チャンク{i}"} for i in range(4)]
+    processor._generate_embeddings_cached = AsyncMock(
+        side_effect=Exception("500 Internal Server Error")
+    )
+    processor._save_embeddings = AsyncMock()
+    processor._record_failures = AsyncMock()
+
+    processed = await processor._process_batch(chunks)
+
+    assert processed == 0
+    assert processor._generate_embeddings_cached.await_count == 1
+    assert processor._record_failures.await_args.args[0] == [0, 1, 2, 3]
+    assert processor._last_failed
+
+
+def test_embedding_processor_classify_invalid_input():
+    """入力が原因のエラーは INVALID_INPUT に分類されること"""
+    processor = _make_drain_processor()
+
+    assert (
+        processor._classify_error(
+            Exception(
+                "Error code: 400 - This model's maximum context length is 8192 "
+                "tokens, however you requested 9500 tokens"
+            )
+        )
+        == "INVALID_INPUT"
+    )
+    assert processor._generalize_error_message(
+        Exception("Error code: 400 - invalid input")
+    ) == ("Invalid input for embedding")
+
+
+def _openai_status_error(error_type: type, status_code: int, body: dict):
+    """OpenAI の HTTP ステータスエラーを作成."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(status_code, request=request)
+    return error_type(
+        f"Error code: {status_code} - {body}", response=response, body=body
+    )
+
+
+def test_embedding_processor_classify_openai_errors():
+    """OpenAI の例外はメッセージではなく型で分類されること"""
+    processor = _make_drain_processor()
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+
+    # 401 の本文は 'invalid_request_error' / 'invalid_api_key' を含むが入力エラーではない
+    auth_error = _openai_status_error(
+        openai.AuthenticationError,
+        401,
+        {"type": "invalid_request_error", "code": "invalid_api_key"},
+    )
+    assert processor._classify_error(auth_error) == "AUTHENTICATION_ERROR"
+    assert (
+        processor._classify_error(openai.APIConnectionError(request=request))
+        == "CONNECTION_ERROR"
+    )
+    assert (
+        processor._classify_error(openai.APITimeoutError(request=request))
+        == "EMBEDDING_API_TIMEOUT"
+    )
+    bad_request = _openai_status_error(
+        openai.BadRequestError, 400, {"type": "invalid_request_error"}
+    )
+    assert processor._classify_error(bad_request) == "INVALID_INPUT"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error",
+    [
+        _openai_status_error(
+            openai.AuthenticationError,
+            401,
+            {"type": "invalid_request_error", "code": "invalid_api_key"},
+        ),
+        openai.APIConnectionError(
+            request=httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+        ),
+    ],
+    ids=["authentication", "connection"],
+)
+async def test_embedding_processor_does_not_bisect_auth_or_connection_error(error):
+    """認証エラー・接続エラーは二分せず、1 回の呼び出しで処理を中断すること"""
+    processor = _make_drain_processor()
+    chunks = [{"id": i, "content": f"チャンク{i}"} for i in range(4)]
+    processor._generate_embeddings_cached = AsyncMock(side_effect=error)
+    processor._save_embeddings = AsyncMock()
+    processor._record_failures = AsyncMock()
+
+    processed = await processor._process_batch(chunks)
+
+    assert processed == 0
+    assert processor._generate_embeddings_cached.await_count == 1
+    assert processor._record_failures.await_count == 1
+    assert processor._record_failures.await_args.args[0] == [0, 1, 2, 3]
+    assert processor._last_failed
+
+
+@pytest.mark.asyncio
+async def test_embedding_processor_poison_chunk_does_not_fail_batch(postgres_db):
+    """不正なチャンクがあっても、他のチャンクはベクトル化されること"""
+    source_id = await postgres_db.save_source(
+        source_type="discord_session",
+        title="部分失敗テスト",
+        uri="https://example.com/poison",
+        metadata={"test": True},
+        status="pending",
+    )
+    chunk_ids = [
+        await postgres_db.save_chunk(
+            source_id=source_id,
+            content="POISON" if i == 2 else f"部分失敗テスト用のチャンク{i}",
+            location={"url": "https://example.com/poison", "label": str(i)},
+            token_count=10,
+        )
+        for i in range(4)
+    ]
+
+    async def generate(texts: list[str]) -> list[list[float]]:
+        if "POISON" in texts:
+            raise Exception("Error code: 400 - invalid input")
+        return [[0.1] * 1536 for _ in texts]
+
+    provider = AsyncMock(spec=OpenAIEmbeddingProvider)
+    provider.generate_embeddings_batch = AsyncMock(side_effect=generate)
+    provider.get_dimension = lambda: 1536
+    processor = EmbeddingProcessor(
+        db=postgres_db,
+        embedding_provider=provider,
+        batch_size=10,
+        max_concurrent=1,
+    )
+
+    await processor._process_pending_embeddings_impl()
+
+    async with postgres_db.pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT id, embedding IS NOT NULL AS embedded, retry_count
+            FROM knowledge_chunks WHERE id = ANY($1::bigint[]) ORDER BY id
+        """,
+            chunk_ids,
+        )
+    assert [row["embedded"] for row in rows] == [True, True, False, True]
+    assert [row["retry_count"] for row in rows] == [0, 0, 1, 0]
@@ -33,6 +33,8 @@ def mock_handler():
     handler.session_manager = MagicMock()
     handler.session_manager.save_all_sessions = AsyncMock()
     handler.session_manager.sessions = {}
+    handler.summarizer = None
+    handler.eavesdrop.close = AsyncMock()
     return handler
 
 
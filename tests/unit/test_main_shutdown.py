@@ -33,6 +33,8 @@ def mock_handler():
     handler.session_manager = MagicMock()
     handler.session_manager.save_all_sessions = AsyncMock()
     handler.session_manager.sessions = {}
+    handler.summarizer = None
+    handler.eavesdrop.close = AsyncMock()
     return handler
 
 
@@ -54,6 +56,9 @@ async def test_shutdown_gracefully(mock_bot, mock_handler, mock_health_server):
     # ヘルスチェックサーバーが停止される
     mock_health_server.stop.assert_called_once()
 
+    # 待機中の聞き耳型の判定が取り消される
+    mock_handler.eavesdrop.close.assert_awaited_once()
+
     # セッションが保存される
     mock_handler.session_manager.save_all_sessions.assert_called_once()
 
@@ -61,6 +66,25 @@ async def test_shutdown_gracefully(mock_bot, mock_handler, mock_health_server):
     mock_bot.close.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_shutdown_gracefully_closes_summarizer_before_saving(
+    mock_bot, mock_handler, mock_health_server
+):
+    """要約タスクの完了を待ってからセッションが保存されることを確認"""
+    calls = []
+    mock_handler.summarizer = MagicMock()
+    mock_handler.summarizer.close = AsyncMock(
+        side_effect=lambda: calls.append("summarizer.close")
+    )
+    mock_handler.session_manager.save_all_sessions.side_effect = lambda: calls.append(
+        "save_all_sessions"
+    )
+
+    await shutdown_gracefully(mock_bot, mock_handler, mock_health_server)
+
+    assert calls == ["summarizer.close", "save_all_sessions"]
+
+
 @pytest.mark.asyncio
 async def test_shutdown_gracefully_when_bot_already_closed(
     mock_bot, mock_handler, mock_health_server
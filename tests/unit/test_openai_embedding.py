@@ -1,9 +1,11 @@
 """OpenAIEmbeddingProvider のテスト"""
 
+import asyncio
 import os
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from tenacity import wait_none
 
 from kotonoha_bot.external.embedding.openai_embedding import (
     OpenAIEmbeddingProvider,
@@ -31,6 +33,14 @@ def embedding_provider(mock_openai_client):
         return provider
 
 
+@pytest.fixture
+def no_retry_wait(monkeypatch):
+    """リクエストごとのリトライの待機を無くす（テスト時間の短縮）"""
+    monkeypatch.setattr(
+        OpenAIEmbeddingProvider._embed_request.retry, "wait", wait_none()
+    )
+
+
 @pytest.mark.asyncio
 async def test_openai_embedding_provider_initialization(embedding_provider):
     """OpenAIEmbeddingProviderの初期化テスト"""
@@ -168,7 +178,9 @@ async def test_generate_embedding_api_error(embedding_provider, mock_openai_clie
 
 @pytest.mark.asyncio
 async def test_generate_embeddings_batch_rate_limit_error(
-    embedding_provider, mock_openai_client
+    embedding_provider,
+    mock_openai_client,
+    no_retry_wait,  # noqa: ARG001
 ):
     """generate_embeddings_batchのレート制限エラーテスト"""
     import openai
@@ -180,17 +192,18 @@ async def test_generate_embeddings_batch_rate_limit_error(
         )
     )
 
-    # リトライロジックが動作することを確認
     with pytest.raises(openai.RateLimitError):
         await embedding_provider.generate_embeddings_batch(["テキスト1", "テキスト2"])
 
-    # リトライが試みられたことを確認
-    assert mock_openai_client.embeddings.create.call_count >= 1
+    # レート制限は呼び出し元が制御するため、リトライせずに送出する
+    assert mock_openai_client.embeddings.create.call_count == 1
 
 
 @pytest.mark.asyncio
 async def test_generate_embeddings_batch_timeout_error(
-    embedding_provider, mock_openai_client
+    embedding_provider,
+    mock_openai_client,
+    no_retry_wait,  # noqa: ARG001
 ):
     """generate_embeddings_batchのタイムアウトエラーテスト"""
     import openai
@@ -204,8 +217,8 @@ async def test_generate_embeddings_batch_timeout_error(
     with pytest.raises(openai.APITimeoutError):
         await embedding_provider.generate_embeddings_batch(["テキスト1", "テキスト2"])
 
-    # リトライが試みられたことを確認
-    assert mock_openai_client.embeddings.create.call_count >= 1
+    # 上限の3回までリトライされたことを確認
+    assert mock_openai_client.embeddings.create.call_count == 3
 
 
 @pytest.mark.asyncio
@@ -286,3 +299,107 @@ async def test_generate_embeddings_batch_empty_list(
 
     # 結果の検証
     assert len(results) == 0
+
+
+def _fake_create(delays: dict[str, float] | None = None):
+    """入力の長さをベクトルの値にして返す embeddings.create のモック"""
+
+    async def create(model: str, input: list[str], dimensions: int):  # noqa: A002, ARG001
+        # 後ろのリクエストが先に完了しても、結果の順序が保たれることを確認する
+        await asyncio.sleep((delays or {}).get(input[0], 0))
+        response = MagicMock()
+        response.data = [MagicMock(embedding=[float(len(text))]) for text in input]
+        return response
+
+    return create
+
+
+def test_pack_requests_respects_token_and_item_limits(mock_openai_client):  # noqa: ARG001
+    """トークン数・件数の上限を超えないように、順序を保ってリクエストに詰める"""
+    provider = OpenAIEmbeddingProvider(
+        api_key="test-api-key", max_request_tokens=10, max_request_items=3
+    )
+    provider._count_tokens = len  # 1文字 = 1トークンとして数える
+
+    texts = ["aaaa", "bbbb", "cc", "d" * 20, "e", "f", "g", "h"]
+
+    assert provider._pack_requests(texts) == [
+        ["aaaa", "bbbb", "cc"],
+        # 1件で上限を超える入力は単独のリクエストにする
+        ["d" * 20],
+        ["e", "f", "g"],
+        ["h"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batch_split_keeps_order(mock_openai_client):
+    """分割したリクエストを並行に送信し、入力と同じ順序で結果を返す"""
+    provider = OpenAIEmbeddingProvider(api_key="test-api-key", max_request_items=2)
+    provider._client = mock_openai_client
+    mock_openai_client.embeddings.create = AsyncMock(
+        side_effect=_fake_create(delays={"a": 0.05})
+    )
+
+    results = await provider.generate_embeddings_batch(["a", "bb", "ccc", "dddd", "e"])
+
+    assert results == [[1.0], [2.0], [3.0], [4.0], [1.0]]
+    assert mock_openai_client.embeddings.create.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batch_limits_concurrency(mock_openai_client):
+    """同時に送信するリクエスト数が上限を超えない"""
+    provider = OpenAIEmbeddingProvider(
+        api_key="test-api-key", max_request_items=1, max_concurrent_requests=2
+    )
+    provider._client = mock_openai_client
+    in_flight = 0
+    max_in_flight = 0
+    create = _fake_create()
+
+    async def tracked_create(**kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        try:
+            return await create(**kwargs)
+        finally:
+            in_flight -= 1
+
+    mock_openai_client.embeddings.create = AsyncMock(side_effect=tracked_create)
+
+    results = await provider.generate_embeddings_batch(["a"] * 6)
+
+    assert len(results) == 6
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batch_retries_failed_request_only(
+    mock_openai_client,
+    no_retry_wait,  # noqa: ARG001
+):
+    """失敗したリクエストだけをリトライする"""
+    import openai
+
+    provider = OpenAIEmbeddingProvider(api_key="test-api-key", max_request_items=1)
+    provider._client = mock_openai_client
+    create = _fake_create()
+    failed = False
+
+    async def flaky_create(**kwargs):
+        nonlocal failed
+        if kwargs["input"] == ["bb"] and not failed:
+            failed = True
+            raise openai.APITimeoutError(request=MagicMock())
+        return await create(**kwargs)
+
+    mock_openai_client.embeddings.create = AsyncMock(side_effect=flaky_create)
+
+    results = await provider.generate_embeddings_batch(["a", "bb", "ccc"])
+
+    assert results == [[1.0], [2.0], [3.0]]
+    # 3リクエスト + 失敗したリクエストのリトライ1回
+    assert mock_openai_client.embeddings.create.await_count == 4
@@ -465,6 +465,55 @@ async def test_chunking_strategy(postgres_db, mock_embedding_provider):
             )
 
 
+@pytest.mark.asyncio
+async def test_session_archiver_insert_chunks_in_batches(
+    postgres_db, mock_embedding_provider
+):
+    """チャンクが kb_chunk_insert_batch_size 件ずつまとめて入力順に登録される"""
+    import tiktoken
+
+    from kotonoha_bot.config import settings
+
+    archiver = SessionArchiver(
+        db=postgres_db,
+        embedding_provider=mock_embedding_provider,
+        archive_threshold_hours=1,
+    )
+    encoding = tiktoken.encoding_for_model("text-embedding-3-small")
+    chunks = [f"バッチ登録テスト用のチャンク{i}" for i in range(5)]
+
+    with patch.object(settings, "kb_chunk_insert_batch_size", 2):
+        async with postgres_db.pool.acquire() as conn, conn.transaction():
+            source_id = await conn.fetchval(
+                """
+                INSERT INTO knowledge_sources (type, title, uri, metadata, status)
+                VALUES ('discord_session', 'バッチ登録', NULL, '{}'::jsonb, 'pending')
+                RETURNING id
+            """
+            )
+            chunk_ids = await archiver._insert_chunks(
+                conn, source_id, chunks, None, "test:session:batch:001", encoding
+            )
+
+    assert len(chunk_ids) == len(chunks)
+
+    async with postgres_db.pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT id, content, location, token_count
+            FROM knowledge_chunks WHERE source_id = $1 ORDER BY id
+        """,
+            source_id,
+        )
+
+    assert [row["id"] for row in rows] == chunk_ids
+    assert [row["content"] for row in rows] == chunks
+    for i, row in enumerate(rows):
+        assert row["location"]["chunk_index"] == i
+        assert row["location"]["total_chunks"] == len(chunks)
+        assert row["token_count"] == len(encoding.encode(chunks[i]))
+
+
 @pytest.mark.asyncio
 async def test_session_archiver_format_messages_for_knowledge(
     postgres_db, mock_embedding_provider
@@ -1229,13 +1278,15 @@ async def test_session_archiver_archive_with_metadata(
     async with postgres_db.pool.acquire() as conn:
         source = await conn.fetchrow(
             """
-            SELECT metadata FROM knowledge_sources
+            SELECT metadata, channel_id, author_id FROM knowledge_sources
             WHERE metadata->>'origin_session_key' = $1
         """,
             "test:session:metadata:001",
         )
 
         assert source is not None
+        assert source["channel_id"] == 987654321
+        assert source["author_id"] == 111222333
         metadata = source["metadata"]
         assert metadata["channel_id"] == 987654321
         assert metadata["thread_id"] == 555666777